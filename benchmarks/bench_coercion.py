@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: cell conversions and time spent typing sheet values.
+
+Compares the old dict-per-pitch flow, which re-ran safe_float/safe_int/break_tilt_to_minutes
+inside every aggregator (Zone rewritten per grouping, Launch Angle parsed up to four times per
+batted ball, everything again for each hitter x pitch-type cell), with the typed schema
+ingest that converts each projected cell exactly once.
+
+Usage: python benchmarks/bench_coercion.py [n_pitches]
+"""
+
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import process_data as pd  # noqa: E402
+from reference import avg, is_barrel, median  # noqa: E402
+
+
+class Counted:
+    """Wrap a conversion function and count its calls."""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.calls = 0
+
+    def __call__(self, val):
+        self.calls += 1
+        return self.fn(val)
+
+
+def synthetic_sheets(n, seed=7):
+    """One pitching and one hitting sheet (header row first) with n rows each."""
+    rng = random.Random(seed)
+    pitch_header = ['Pitcher', 'Team', 'Throws', 'Pitch Type', 'Zone', 'Description', 'BB Type',
+                    'Break Tilt'] + pd.METRIC_COLS
+    hitter_header = ['Hitter', 'Team', 'Stands', 'Pitch Type', 'Zone', 'Description', 'BB Type',
+                     'Exit Velocity', 'Launch Angle', 'xBA', 'xSLG']
+    descs = ['Ball', 'Called Strike', 'Swinging Strike', 'Foul', 'In Play']
+    pts = ['FF', 'SI', 'SL', 'CH', 'CU']
+    pitch_rows, hitter_rows = [pitch_header], [hitter_header]
+    for _ in range(n):
+        desc = rng.choice(descs)
+        bb = rng.choice(['ground_ball', 'line_drive', 'fly_ball']) if desc == 'In Play' else ''
+        zone = str(rng.choice([1, 2, 3, 4, 5, 6, 7, 8, 9, 11, 12, 13, 14]))
+        pitch_rows.append([f'P{rng.randrange(300)}', 'NYY', 'R', rng.choice(pts), zone, desc, bb,
+                           f'{rng.randint(1, 12)}:{rng.randrange(60):02d}']
+                          + [f'{rng.gauss(0, 10):.1f}' for _ in pd.METRIC_COLS])
+        hitter_rows.append([f'H{rng.randrange(300)}', 'NYY', 'L', rng.choice(pts), zone, desc, bb,
+                            f'{rng.gauss(88, 10):.1f}' if bb else '', f'{rng.gauss(12, 20):.0f}' if bb else '',
+                            f'{rng.random():.3f}' if bb else '', f'{rng.random() * 2:.3f}' if bb else ''])
+    return pitch_rows, hitter_rows
+
+
+def legacy_hitter_stats(pitches):
+    """The batted-ball part of the old dict-based compute_hitter_stats (conversion pattern only)."""
+    sf = pd.safe_float
+    bip = [p for p in pitches if p['BB Type'] is not None]
+    ev_la_pos = [(sf(p.get('Exit Velocity')), sf(p.get('Launch Angle'))) for p in bip
+                 if sf(p.get('Launch Angle')) is not None and sf(p.get('Launch Angle')) > 0
+                 and sf(p.get('Exit Velocity')) is not None]
+    ev_la_all = [(sf(p.get('Exit Velocity')), sf(p.get('Launch Angle'))) for p in bip
+                 if sf(p.get('Exit Velocity')) is not None and sf(p.get('Launch Angle')) is not None]
+    all_la = [sf(p.get('Launch Angle')) for p in bip if sf(p.get('Launch Angle')) is not None]
+    xba = [sf(p.get('xBA')) for p in bip if sf(p.get('xBA')) is not None]
+    xslg = [sf(p.get('xSLG')) for p in bip if sf(p.get('xSLG')) is not None]
+    return (median([ev for ev, _ in ev_la_pos]), sum(is_barrel(ev, la) for ev, la in ev_la_all),
+            median(all_la), avg(xba), avg(xslg))
+
+
+def legacy_flow(pitch_rows, hitter_rows):
+    """Conversions performed by the old main(): dicts of raw strings, typed again per aggregator."""
+    def to_dicts(rows, key_col):
+        header = rows[0]
+        col_idx = {name: i for i, name in enumerate(header) if name}
+        out = []
+        for row in rows[1:]:
+            if row[col_idx[key_col]]:
+                out.append({c: (row[i] if row[i] != '' else None) for c, i in col_idx.items()})
+        return out
+
+    all_pitches, all_abs = to_dicts(pitch_rows, 'Pitcher'), to_dicts(hitter_rows, 'Hitter')
+
+    pitch_groups, pitcher_groups = defaultdict(list), defaultdict(list)
+    for p in all_pitches:
+        pitch_groups[(p['Pitcher'], p['Pitch Type'])].append(p)
+        pitcher_groups[p['Pitcher']].append(p)
+    for pitches in pitch_groups.values():
+        for col in pd.METRIC_COLS:
+            avg([pd.safe_float(p.get(col)) for p in pitches])
+        [pd.break_tilt_to_minutes(p.get('Break Tilt')) for p in pitches]
+        for p in pitches:
+            p['Zone'] = pd.safe_int(p.get('Zone'))
+    for pitches in pitcher_groups.values():
+        for p in pitches:
+            p['Zone'] = pd.safe_int(p.get('Zone'))
+    for p in all_pitches:  # pitch details
+        for col in ('IndVertBrk', 'HorzBrk', 'Velocity', 'RelPosX', 'RelPosZ'):
+            pd.safe_float(p.get(col))
+
+    hitter_groups = defaultdict(list)
+    for p in all_abs:
+        hitter_groups[p['Hitter']].append(p)
+    for pitches in hitter_groups.values():
+        for p in pitches:
+            p['Zone'] = pd.safe_int(p.get('Zone'))
+        legacy_hitter_stats(pitches)
+        by_pt = defaultdict(list)
+        for p in pitches:
+            by_pt[p['Pitch Type']].append(p)
+        for pt_pitches in by_pt.values():
+            legacy_hitter_stats(pt_pitches)
+
+
+def schema_flow(pitch_rows, hitter_rows):
+    """Typed ingest: every projected cell is validated and converted once."""
+    pitch_store, hitter_store = pd.ColumnStore(pd.PITCH_SCHEMA), pd.ColumnStore(pd.HITTER_SCHEMA)
+    pitch_store.add_sheet(pitch_rows, 'Pitcher')
+    hitter_store.add_sheet(hitter_rows, 'Hitter')
+    return pitch_store.to_arrays(), hitter_store.to_arrays()
+
+
+def measure(flow, pitch_rows, hitter_rows):
+    originals = (pd.safe_float, pd.safe_int, pd.break_tilt_to_minutes)
+    counters = [Counted(fn) for fn in originals]
+    pd.safe_float, pd.safe_int, pd.break_tilt_to_minutes = counters
+    try:
+        t0 = time.perf_counter()
+        flow(pitch_rows, hitter_rows)
+        elapsed = time.perf_counter() - t0
+    finally:
+        pd.safe_float, pd.safe_int, pd.break_tilt_to_minutes = originals
+    return sum(c.calls for c in counters), elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    pitch_rows, hitter_rows = synthetic_sheets(n)
+    print(f"{n} pitching rows + {n} hitting rows")
+    results = {}
+    for label, flow in (('dict + per-aggregator parsing', legacy_flow), ('typed schema ingest', schema_flow)):
+        calls, elapsed = measure(flow, pitch_rows, hitter_rows)
+        results[label] = calls
+        print(f"  {label:32s} {calls:>10,d} conversions  {elapsed:6.2f}s")
+    saved = results['dict + per-aggregator parsing'] - results['typed schema ingest']
+    print(f"  saved {saved:,d} conversions ({saved / max(1, results['dict + per-aggregator parsing']):.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Scaling benchmark: time and peak RSS of each process_data stage at 40k, 250k and 1M pitches.
+
+Each size runs in its own process against a synthetic snapshot (benchmarks/synthetic.py, cached
+under .cache/bench/), so peak RSS is per size. Stages follow a full rebuild from a local source:
+
+  ingest        read the tab files (LocalSource) one at a time and parse them into the on-disk
+                column files (PitchStore)
+  grouping      fold the memory-mapped columns into the aggregate state, a chunk at a time
+                (scans, group accumulators; pitch details go to per-shard files)
+  pitch / pitcher / hitter leaderboard, pitch details (the detail and summary shards, built a
+  shard at a time), hitter details, rolling windows, metadata
+  write         JSON files, detail shards and data_embedded.js
+  state         save aggregate_state.npz
+
+and, timed inside the leaderboard stages, the stat and percentile passes that replaced
+compute_stats (pitch_stats_from), compute_hitter_stats (hitter_stats_from; both now in
+benchmarks/reference.py) and
+compute_percentile_ranks (compute_percentile_ranks_batch / compute_percentile_ranks).
+Peak RSS is the process high-water mark after each stage.
+
+The results are compared with benchmarks/baseline.json (timings are machine-specific: re-record
+it with --save-baseline on the machine that checks it). A stage regresses when it is both
+REGRESSION_RATIO times and REGRESSION_SLACK seconds slower than its baseline, or peak RSS grows
+by more than RSS_RATIO; the script then exits non-zero.
+
+Usage: python benchmarks/bench_scaling.py [--sizes N ...] [--save-baseline]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+import process_data as pd  # noqa: E402
+import synthetic  # noqa: E402
+
+SIZES = [40000, 250000, 1000000]
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+SNAPSHOT_ROOT = os.path.normpath(os.path.join(BENCH_DIR, '..', '.cache', 'bench'))
+REGRESSION_RATIO = 1.5
+REGRESSION_SLACK = 0.25  # seconds
+RSS_RATIO = 1.25
+NESTED = ['pitch_stats_from', 'hitter_stats_from', 'compute_percentile_ranks_batch', 'compute_percentile_ranks']
+
+
+class Timed:
+    """Wrap a process_data function and add up the time spent in it."""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.seconds = 0.0
+
+    def __call__(self, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return self.fn(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - t0
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def snapshot_for(n_pitches, seed=1):
+    """A cached synthetic snapshot directory for n_pitches."""
+    snapshot_dir = os.path.join(SNAPSHOT_ROOT, f'{n_pitches}_{seed}_v{synthetic.SNAPSHOT_VERSION}')
+    if not os.path.exists(os.path.join(snapshot_dir, 'manifest.json')):
+        print(f"  generating {n_pitches:,d}-pitch snapshot in {snapshot_dir}...", file=sys.stderr)
+        synthetic.write_snapshot(snapshot_dir, n_pitches, seed)
+    return snapshot_dir
+
+
+def run_stages(snapshot_dir):
+    """Time every stage of a full rebuild from snapshot_dir in this process.
+    Returns {stage: {'seconds', 'peak_rss_mb'}}, the whole run under 'total' and the nested
+    timings ({'seconds'} only) under 'within <function>'."""
+    results = {}
+    timers = {name: Timed(getattr(pd, name)) for name in NESTED}
+
+    def stage(name, fn, *args):
+        t0 = time.perf_counter()
+        value = fn(*args)
+        results[name] = {'seconds': round(time.perf_counter() - t0, 3), 'peak_rss_mb': round(peak_rss_mb(), 1)}
+        return value
+
+    def ingest(folder):
+        source = pd.LocalSource(snapshot_dir)
+        books = source.open()
+        plan = [[(ws, None) for ws in worksheets] for _, worksheets in books]
+        stores = []
+        for sheets, schema, key_col, name in zip(source.read(books, plan), (pd.PITCH_SCHEMA, pd.HITTER_SCHEMA),
+                                                 ('Pitcher', 'Hitter'), pd.BOOK_NAMES):
+            store = pd.PitchStore(schema, os.path.join(folder, name))
+            for ws, rows in sheets:
+                store.add_sheet(rows, key_col, ws.title)
+            store.close()
+            stores.append(store)
+        return stores
+
+    def fold(state, pitch_store, hitter_store):
+        for cols in pitch_store.chunks():
+            state.fold_pitches(cols)
+        for cols in hitter_store.chunks():
+            state.fold_hitter_pitches(cols)
+
+    for name, timer in timers.items():
+        setattr(pd, name, timer)
+    try:
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            with tempfile.TemporaryDirectory() as store_dir:
+                stores = stage('ingest', ingest, store_dir)
+                state = pd.AggregateState()
+                stage('grouping', fold, state, *stores)
+            pitch_leaderboard, league_avgs = stage('pitch leaderboard', pd.build_pitch_leaderboard, state)
+            pitcher_leaderboard = stage('pitcher leaderboard', pd.build_pitcher_leaderboard, state)
+            hitter_leaderboard = stage('hitter leaderboard', pd.build_hitter_leaderboard, state)
+            stage('pitch details', state.pitch_details.build_shards)
+            hitter_details = stage('hitter details', pd.build_hitter_pitch_details, state)
+            windows = stage('rolling windows', pd.build_windows, state)
+            metadata = stage('metadata', pd.build_metadata, state, league_avgs, pitcher_leaderboard,
+                             hitter_leaderboard)
+            outputs = {'pitch_leaderboard': pitch_leaderboard, 'pitcher_leaderboard': pitcher_leaderboard,
+                       'hitter_leaderboard': hitter_leaderboard, 'metadata': metadata,
+                       'pitch_details': state.pitch_details, 'hitter_pitch_details': hitter_details,
+                       'windows': windows}
+            with tempfile.TemporaryDirectory() as out_dir:
+                stage('write', pd.write_outputs, outputs, out_dir)
+                stage('state', state.save, os.path.join(out_dir, pd.STATE_FILE))
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+    finally:
+        for name, timer in timers.items():
+            setattr(pd, name, timer.fn)
+    results['total'] = {'seconds': round(sum(r['seconds'] for r in results.values()), 3),
+                        'peak_rss_mb': round(peak_rss_mb(), 1)}
+    for name, timer in timers.items():
+        results[f'within {name}'] = {'seconds': round(timer.seconds, 3)}
+    return results
+
+
+def run_size(n_pitches):
+    """run_stages for n_pitches in a fresh interpreter (so peak RSS only covers that size)."""
+    snapshot_dir = snapshot_for(n_pitches)
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', snapshot_dir],
+                         check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out)
+
+
+def compare(results, baseline):
+    """Lines describing stages that regressed against the baseline."""
+    regressions = []
+    for size, stages in results.items():
+        for name, r in stages.items():
+            b = baseline.get(size, {}).get(name)
+            if b is None:
+                continue
+            if r['seconds'] > b['seconds'] * REGRESSION_RATIO and r['seconds'] > b['seconds'] + REGRESSION_SLACK:
+                regressions.append(f"{size} {name}: {r['seconds']:.2f}s vs {b['seconds']:.2f}s")
+            if 'peak_rss_mb' in r and 'peak_rss_mb' in b and r['peak_rss_mb'] > b['peak_rss_mb'] * RSS_RATIO:
+                regressions.append(f"{size} {name}: {r['peak_rss_mb']:.0f} MB vs {b['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage timings and peak RSS of process_data at several sizes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--save-baseline', action='store_true', help=f"write the results to {BASELINE_FILE}")
+    parser.add_argument('--child', metavar='SNAPSHOT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(run_stages(args.child)))
+        return
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f).get('results', {})
+    results = {}
+    for n in args.sizes:
+        stages = results[str(n)] = run_size(n)
+        base = baseline.get(str(n), {})
+        print(f"{n:,d} pitches (+ {n:,d} hitting rows)")
+        for name, r in stages.items():
+            was = f"  (baseline {base[name]['seconds']:.2f}s)" if name in base else ''
+            rss = f"{r['peak_rss_mb']:8.0f} MB" if 'peak_rss_mb' in r else ' ' * 11
+            print(f"  {name:40s} {r['seconds']:8.2f}s {rss}{was}")
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump({'machine': {'python': platform.python_version(), 'numpy': np.__version__,
+                                   'platform': platform.platform(), 'cpus': os.cpu_count()},
+                       'results': results}, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {BASELINE_FILE}")
+        return
+    regressions = compare(results, baseline)
+    for line in regressions:
+        print(f"  REGRESSION {line}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
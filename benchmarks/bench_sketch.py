@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Accuracy and memory check for the EV / LA median sketch (GroupSketch).
+
+Builds groups of every size around SKETCH_EXACT_LIMIT from EV- and LA-like distributions, both at
+the sheets' one-decimal resolution and at full float precision, feeds each group in several
+batches and through a merge, and compares the sketch medians with the exact median()
+(benchmarks/reference.py). Exits non-zero if any error exceeds the documented bound of half a
+histogram bin.
+
+Usage: python benchmarks/bench_sketch.py [n_groups]
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import process_data as pd  # noqa: E402
+from reference import median  # noqa: E402
+
+
+def synthetic_groups(n_groups, seed=11):
+    """(label, list of value lists): group sizes spread from 1 to 4x the exact limit."""
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 4 * pd.SKETCH_EXACT_LIMIT) for _ in range(n_groups)]
+    cases = []
+    for label, draw in (('EV, one decimal', lambda: round(rng.gauss(89, 13), 1)),
+                        ('LA, whole degrees', lambda: float(round(rng.gauss(12, 26)))),
+                        ('EV, full precision', lambda: rng.gauss(89, 13)),
+                        ('LA, full precision', lambda: rng.gauss(12, 26))):
+        cases.append((label, [[draw() for _ in range(n)] for n in sizes]))
+    return cases
+
+
+def sketch_of(groups, n_batches=3):
+    """Two sketches over the groups, each fed in batches, merged into a third."""
+    halves = []
+    for part in (0, 1):
+        sketch = pd.GroupSketch()
+        for b in range(n_batches):
+            codes = [g for g, vals in enumerate(groups) for i in range(len(vals)) if i % 2 == part and i % n_batches == b]
+            values = [groups[g][i] for g, vals in enumerate(groups) for i in range(len(vals))
+                      if i % 2 == part and i % n_batches == b]
+            sketch.add(np.array(codes, dtype=np.int64), np.array(values), len(groups))
+        halves.append(sketch)
+    return halves[0].merge(halves[1], np.arange(len(groups)), len(groups))
+
+
+def main():
+    n_groups = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    bound = 0.5 / pd.SKETCH_BINS_PER_UNIT
+    print(f"{n_groups} groups per case, exact up to {pd.SKETCH_EXACT_LIMIT} values, "
+          f"bins of {1 / pd.SKETCH_BINS_PER_UNIT:g} (bound {bound:g})")
+    ok = True
+    for label, groups in synthetic_groups(n_groups):
+        sketch = sketch_of(groups)
+        medians = sketch.medians()
+        errors = [abs(m - median(vals)) for m, vals in zip(medians, groups)]
+        binned = [len(vals) > pd.SKETCH_EXACT_LIMIT for vals in groups]
+        exact_err = max((e for e, b in zip(errors, binned) if not b), default=0.0)
+        binned_err = max((e for e, b in zip(errors, binned) if b), default=0.0)
+        stored = len(sketch.values) + len(sketch.hist_bins)
+        raw = sum(len(vals) for vals in groups)
+        print(f"  {label:20s} max error exact groups {exact_err:.2g}, histogram groups {binned_err:.3f}; "
+              f"{stored:,d} entries stored for {raw:,d} values")
+        ok = ok and exact_err == 0 and binned_err <= bound + 1e-9
+    print("  within bound" if ok else "  ERROR BOUND EXCEEDED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Offline check of the Google Sheets fetch path against the fake client in fake_sheets.py.
+
+  batching     an empty cache downloads every tab BATCH_RANGES tabs per values:batchGet request
+               (after one column-A probe), with rows padded back to a rectangle
+  cache hits   a second read only probes and serves every tab from the snapshot cache
+  cache misses an appended row or an edited column-A cell re-downloads just those tabs, in one
+               request, and replaces their snapshots; an edit elsewhere in a tab is missed (as
+               worksheet_fingerprints documents) until a refresh (--full-rebuild) re-downloads all
+  retries      429 and 5xx answers are retried with backoff, other errors and a request that keeps
+               failing are raised
+
+Exits non-zero on any failure.
+
+Usage: python benchmarks/check_fetch.py [n_tabs]
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+import gspread
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+import process_data as pd  # noqa: E402
+from fake_sheets import FakeSpreadsheet, api_error  # noqa: E402
+
+HEADER = ['Date', 'Pitcher', 'Velocity', 'Spin Rate', 'Notes']
+
+
+def synthetic_tabs(n_tabs, seed=4):
+    """[(title, rows)]: a header and a few rows per tab, some with trailing empty cells, and one
+    empty tab."""
+    rng = random.Random(seed)
+    tabs = []
+    for i in range(n_tabs):
+        rows = [] if i == 7 else [list(HEADER)]
+        for _ in range(rng.randint(1, 6) if rows else 0):
+            rows.append([f'3/{i + 1}', rng.choice(['Gil, Luis', 'Cole, Gerrit']), f'{rng.uniform(85, 99):.1f}',
+                         str(rng.randint(1800, 2700)), rng.choice(['', '', 'bullpen'])])
+        tabs.append((f'2026-03-{i + 1:02d}', rows))
+    return tabs
+
+
+def read_all(sh, cache_dir, refresh=False):
+    """{title: rows} read through read_spreadsheets, and the requests it made."""
+    before = len(sh.requests)
+    limiter = pd.TokenBucket(1000.0, 1000)
+    sheets = pd.read_spreadsheets([(sh, sh.worksheets())], cache_dir, workers=2, limiter=limiter,
+                                  refresh=refresh)[0]
+    return {ws.title: rows for ws, rows in sheets}, sh.requests[before:]
+
+
+def expected_rows(sh):
+    return {ws.title: [list(row) for row in ws.rows] for ws in sh.tabs}
+
+
+def snapshot_files(cache_dir, sh):
+    return sorted(os.listdir(os.path.join(cache_dir, sh.id)))
+
+
+def main():
+    n_tabs = int(sys.argv[1]) if len(sys.argv) > 1 else 23
+    pd.RETRY_BASE_WAIT = 0  # no real backoff sleeps
+    results = []
+
+    def check(label, ok):
+        results.append((label, ok))
+
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            sh = FakeSpreadsheet('fake-pitching', 'Pitching', synthetic_tabs(n_tabs))
+            size = pd.BATCH_RANGES
+
+            # Batching: one probe, then the tabs in sheet order, BATCH_RANGES per request
+            rows, requests = read_all(sh, cache_dir)
+            check('empty cache: every tab read, rows padded to a rectangle', rows == expected_rows(sh))
+            titles = [gspread.utils.absolute_range_name(ws.title) for ws in sh.tabs]
+            check(f'empty cache: 1 probe + {-(-n_tabs // size)} batchGet requests of up to {size} tabs',
+                  requests == [[t + '!A:A' for t in titles]] + [titles[i:i + size] for i in range(0, n_tabs, size)])
+
+            # Cache hits: only the probe goes out
+            cached = pd.REPORT.counters['worksheetsCached']
+            rows, requests = read_all(sh, cache_dir)
+            check('warm cache: same rows, probe only', rows == expected_rows(sh) and len(requests) == 1)
+            check('warm cache: every tab from a snapshot', pd.REPORT.counters['worksheetsCached'] - cached == n_tabs)
+
+            # Cache misses: an appended row and an edited date re-download those two tabs only
+            sh.tabs[5].rows.append(list(sh.tabs[5].rows[-1]))
+            sh.tabs[n_tabs - 2].rows[1][0] = '3/31'
+            rows, requests = read_all(sh, cache_dir)
+            check('changed tabs: re-downloaded in one request, the rest cached',
+                  rows == expected_rows(sh) and requests[1:] == [[titles[5], titles[n_tabs - 2]]])
+            check('changed tabs: one snapshot per worksheet', len(snapshot_files(cache_dir, sh)) == n_tabs)
+
+            # Documented blind spot: a cell outside column A, same grid size
+            sh.tabs[3].rows[1][2] = '101.0'
+            rows, requests = read_all(sh, cache_dir)
+            check('edit outside column A: missed by the fingerprint (stale snapshot)',
+                  rows[sh.tabs[3].title][1][2] != '101.0' and len(requests) == 1)
+            rows, requests = read_all(sh, cache_dir, refresh=True)
+            check('refresh (--full-rebuild): every tab re-downloaded, edit picked up',
+                  rows == expected_rows(sh) and sum(map(len, requests[1:])) == n_tabs)
+
+            # Retries
+            retries = pd.REPORT.counters['apiRetries']
+            sh.failures = [api_error(429), api_error(503), api_error(500)]
+            check('429 / 503 / 500: retried, then read',
+                  pd.call_with_retry(sh.values_batch_get, titles[:1]).get('valueRanges') is not None
+                  and pd.REPORT.counters['apiRetries'] - retries == 3)
+            for label, failures, calls in (('400: raised at once', [api_error(400)], 1),
+                                           ('429 on every attempt: raised after 5', [api_error(429)] * 5, 5)):
+                sh.failures, before = failures, len(sh.requests)
+                try:
+                    pd.call_with_retry(sh.values_batch_get, titles[:1], max_retries=5)
+                    check(label, False)
+                except gspread.exceptions.APIError:
+                    check(label, len(sh.requests) - before == calls)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    for label, ok in results:
+        print(f"  {label}  {'ok' if ok else 'FAILED'}")
+    ok = all(ok for _, ok in results)
+    print("  all passed" if ok else "  FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
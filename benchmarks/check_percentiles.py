@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Check and time the batched percentile ranks against the pairwise definition they replaced.
+
+  compute_percentile_ranks_batch   vs the baseline compute_percentile_ranks (two sum() passes per
+                                   row) on the checked-in leaderboards: every pitch-type group of
+                                   data/pitch_leaderboard.json (PITCH_PCTL_KEYS and stuffScore),
+                                   data/pitcher_leaderboard.json (STAT_KEYS) and
+                                   data/hitter_leaderboard.json (HITTER_STAT_KEYS)
+  edge cases                       empty, one value, all tied, missing values, ints and floats
+
+The stored *_pctl fields are dropped and recomputed both ways; the ranks must be identical.
+Exits non-zero on any mismatch.
+
+Usage: python benchmarks/check_percentiles.py [data_dir]
+"""
+
+import copy
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+import process_data as pd  # noqa: E402
+
+
+def pairwise_percentile_ranks(rows, metric_key):
+    """compute_percentile_ranks as it was before the batched version (the reference)."""
+    pctl_key = metric_key + '_pctl'
+    valid = [(i, rows[i][metric_key]) for i in range(len(rows))
+             if rows[i].get(metric_key) is not None]
+
+    if len(valid) < 2:
+        for row in rows:
+            row[pctl_key] = 50 if row.get(metric_key) is not None else None
+        return
+
+    values = [v for _, v in valid]
+    n = len(values)
+
+    for idx, val in valid:
+        below = sum(1 for x in values if x < val)
+        equal = sum(1 for x in values if x == val)
+        pctl = (below + 0.5 * (equal - 1)) / max(1, n - 1) * 100
+        rows[idx][pctl_key] = max(0, min(100, round(pctl)))
+
+    # Set None for rows that don't have the metric
+    for row in rows:
+        if pctl_key not in row:
+            row[pctl_key] = None
+
+
+def load_rows(data_dir, name):
+    """A checked-in leaderboard as rows, without its percentile fields."""
+    with open(os.path.join(data_dir, name)) as f:
+        rows = json.load(f)
+    return [{k: v for k, v in row.items() if not k.endswith('_pctl')} for row in rows]
+
+
+def compare(label, groups, keys):
+    """Rank every group both ways; print and return whether all ranks agree."""
+    old_rows, new_rows = copy.deepcopy(groups), copy.deepcopy(groups)
+    t0 = time.perf_counter()
+    for rows in old_rows:
+        for key in keys:
+            pairwise_percentile_ranks(rows, key)
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for rows in new_rows:
+        pd.compute_percentile_ranks_batch(rows, keys)
+    t_new = time.perf_counter() - t0
+    same = old_rows == new_rows
+    n = sum(len(rows) for rows in groups)
+    print(f"{label}: {n:,d} rows in {len(groups)} groups x {len(keys)} metrics: pairwise {t_old:.3f}s, "
+          f"batched {t_new:.3f}s  {'ok' if same else 'MISMATCH'}")
+    return same
+
+
+def edge_cases(seed=11):
+    """Small groups the leaderboards rarely produce but the ranks must still handle."""
+    rng = random.Random(seed)
+    cases = [[], [{'m': 1.5}], [{'m': None}], [{'m': 2}, {'m': 2}, {'m': 2}],
+             [{'m': None}, {'m': 3}], [{'m': 0}, {'m': None}, {'m': 0.0}, {'m': -1}],
+             [{}, {'m': 1}, {'m': 2}]]
+    for _ in range(200):
+        cases.append([{'m': rng.choice([None, rng.randint(0, 5), round(rng.uniform(0, 5), 1)])}
+                      for _ in range(rng.randint(0, 12))])
+    return cases
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'data')
+    ok = True
+
+    by_type = defaultdict(list)
+    for row in load_rows(data_dir, 'pitch_leaderboard.json'):
+        by_type[row['pitchType']].append(row)
+    ok &= compare('pitch leaderboard', list(by_type.values()), pd.PITCH_PCTL_KEYS + ['stuffScore'])
+    ok &= compare('pitcher leaderboard', [load_rows(data_dir, 'pitcher_leaderboard.json')], pd.STAT_KEYS)
+    ok &= compare('hitter leaderboard', [load_rows(data_dir, 'hitter_leaderboard.json')], pd.HITTER_STAT_KEYS)
+    ok &= compare('edge cases', edge_cases(), ['m'])
+
+    print("  all match" if ok else "  MISMATCH")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Check the leaderboard stats of the columnar pipeline against the dict-per-pitch definitions
+they replaced (benchmarks/reference.py).
+
+Folds a synthetic snapshot (benchmarks/synthetic.py) with fold_sheets and builds the pitcher and
+hitter leaderboards, then recomputes every row's stats with reference.compute_stats /
+compute_hitter_stats over the same worksheets read as dicts, grouped the way the old main() did.
+Every stat must be identical. Exits non-zero on any mismatch.
+
+Usage: python benchmarks/check_stats.py [n_pitches] [seed]
+"""
+
+import os
+import sys
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import process_data as pd  # noqa: E402
+import reference  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def sheet_dicts(source, books, book, key_col):
+    """Every pitch of a book as a dict of cells (None for empty), Zone converted, like the old main()."""
+    plan = [[(ws, None) for ws in worksheets] for _, worksheets in books]
+    pitches = []
+    for ws, rows in source.read(books, plan)[pd.BOOK_NAMES.index(book)]:
+        if not rows:
+            continue
+        col_idx = {name: i for i, name in enumerate(rows[0]) if name}
+        for row in rows[1:]:
+            if not row[col_idx[key_col]]:
+                continue
+            pitch = {name: (row[i] if i < len(row) and row[i] != '' else None) for name, i in col_idx.items()}
+            pitch['Zone'] = pd.safe_int(pitch.get('Zone'))
+            pitches.append(pitch)
+    return pitches
+
+
+def compare(label, rows, key_cols, pitches, group_cols, stats):
+    """Print and return whether every leaderboard row carries the reference stats of its group."""
+    groups = defaultdict(list)
+    for p in pitches:
+        groups[tuple(p.get(col) for col in group_cols)].append(p)
+    mismatched = 0
+    for row in rows:
+        expected = stats(groups.pop(tuple(row[col] for col in key_cols), []))
+        mismatched += any(row.get(key) != value for key, value in expected.items())
+    missing = len(groups)
+    ok = not mismatched and not missing
+    print(f"  {label}: {len(rows):,d} rows, {mismatched} with other stats, {missing} groups without a row  "
+          f"{'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    n_pitches = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        synthetic.write_snapshot(snapshot_dir, n_pitches, seed)
+        source = pd.LocalSource(snapshot_dir)
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            books = source.open()
+            state = pd.AggregateState()
+            pd.fold_sheets(state, *source.read(books, [[(ws, None) for ws in worksheets] for _, worksheets in books]))
+            pitcher_rows = pd.build_pitcher_leaderboard(state)
+            hitter_rows = pd.build_hitter_leaderboard(state)
+            pitches = sheet_dicts(source, books, 'pitching', 'Pitcher')
+            hitter_pitches = sheet_dicts(source, books, 'hitting', 'Hitter')
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    print(f"{n_pitches:,d} pitching and hitting rows (seed {seed})")
+    ok = compare('pitcher leaderboard', pitcher_rows, ('pitcher', 'team', 'throws'), pitches,
+                 ('Pitcher', 'Team', 'Throws'), reference.compute_stats)
+    ok &= compare('hitter leaderboard', hitter_rows, ('hitter', 'team', 'stands'), hitter_pitches,
+                  ('Hitter', 'Team', 'Stands'), reference.compute_hitter_stats)
+    print("  all match" if ok else "  MISMATCH")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
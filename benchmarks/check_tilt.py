@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Check and time the vectorised Break Tilt functions against the per-value / per-group ones.
+
+  parse_tilts                  vs break_tilt_to_minutes on every cell (incl. blanks and junk)
+  circular_means_from_sums     vs circular_mean_from_sums on every group, with the sums built by
+                               a group accumulator in one batch and by two merged ones (the
+                               incremental path), and within a minute of the old per-group mean
+  circular_mean_minutes        vs the old list-of-angles mean (sum of math.sin / math.cos)
+
+It also shows the league-average case the arithmetic mean got wrong (tilts either side of
+12:00). Exits non-zero on any mismatch.
+
+Usage: python benchmarks/check_tilt.py [n_pitches] [n_groups]
+"""
+
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import process_data as pd  # noqa: E402
+
+JUNK = ['', '', '12', '1:', ':30', 'n/a', '3:xx', ' 2:15 ', '12:00:00', '0:05']
+
+
+def synthetic_cells(n, seed=5):
+    """Tilt cells as the sheets give them: mostly H:MM readings clustered by pitch, some junk."""
+    rng = random.Random(seed)
+    cells = []
+    for _ in range(n):
+        if rng.random() < 0.03:
+            cells.append(rng.choice(JUNK))
+            continue
+        minutes = int(rng.gauss(rng.choice([60, 120, 420, 700]), 25)) % 720
+        h, m = divmod(minutes, 60)
+        cells.append(f'{h or 12}:{m:02d}')
+    return cells
+
+
+def old_circular_mean(minute_values):
+    """circular_mean_minutes as it was: Python lists of angles, math.sin / math.cos per value."""
+    if not minute_values:
+        return None
+    angles = [m / 720.0 * 2 * math.pi for m in minute_values]
+    return pd.circular_mean_from_sums(sum(math.sin(a) for a in angles), sum(math.cos(a) for a in angles),
+                                      len(angles))
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - t0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    n_groups = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    ok = True
+    cells = synthetic_cells(n)
+    text = [pd.parse_text(c) for c in cells]
+
+    # Bulk parse
+    expected, t_old = timed(lambda: [pd.INT_NONE if c is None else pd.break_tilt_to_minutes(c) for c in text])
+    (minutes, invalid), t_new = timed(pd.parse_tilts, text)
+    expected_invalid = sum(1 for c, m in zip(text, expected) if c is not None and m is None)
+    expected = np.array([pd.INT_NONE if m is None else m for m in expected], dtype=np.int64)
+    same = np.array_equal(minutes, expected) and invalid == expected_invalid
+    print(f"parse {n:,d} cells: per cell {t_old:.3f}s, parse_tilts {t_new:.3f}s, "
+          f"{invalid:,d} unparseable  {'ok' if same else 'MISMATCH'}")
+    ok = ok and same
+
+    # Grouped circular means: accumulator sums (one batch, and two folds merged) vs per group
+    rng = np.random.default_rng(9)
+    codes = rng.integers(0, n_groups, n)
+    sin, cos = pd.tilt_components(minutes)
+    values = {'tiltSin': sin, 'tiltCos': cos}
+
+    def accumulate(codes, parts):
+        """Accumulator of the tilt sums by group code: one per part, merged into the first."""
+        accs = []
+        for part in parts:
+            scan = pd.Scan([], np.zeros((0, int(part.sum())), dtype=bool),
+                           {name: v[part] for name, v in values.items()})
+            accs.append(pd.GroupAccumulator([], sums=['tiltSin', 'tiltCos']).add(scan, codes[part], n_groups))
+        for acc in accs[1:]:
+            accs[0].merge(acc)
+        return accs[0]
+
+    half = np.arange(n) < n // 2
+    pairs = np.arange(n) // 2 % n_groups  # groups of few pitches: many half-minute ties
+    for label, group_of, parts in (('one batch', codes, [np.ones(n, dtype=bool)]),
+                                   ('two folds merged', codes, [half, ~half]),
+                                   ('pairs of pitches', pairs, [np.arange(n) < 2 * n_groups])):
+        acc = accumulate(group_of, parts)
+        counts = acc.sum_counts[acc.sum_names.index('tiltSin')]
+        got, t_new = timed(pd.circular_means_from_sums, acc.total('tiltSin'), acc.total('tiltCos'), counts)
+        sums = zip(acc.total('tiltSin'), acc.total('tiltCos'), counts.tolist())
+        want, t_old = timed(lambda: [pd.circular_mean_from_sums(s, c, k) for s, c, k in sums])
+        by_group = [[] for _ in range(n_groups)]
+        for g, m, used in zip(group_of.tolist(), minutes.tolist(), np.logical_or.reduce(parts).tolist()):
+            if used and m != pd.INT_NONE:
+                by_group[g].append(m)
+        direct = [old_circular_mean(v) for v in by_group]
+        near = all(a == b or (a is not None and b is not None and min(abs(a - b), 720 - abs(a - b)) <= 1)
+                   for a, b in zip(got, direct))
+        same = got == want and near
+        print(f"{n_groups:,d} group means ({label}): per group {t_old:.4f}s, vectorised {t_new:.4f}s  "
+              f"{'ok' if same else 'MISMATCH'}")
+        ok = ok and same
+
+    # circular_mean_minutes against the old list version
+    groups = [list(rng.integers(0, 720, rng.integers(1, 60))) for _ in range(2000)]
+    diffs = [pd.circular_mean_minutes(g) != old_circular_mean([int(m) for m in g]) for g in groups]
+    print(f"circular_mean_minutes vs list version: {sum(diffs)} of {len(groups)} differ  "
+          f"{'ok' if not any(diffs) else 'MISMATCH'}")
+    ok = ok and not any(diffs)
+
+    # League average across 12:00
+    tilts = [700, 710, 20, 30]  # 11:40, 11:50, 12:20, 12:30
+    arithmetic = round(sum(tilts) / len(tilts))
+    circular = pd.circular_mean_minutes(tilts)
+    print(f"league average of 11:40, 11:50, 12:20, 12:30: arithmetic {pd.minutes_to_tilt_display(arithmetic)}, "
+          f"circular {pd.minutes_to_tilt_display(circular)}")
+    ok = ok and pd.minutes_to_tilt_display(circular) == '12:05'
+
+    print("  all match" if ok else "  MISMATCH")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
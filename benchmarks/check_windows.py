@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Check and time the rolling-window leaderboards (build_windows) against separate rebuilds.
+
+Folds a synthetic snapshot (benchmarks/synthetic.py, one worksheet per day) into an aggregate
+state in shuffled batches of days, as incremental runs would, and builds every window in
+WINDOW_DAYS from the per-day groups. Each window's pitch, pitcher and hitter leaderboards must
+equal the season leaderboards of a state folded from only that window's worksheets (what running
+the whole build once per window would give), with exact sums like the per-day groups (the season
+groups add their sums in fold order, so a mean on a rounding boundary could round the other way).
+Exits non-zero on any mismatch.
+
+Usage: python benchmarks/check_windows.py [n_days] [seed]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import process_data as pd  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def fold_days(source, books, days):
+    """A fresh state with exact season sums and the worksheets titled with one of `days` folded in,
+    in that order."""
+    state = pd.AggregateState()
+    state.pitch_groups = pd.new_pitch_accumulator(exact=True)
+    state.hitter_groups = pd.new_hitter_accumulator(exact=True)
+    plan = [[(ws, None) for day in days for ws in worksheets if ws.title == day] for _, worksheets in books]
+    pd.fold_sheets(state, *source.read(books, plan))
+    return state
+
+
+def main():
+    n_days = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    ok = True
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        synthetic.write_snapshot(snapshot_dir, n_days * synthetic.ROWS_PER_SHEET, seed)
+        source = pd.LocalSource(snapshot_dir)
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            books = source.open()
+            days = [ws.title for ws in books[0][1]]
+
+            # Incremental: shuffled batches of days, pruned as they go
+            rng = random.Random(seed)
+            shuffled = rng.sample(days, len(days))
+            state = pd.AggregateState()
+            while shuffled:
+                size = rng.randint(1, 4)
+                batch, shuffled = shuffled[:size], shuffled[size:]
+                plan = [[(ws, None) for ws in worksheets if ws.title in batch] for _, worksheets in books]
+                pd.fold_sheets(state, *source.read(books, plan))
+            t0 = time.perf_counter()
+            windows = pd.build_windows(state)
+            t_windows = time.perf_counter() - t0
+
+            # Reference: each window rebuilt from its own worksheets
+            results, t_rebuild = [], 0.0
+            for key, window in windows.items():
+                t0 = time.perf_counter()
+                ref = fold_days(source, books, [d for d in days if window['from'] <= d <= window['to']])
+                expected = {'pitch': pd.build_pitch_leaderboard(ref)[0], 'pitcher': pd.build_pitcher_leaderboard(ref),
+                            'hitter': pd.build_hitter_leaderboard(ref)}
+                t_rebuild += time.perf_counter() - t0
+                results.append((key, window, {tab: window[tab] == expected[tab] for tab in pd.WINDOW_TABS}))
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    kept = sorted({key[0] for key in state.pitch_days.keys})
+    print(f"{n_days} days folded in shuffled batches; per-day groups kept for {kept[0]} to {kept[-1]} "
+          f"({state.pitch_days.n_groups:,d} pitch, {state.hitter_days.n_groups:,d} hitter groups)")
+    for key, window, same in results:
+        rows = ', '.join(f"{len(window[tab])} {tab}" for tab in pd.WINDOW_TABS)
+        print(f"  {key} ({window['from']} to {window['to']}): {rows} rows  "
+              f"{'ok' if all(same.values()) else 'MISMATCH ' + ' '.join(t for t, s in same.items() if not s)}")
+        ok = ok and all(same.values())
+    print(f"  all windows from the per-day groups {t_windows:.2f}s, "
+          f"rebuilt one by one from their worksheets {t_rebuild:.2f}s")
+    print("  all match" if ok else "  MISMATCH")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
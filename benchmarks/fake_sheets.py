@@ -0,0 +1,81 @@
+"""In-memory stand-in for the gspread client, for offline checks of the Sheets fetch path.
+
+FakeClient serves FakeSpreadsheets whose worksheets are plain lists of rows. values_batch_get
+answers like the Sheets API values:batchGet (A1 ranges as process_data builds them, trailing
+empty cells and rows dropped, no 'values' key for an empty range), records every request's
+ranges in .requests, and raises the APIErrors queued in .failures first (see api_error).
+"""
+
+import gspread
+
+
+class FakeWorksheet:
+    def __init__(self, sheet_id, title, rows):
+        self.id = sheet_id
+        self.title = title
+        self.rows = rows
+
+    @property
+    def row_count(self):
+        return max(len(self.rows), 1000)  # new tabs come with 1000 rows, like Google Sheets
+
+    @property
+    def col_count(self):
+        return max((len(row) for row in self.rows), default=26)
+
+
+class FakeSpreadsheet:
+    def __init__(self, key, title, tabs):
+        """tabs: [(title, rows)] in sheet order."""
+        self.id = key
+        self.title = title
+        self.tabs = [FakeWorksheet(1000 + i, t, rows) for i, (t, rows) in enumerate(tabs)]
+        self.requests = []  # ranges of each values_batch_get call, failed ones included
+        self.failures = []  # APIErrors to raise, one per call, before answering again
+
+    def worksheets(self):
+        return list(self.tabs)
+
+    def values_batch_get(self, ranges, params=None):
+        self.requests.append(list(ranges))
+        if self.failures:
+            raise self.failures.pop(0)
+        by_name = {gspread.utils.absolute_range_name(ws.title): ws for ws in self.tabs}
+        value_ranges = []
+        for a1 in ranges:
+            name, _, cells = a1.partition('!')
+            rows = [list(row[:1] if cells == 'A:A' else row) for row in by_name[name].rows]
+            for row in rows:
+                while row and row[-1] == '':
+                    row.pop()
+            while rows and not rows[-1]:
+                rows.pop()
+            value_range = {'range': a1, 'majorDimension': 'ROWS'}
+            if rows:
+                value_range['values'] = rows
+            value_ranges.append(value_range)
+        return {'spreadsheetId': self.id, 'valueRanges': value_ranges}
+
+
+class FakeClient:
+    def __init__(self, spreadsheets):
+        self.spreadsheets = {sh.id: sh for sh in spreadsheets}
+
+    def open_by_key(self, key):
+        return self.spreadsheets[key]
+
+
+class FakeResponse:
+    """Just enough of a requests.Response for gspread.exceptions.APIError."""
+
+    def __init__(self, status, message):
+        self.status_code = status
+        self.text = message
+
+    def json(self):
+        return {'error': {'code': self.status_code, 'message': self.text, 'status': 'FAKE'}}
+
+
+def api_error(status, message='fake error'):
+    """The APIError gspread raises for an HTTP error status."""
+    return gspread.exceptions.APIError(FakeResponse(status, message))
@@ -0,0 +1,139 @@
+"""Reference statistics: the dict-per-pitch definitions process_data.py computed before the
+columnar pipeline (scan_pitches / scan_hitter_pitches, the group accumulators, pitch_stats_from and
+hitter_stats_from) replaced them. They are kept here, out of the live module, for the checks and
+benchmarks that compare against them.
+
+A pitch is a dict of sheet cells by column name (None for empty cells) with 'Zone' already an int
+(process_data.safe_int), as the old main() built them.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from process_data import (HITTER_STAT_KEYS, IN_ZONE, OUT_ZONE, STAT_KEYS,  # noqa: E402
+                          SWING_DESCRIPTIONS, safe_float)
+
+
+def avg(values):
+    """Average a list of numbers, ignoring None."""
+    nums = [v for v in values if v is not None]
+    if not nums:
+        return None
+    return sum(nums) / len(nums)
+
+
+def median(values):
+    """Compute median, ignoring None values."""
+    nums = sorted(v for v in values if v is not None)
+    if not nums:
+        return None
+    n = len(nums)
+    if n % 2 == 1:
+        return nums[n // 2]
+    return (nums[n // 2 - 1] + nums[n // 2]) / 2
+
+
+def is_barrel(ev, la):
+    """Statcast barrel definition.
+    EV >= 98 mph, then LA must be within a range that expands with velocity."""
+    if ev is None or la is None:
+        return False
+    if ev < 98:
+        return False
+    lower_la = max(8, 26 - (ev - 98))
+    upper_la = min(50, 30 + 1.2 * (ev - 98))
+    return lower_la <= la <= upper_la
+
+
+def compute_stats(pitches):
+    """Compute IZ%, SwStr%, CSW%, Chase%, GB% from a list of pitch dicts."""
+    total = len(pitches)
+    if total == 0:
+        return {k: None for k in STAT_KEYS}
+
+    iz = sum(1 for p in pitches if p['Zone'] in IN_ZONE)
+    swstr = sum(1 for p in pitches if p['Description'] == 'Swinging Strike')
+    csw = sum(1 for p in pitches if p['Description'] in ('Called Strike', 'Swinging Strike'))
+
+    ooz = [p for p in pitches if p['Zone'] in OUT_ZONE]
+    ooz_swung = sum(1 for p in ooz if p['Description'] in ('Swinging Strike', 'In Play', 'Foul'))
+
+    bip = [p for p in pitches if p['BB Type'] is not None]
+    gb = sum(1 for p in bip if p['BB Type'] == 'ground_ball')
+
+    return {
+        'izPct': iz / total,
+        'swStrPct': swstr / total,
+        'cswPct': csw / total,
+        'chasePct': ooz_swung / len(ooz) if ooz else None,
+        'gbPct': gb / len(bip) if bip else None,
+    }
+
+
+def compute_hitter_stats(pitches):
+    """Compute hitter stats from a list of pitch dicts (already Zone-converted)."""
+    total = len(pitches)
+    if total == 0:
+        return {k: None for k in HITTER_STAT_KEYS}
+
+    # Swings
+    swings = [p for p in pitches if p['Description'] in SWING_DESCRIPTIONS]
+    n_swings = len(swings)
+    whiffs = sum(1 for p in pitches if p['Description'] in ('Swinging Strike', 'Swinging Strike (Blocked)'))
+
+    # In-zone / Out-of-zone
+    iz_pitches = [p for p in pitches if p['Zone'] in IN_ZONE]
+    ooz_pitches = [p for p in pitches if p['Zone'] in OUT_ZONE]
+    iz_swings = sum(1 for p in iz_pitches if p['Description'] in SWING_DESCRIPTIONS)
+    ooz_swings = sum(1 for p in ooz_pitches if p['Description'] in SWING_DESCRIPTIONS)
+
+    iz_swing_pct = iz_swings / len(iz_pitches) if iz_pitches else None
+    chase_pct = ooz_swings / len(ooz_pitches) if ooz_pitches else None
+
+    # Batted balls (balls in play with BB Type)
+    bip = [p for p in pitches if p['BB Type'] is not None]
+    n_bip = len(bip)
+    gb = sum(1 for p in bip if p['BB Type'] == 'ground_ball')
+    ld = sum(1 for p in bip if p['BB Type'] == 'line_drive')
+    fb = sum(1 for p in bip if p['BB Type'] in ('fly_ball', 'popup'))
+
+    # Exit Velocity & Launch Angle (only LA > 0 for EV stats)
+    ev_la_pos = [(safe_float(p.get('Exit Velocity')), safe_float(p.get('Launch Angle')))
+                 for p in bip
+                 if safe_float(p.get('Launch Angle')) is not None and safe_float(p.get('Launch Angle')) > 0
+                 and safe_float(p.get('Exit Velocity')) is not None]
+    evs_pos = [ev for ev, la in ev_la_pos]
+
+    # Barrels: need EV and LA on all batted balls
+    ev_la_all = [(safe_float(p.get('Exit Velocity')), safe_float(p.get('Launch Angle')))
+                 for p in bip
+                 if safe_float(p.get('Exit Velocity')) is not None
+                 and safe_float(p.get('Launch Angle')) is not None]
+    barrels = sum(1 for ev, la in ev_la_all if is_barrel(ev, la))
+
+    # Median launch angle on ALL batted balls
+    all_la = [safe_float(p.get('Launch Angle')) for p in bip
+              if safe_float(p.get('Launch Angle')) is not None]
+
+    # xBA and xSLG on batted balls
+    xba_vals = [safe_float(p.get('xBA')) for p in bip if safe_float(p.get('xBA')) is not None]
+    xslg_vals = [safe_float(p.get('xSLG')) for p in bip if safe_float(p.get('xSLG')) is not None]
+
+    return {
+        'nSwings': n_swings,
+        'swingPct': n_swings / total if total > 0 else None,
+        'izSwingPct': iz_swing_pct,
+        'chasePct': chase_pct,
+        'izSwChase': round(iz_swing_pct - chase_pct, 4) if iz_swing_pct is not None and chase_pct is not None else None,
+        'whiffPct': whiffs / n_swings if n_swings > 0 else None,
+        'medEV': round(median(evs_pos), 1) if evs_pos else None,
+        'maxEV': round(max(evs_pos), 1) if evs_pos else None,
+        'barrelPct': barrels / n_bip if n_bip > 0 else None,
+        'xBA': round(avg(xba_vals), 3) if xba_vals else None,
+        'xSLG': round(avg(xslg_vals), 3) if xslg_vals else None,
+        'gbPct': gb / n_bip if n_bip > 0 else None,
+        'ldPct': ld / n_bip if n_bip > 0 else None,
+        'fbPct': fb / n_bip if n_bip > 0 else None,
+        'medLA': round(median(all_la), 1) if all_la else None,
+    }
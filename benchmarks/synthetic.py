@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Synthetic pitching / hitting spreadsheets with the real sheet schema, written as a local snapshot.
+
+The snapshot has one worksheet per day (ROWS_PER_SHEET pitches each) in both books, laid out the
+way --record writes it, so it replays with `process_data.py --source DIR`. Pitchers get a fixed
+team, hand and a 3-6 pitch repertoire with per-pitch velocity / movement profiles; hitters a fixed
+team and side. A few percent of cells are blank, as in the scraped sheets. Pitcher and hitter
+counts grow with the number of pitches up to MAX_PITCHERS / MAX_HITTERS, about a full league's
+spring rosters (some 900 pitchers at 40k, the cap from about 70k), so larger snapshots add pitches
+per player rather than players.
+
+Usage: python benchmarks/synthetic.py DIR [n_pitches] [seed]
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import process_data as pd  # noqa: E402
+
+SNAPSHOT_VERSION = 2  # bump when the generated sheets change (cached benchmark snapshots are keyed by it)
+ROWS_PER_SHEET = 4000
+PITCHES_PER_PITCHER = 45
+PITCHES_PER_HITTER = 35
+MAX_PITCHERS = 1500  # across the 30 teams
+MAX_HITTERS = 1500
+BLANK_RATE = 0.02
+
+PITCH_HEADER = (['Date', 'Pitcher', 'Team', 'Throws', 'Pitch Type'] + pd.METRIC_COLS
+                + ['Break Tilt', 'Zone', 'Description', 'BB Type', 'Batter', 'PlateX', 'PlateZ'])
+HITTER_HEADER = ['Date', 'Hitter', 'Team', 'Stands', 'Pitch Type', 'Zone', 'Description', 'BB Type',
+                 'Exit Velocity', 'Launch Angle', 'xBA', 'xSLG', 'Pitcher', 'Velocity']
+TEAMS = ['ARI', 'ATL', 'BAL', 'BOS', 'CHC', 'CWS', 'CIN', 'CLE', 'COL', 'DET', 'HOU', 'KC', 'LAA', 'LAD',
+         'MIA', 'MIL', 'MIN', 'NYM', 'NYY', 'ATH', 'PHI', 'PIT', 'SD', 'SF', 'SEA', 'STL', 'TB', 'TEX',
+         'TOR', 'WSH']
+DESCRIPTIONS = ['Ball', 'Called Strike', 'Swinging Strike', 'Foul', 'Foul Tip', 'In Play',
+                'Swinging Strike (Blocked)', 'Hit By Pitch']
+DESCRIPTION_P = [0.36, 0.16, 0.10, 0.17, 0.01, 0.17, 0.02, 0.01]
+BB_TYPES = ['ground_ball', 'line_drive', 'fly_ball', 'popup']
+BB_TYPE_P = [0.43, 0.21, 0.28, 0.08]
+ZONES = [1, 2, 3, 4, 5, 6, 7, 8, 9, 11, 12, 13, 14]
+# pitch type -> (velocity, spin, IVB, HB, tilt hour) for a right-hander; HB and tilt mirror for lefties
+PITCH_PROFILES = {
+    'FF': (94.0, 2300, 16.0, 8.0, 1), 'SI': (93.0, 2150, 8.0, 15.0, 2), 'FC': (89.0, 2400, 9.0, -2.0, 12),
+    'SL': (85.0, 2450, 2.0, -5.0, 9), 'ST': (82.0, 2600, 1.0, -14.0, 9), 'CU': (79.0, 2550, -9.0, -8.0, 7),
+    'CH': (85.0, 1750, 6.0, 14.0, 2), 'FS': (86.0, 1300, 3.0, 10.0, 2),
+}
+PITCH_TYPES = list(PITCH_PROFILES)
+
+
+def make_roster(n_pitches, rng):
+    """Pitchers (name, team, throws, repertoire, usage) and hitters (name, team, stands)."""
+    pitchers = []
+    for i in range(min(MAX_PITCHERS, max(30, n_pitches // PITCHES_PER_PITCHER))):
+        repertoire = list(rng.choice(PITCH_TYPES, size=rng.integers(3, 7), replace=False))
+        usage = rng.dirichlet(np.ones(len(repertoire)) * 2)
+        pitchers.append((f'Pitcher{i}, P', TEAMS[i % len(TEAMS)], 'R' if rng.random() < 0.7 else 'L',
+                         repertoire, usage))
+    hitters = [(f'Hitter{i}, H', TEAMS[i % len(TEAMS)], rng.choice(['R', 'L', 'S'], p=[0.55, 0.38, 0.07]))
+               for i in range(min(MAX_HITTERS, max(30, n_pitches // PITCHES_PER_HITTER)))]
+    return pitchers, hitters
+
+
+def fmt(values, spec, rng):
+    """Format a float column with `spec`, blanking about BLANK_RATE of the cells."""
+    blank = rng.random(len(values)) < BLANK_RATE
+    return ['' if b else format(v, spec) for v, b in zip(values.tolist(), blank.tolist())]
+
+
+def pitching_rows(date, n, pitchers, hitters, rng):
+    """One day's pitching worksheet (header first)."""
+    who = rng.integers(0, len(pitchers), n)
+    pitch_types, lefty = [], np.empty(n, dtype=bool)
+    for i, p in enumerate(who.tolist()):
+        name, team, throws, repertoire, usage = pitchers[p]
+        pitch_types.append(repertoire[rng.choice(len(repertoire), p=usage)])
+        lefty[i] = throws == 'L'
+    profile = np.array([PITCH_PROFILES[pt] for pt in pitch_types])
+    side = np.where(lefty, -1.0, 1.0)
+    cols = {
+        'Velocity': fmt(profile[:, 0] + rng.normal(0, 2.0, n), '.1f', rng),
+        'Spin Rate': fmt(profile[:, 1] + rng.normal(0, 180, n), '.0f', rng),
+        'IndVertBrk': fmt(profile[:, 2] + rng.normal(0, 2.5, n), '.1f', rng),
+        'HorzBrk': fmt(side * (profile[:, 3] + rng.normal(0, 2.5, n)), '.1f', rng),
+        'RelPosZ': fmt(rng.normal(5.8, 0.4, n), '.2f', rng),
+        'RelPosX': fmt(side * rng.normal(1.8, 0.5, n), '.2f', rng),
+        'Extension': fmt(rng.normal(6.4, 0.4, n), '.2f', rng),
+        'VAA': fmt(rng.normal(-6.0, 1.2, n), '.2f', rng),
+        'HAA': fmt(side * rng.normal(0.8, 1.0, n), '.2f', rng),
+        'VRA': fmt(rng.normal(-2.0, 1.0, n), '.2f', rng),
+        'HRA': fmt(side * rng.normal(1.5, 1.0, n), '.2f', rng),
+        'PlateX': fmt(rng.normal(0, 0.9, n), '.2f', rng),
+        'PlateZ': fmt(rng.normal(2.4, 0.9, n), '.2f', rng),
+    }
+    hour = (np.where(lefty, 12 - profile[:, 4], profile[:, 4]) + rng.integers(-1, 2, n) - 1) % 12 + 1
+    tilts = [f'{h}:{m:02d}' for h, m in zip(hour.astype(int).tolist(), (rng.integers(0, 4, n) * 15).tolist())]
+    zones = rng.choice(ZONES, n).tolist()
+    descs = rng.choice(DESCRIPTIONS, n, p=DESCRIPTION_P).tolist()
+    bb_types = rng.choice(BB_TYPES, n, p=BB_TYPE_P).tolist()
+    batters = rng.integers(0, len(hitters), n).tolist()
+    rows = [list(PITCH_HEADER)]
+    for i, p in enumerate(who.tolist()):
+        name, team, throws = pitchers[p][:3]
+        rows.append([date, name, team, throws, pitch_types[i]] + [cols[c][i] for c in pd.METRIC_COLS]
+                    + [tilts[i], str(zones[i]), descs[i], bb_types[i] if descs[i] == 'In Play' else '',
+                       hitters[batters[i]][0], cols['PlateX'][i], cols['PlateZ'][i]])
+    return rows
+
+
+def hitting_rows(date, n, pitchers, hitters, rng):
+    """One day's hitting worksheet (header first)."""
+    who = rng.integers(0, len(hitters), n).tolist()
+    pitched_by = rng.integers(0, len(pitchers), n).tolist()
+    pitch_types = rng.choice(PITCH_TYPES, n).tolist()
+    zones = rng.choice(ZONES, n).tolist()
+    descs = rng.choice(DESCRIPTIONS, n, p=DESCRIPTION_P).tolist()
+    bb_types = rng.choice(BB_TYPES, n, p=BB_TYPE_P).tolist()
+    ev = fmt(rng.normal(88, 13, n), '.1f', rng)
+    la = fmt(rng.normal(12, 26, n), '.0f', rng)
+    xba = fmt(rng.beta(2, 4, n), '.3f', rng)
+    xslg = fmt(rng.gamma(2, 0.2, n), '.3f', rng)
+    velo = fmt(rng.normal(90, 4, n), '.1f', rng)
+    rows = [list(HITTER_HEADER)]
+    for i, h in enumerate(who):
+        name, team, stands = hitters[h]
+        in_play = descs[i] == 'In Play'
+        rows.append([date, name, team, stands, pitch_types[i], str(zones[i]), descs[i],
+                     bb_types[i] if in_play else '', ev[i] if in_play else '', la[i] if in_play else '',
+                     xba[i] if in_play else '', xslg[i] if in_play else '', pitchers[pitched_by[i]][0], velo[i]])
+    return rows
+
+
+def write_snapshot(snapshot_dir, n_pitches, seed=1, fmt='csv'):
+    """Write a synthetic snapshot of n_pitches pitching and n_pitches hitting rows to snapshot_dir
+    (a LocalSource manifest plus one tab file per day and book). Returns the manifest path."""
+    rng = np.random.default_rng(seed)
+    pitchers, hitters = make_roster(n_pitches, rng)
+    manifest = {}
+    for book, make_rows in (('pitching', pitching_rows), ('hitting', hitting_rows)):
+        os.makedirs(os.path.join(snapshot_dir, book), exist_ok=True)
+        worksheets = []
+        for day, lo in enumerate(range(0, n_pitches, ROWS_PER_SHEET)):
+            date = str(np.datetime64('2026-02-20') + day)
+            rel_path = f'{book}/{day:03d}.{fmt}'
+            rows = make_rows(date, min(ROWS_PER_SHEET, n_pitches - lo), pitchers, hitters, rng)
+            pd.write_tab_file(os.path.join(snapshot_dir, rel_path), rows)
+            worksheets.append({'id': day + 1, 'title': date, 'file': rel_path})
+        manifest[book] = {'id': f'synthetic-{book}-{n_pitches}-{seed}', 'title': f'Synthetic {book}',
+                          'worksheets': worksheets}
+    manifest_path = os.path.join(snapshot_dir, 'manifest.json')
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+
+def main():
+    if len(sys.argv) < 2:
+        raise SystemExit(__doc__)
+    n_pitches = int(sys.argv[2]) if len(sys.argv) > 2 else 40000
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    write_snapshot(sys.argv[1], n_pitches, seed)
+    print(f"Wrote {n_pitches} pitching + {n_pitches} hitting rows to {sys.argv[1]}/")
+
+
+if __name__ == '__main__':
+    main()
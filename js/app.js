@@ -5,8 +5,9 @@
   var allData = []; // current filtered + sorted data (full, before pagination)
 
   // ---- DOM refs ----
-  var teamSelect, throwsSelect, minCountInput, minSwingsInput, searchInput;
+  var periodSelect, teamSelect, throwsSelect, minCountInput, minSwingsInput, searchInput;
   var sidePanel, panelOverlay, panelClose;
+  var panelHitter = null; // hitter whose breakdown the side panel is waiting for / showing
 
   // ---- Init ----
   function init() {
@@ -28,11 +29,15 @@
       setupColumnSettings();
       setupDarkMode();
       applyURLState();
-      refresh();
+      DataStore.setPeriod(periodSelect.value).then(function (period) {
+        periodSelect.value = period;
+        refresh();
+      });
     });
   }
 
   function setupDOM() {
+    periodSelect = document.getElementById('period-filter');
     teamSelect = document.getElementById('team-filter');
     throwsSelect = document.getElementById('throws-filter');
     minCountInput = document.getElementById('min-count');
@@ -45,6 +50,17 @@
 
   // ---- Filters ----
   function setupFilters() {
+    // Rolling windows (last 7 / 14 days), if the build has them
+    var windows = DataStore.metadata.windows || [];
+    windows.forEach(function (w) {
+      var opt = document.createElement('option');
+      opt.value = w.key;
+      opt.textContent = 'Last ' + w.days + ' Days';
+      opt.title = w.from + ' to ' + w.to;
+      periodSelect.appendChild(opt);
+    });
+    if (windows.length) document.getElementById('period-filter-group').style.display = '';
+
     // Populate team dropdown
     DataStore.metadata.teams.forEach(function (team) {
       var opt = document.createElement('option');
@@ -61,6 +77,13 @@
     if (genDate) genDate.textContent = DataStore.metadata.generatedAt;
 
     // Filter listeners
+    periodSelect.addEventListener('change', function () {
+      DataStore.setPeriod(periodSelect.value).then(function (period) {
+        periodSelect.value = period;
+        Leaderboard.currentPage = 1;
+        refresh();
+      });
+    });
     teamSelect.addEventListener('change', function () { Leaderboard.currentPage = 1; refresh(); });
     throwsSelect.addEventListener('change', function () { Leaderboard.currentPage = 1; refresh(); });
     minCountInput.addEventListener('input', function () { Leaderboard.currentPage = 1; refresh(); });
@@ -274,6 +297,9 @@
       } else {
         if (hand) info.push(hand === 'R' ? 'RHP' : 'LHP');
       }
+      // Pitch plots and detail tables come from the season detail shards, so the panel
+      // stays season-to-date while a rolling window is shown
+      if (DataStore.period !== 'season') info.push('Season to date');
       document.getElementById('panel-pitcher-info').textContent = info.join(' | ');
 
       sidePanel.classList.add('open');
@@ -289,6 +315,7 @@
         buildHitterPanelTable(name);
       } else {
         // Show scatter chart for pitchers
+        panelHitter = null;
         if (chartContainer) chartContainer.style.display = '';
         ScatterChart.render(name);
         buildPanelMetricsTable(name);
@@ -296,6 +323,7 @@
     };
 
     App.closeSidePanel = function () {
+      panelHitter = null;
       sidePanel.classList.remove('open');
       panelOverlay.classList.remove('visible');
       ScatterChart.destroy();
@@ -306,6 +334,14 @@
       for (var i = 0; i < active.length; i++) active[i].classList.remove('active-row');
     };
 
+    // Movement plot view: density summary (default) or every pitch
+    var viewButtons = sidePanel.querySelectorAll('.chart-view-btn');
+    for (var v = 0; v < viewButtons.length; v++) {
+      viewButtons[v].addEventListener('click', function () {
+        ScatterChart.setView(this.getAttribute('data-view'));
+      });
+    }
+
     panelClose.addEventListener('click', App.closeSidePanel);
     panelOverlay.addEventListener('click', App.closeSidePanel);
     document.addEventListener('keydown', function (e) {
@@ -326,11 +362,8 @@
     var container = document.getElementById('panel-metrics-table');
     container.innerHTML = '';
 
-    // Get pitch data for this pitcher
-    var pitchData = DataStore.pitchData;
-    if (!pitchData) return;
-
-    var pitcherRows = pitchData.filter(function (r) { return r.pitcher === pitcherName; });
+    // Season pitch data for this pitcher (the panel is season-to-date)
+    var pitcherRows = DataStore.rowsForName('pitch', pitcherName, true);
     if (pitcherRows.length === 0) return;
 
     // Sort by usage descending
@@ -385,12 +418,16 @@
   function buildHitterPanelTable(hitterName) {
     var container = document.getElementById('panel-metrics-table');
     container.innerHTML = '';
+    panelHitter = hitterName;
 
-    var details = window.HITTER_PITCH_DETAILS;
-    if (!details || !details[hitterName]) return;
+    // Only this hitter's shard is loaded; ignore it if the panel has moved on meanwhile
+    DataStore.loadDetails('hitters', hitterName).then(function (ptData) {
+      if (panelHitter === hitterName) renderHitterPanelTable(container, ptData);
+    });
+  }
 
-    var ptData = details[hitterName];
-    if (ptData.length === 0) return;
+  function renderHitterPanelTable(container, ptData) {
+    if (!ptData || ptData.length === 0) return;
 
     var statCols = [
       { key: 'pitchType', label: 'Pitch', format: function (v) { return v; } },
@@ -639,6 +676,7 @@
   function saveURLState() {
     var params = {
       tab: currentTab,
+      period: DataStore.period === 'season' ? '' : DataStore.period,
       team: teamSelect.value,
       throws: throwsSelect.value,
       min: minCountInput.value,
@@ -679,6 +717,11 @@
       document.getElementById('compare-btn').style.display =
         currentTab === 'hitter' ? 'none' : '';
     }
+    if (params.period) {
+      for (var p = 0; p < periodSelect.options.length; p++) {
+        if (periodSelect.options[p].value === params.period) periodSelect.value = params.period;
+      }
+    }
     if (params.team) teamSelect.value = params.team;
     if (params.throws) throwsSelect.value = params.throws;
     if (params.min) minCountInput.value = params.min;
@@ -3,46 +3,328 @@ var DataStore = {
   pitcherData: null,
   hitterData: null,
   metadata: null,
+  indexes: {},        // tab -> filter index from process_data.py (see filter_index there)
+  detailsManifest: null,
+  detailShards: {},   // 'pitchers/3f' -> promise of { player name: details }
+  receivedShards: {}, // shard scripts hand their players over here (see addDetailShard)
+  period: 'season',   // 'season' or a rolling window key from metadata.windows ('7d', '14d')
+  season: null,       // the season tables and indexes while a window is shown
+  windowLoads: {},    // window key -> promise of its decoded tables
+  receivedWindows: {}, // window scripts hand their data over here (see addWindow)
 
   load: function () {
     // Use embedded data (works with file:// and http://)
     if (window.PITCH_DATA && window.PITCHER_DATA && window.METADATA) {
-      this.pitchData = window.PITCH_DATA;
-      this.pitcherData = window.PITCHER_DATA;
-      this.hitterData = window.HITTER_DATA || [];
+      this.pitchData = this.decodeTable(window.PITCH_DATA);
+      this.pitcherData = this.decodeTable(window.PITCHER_DATA);
+      this.hitterData = this.decodeTable(window.HITTER_DATA) || [];
       this.metadata = window.METADATA;
+      this.indexes = { pitch: window.PITCH_INDEX, pitcher: window.PITCHER_INDEX, hitter: window.HITTER_INDEX };
+      this.detailsManifest = window.DETAILS_MANIFEST || null;
       return Promise.resolve();
     }
 
-    // Fallback: try fetch (only works with http server)
+    // Fallback: try fetch (only works with http server). metadata.json lists content-hashed
+    // copies of the other files (metadata.files), which browsers can cache indefinitely.
     var self = this;
-    return Promise.all([
-      fetch('data/pitch_leaderboard.json').then(function (r) { return r.json(); }),
-      fetch('data/pitcher_leaderboard.json').then(function (r) { return r.json(); }),
-      fetch('data/hitter_leaderboard.json').then(function (r) { return r.json(); }).catch(function () { return []; }),
-      fetch('data/metadata.json').then(function (r) { return r.json(); }),
-    ]).then(function (results) {
-      self.pitchData = results[0];
-      self.pitcherData = results[1];
-      self.hitterData = results[2];
-      self.metadata = results[3];
+    function getJSON(url) {
+      return fetch(url).then(function (r) { return r.json(); });
+    }
+    return getJSON('data/metadata.json').then(function (metadata) {
+      var files = metadata.files || {};
+      function getFile(name, plainPath) { return getJSON('data/' + (files[name] || plainPath)); }
+      return Promise.all([
+        getFile('pitch_leaderboard', 'pitch_leaderboard.json'),
+        getFile('pitcher_leaderboard', 'pitcher_leaderboard.json'),
+        getFile('hitter_leaderboard', 'hitter_leaderboard.json').catch(function () { return []; }),
+        getFile('details_manifest', 'details/manifest.json').catch(function () { return null; }),
+        getFile('pitch_index', 'pitch_index.json').catch(function () { return null; }),
+        getFile('pitcher_index', 'pitcher_index.json').catch(function () { return null; }),
+        getFile('hitter_index', 'hitter_index.json').catch(function () { return null; }),
+      ]).then(function (results) {
+        self.pitchData = self.decodeTable(results[0]);
+        self.pitcherData = self.decodeTable(results[1]);
+        self.hitterData = self.decodeTable(results[2]);
+        self.metadata = metadata;
+        self.detailsManifest = results[3];
+        self.indexes = { pitch: results[4], pitcher: results[5], hitter: results[6] };
+      });
     }).catch(function (e) {
       console.error('Failed to load data:', e);
     });
   },
 
+  /**
+   * Rebuild row objects from a columnar leaderboard (process_data.py --compact, see
+   * columnar_table there): per-column value arrays, with text columns optionally stored as
+   * indices into col.dict and floats as integers to divide by col.scale. Arrays of rows
+   * (the default output) pass through unchanged.
+   */
+  decodeTable: function (table) {
+    if (!table || Array.isArray(table) || table.format !== 'columnar') return table;
+    var n = table.rows;
+    var rows = new Array(n);
+    for (var i = 0; i < n; i++) rows[i] = {};
+    for (var c = 0; c < table.columns.length; c++) {
+      var col = table.columns[c];
+      var values = table.data[c];
+      var name = col.name, dict = col.dict, scale = col.scale;
+      for (var i = 0; i < n; i++) {
+        var v = values[i];
+        if (v !== null) {
+          if (dict) v = dict[v];
+          else if (scale) v = v / scale;
+        }
+        rows[i][name] = v;
+      }
+      if (col.absent) {
+        for (var a = 0; a < col.absent.length; a++) delete rows[col.absent[a]][name];
+      }
+    }
+    return rows;
+  },
+
+  /**
+   * Shard id of a player name: the top manifest.shardBits bits of the 32-bit FNV-1a hash
+   * of its UTF-8 bytes, as fixed-width hex (same as detail_shard in process_data.py).
+   */
+  detailShard: function (name, bits) {
+    var bytes = new TextEncoder().encode(name);
+    var h = 0x811c9dc5;
+    for (var i = 0; i < bytes.length; i++) {
+      h = Math.imul(h ^ bytes[i], 0x01000193) >>> 0;
+    }
+    var shard = (h >>> (32 - bits)).toString(16);
+    while (shard.length < Math.ceil(bits / 4)) shard = '0' + shard;
+    return shard;
+  },
+
+  /**
+   * Details of one player, loading only that player's shard (kind is 'pitchers' for the
+   * pitch-by-pitch scatter data, 'summaries' for the binned movement / velocity summaries
+   * of those pitches, 'hitters' for the pitch-type breakdown).
+   * Resolves to null if the player has none.
+   */
+  loadDetails: function (kind, name) {
+    if (window.PITCH_DETAILS) { // data_embedded.js from an older build: no summaries
+      var embedded = { pitchers: window.PITCH_DETAILS, hitters: window.HITTER_PITCH_DETAILS }[kind] || {};
+      return Promise.resolve(embedded[name] || null);
+    }
+
+    var manifest = this.detailsManifest;
+    if (!manifest || !manifest[kind]) return Promise.resolve(null);
+    var shard = this.detailShard(name, manifest.shardBits);
+    var digest = manifest[kind][shard]; // content hash, part of the file name
+    if (!digest) return Promise.resolve(null);
+
+    var key = kind + '/' + shard;
+    var self = this;
+    if (!this.detailShards[key]) {
+      // Shards are scripts rather than JSON so they load from file:// as well as http
+      this.detailShards[key] = new Promise(function (resolve, reject) {
+        var script = document.createElement('script');
+        script.src = 'data/details/' + key + '.' + digest + '.js';
+        script.onload = function () { resolve(self.receivedShards[key] || {}); };
+        script.onerror = function () { reject(new Error('Failed to load ' + script.src)); };
+        document.head.appendChild(script);
+      }).catch(function (e) {
+        console.error(e);
+        delete self.detailShards[key]; // let a later click retry
+        return {};
+      });
+    }
+    return this.detailShards[key].then(function (players) { return players[name] || null; });
+  },
+
+  addDetailShard: function (kind, shard, players) {
+    this.receivedShards[kind + '/' + shard] = players;
+  },
+
+  /**
+   * Decoded tables and filter indexes of a rolling window (a key of metadata.windows), loading
+   * its script (data/windows/<key>.<hash>.js, listed in metadata.files) the first time.
+   * Resolves to null if the build has no such window or it failed to load.
+   */
+  loadWindow: function (key) {
+    var files = (this.metadata && this.metadata.files) || {};
+    var path = files['window_' + key];
+    if (!path) return Promise.resolve(null);
+    var self = this;
+    if (!this.windowLoads[key]) {
+      this.windowLoads[key] = new Promise(function (resolve, reject) {
+        var script = document.createElement('script');
+        script.src = 'data/' + path;
+        script.onload = function () { resolve(self.receivedWindows[key] || null); };
+        script.onerror = function () { reject(new Error('Failed to load ' + script.src)); };
+        document.head.appendChild(script);
+      }).then(function (data) {
+        if (!data) return null;
+        return { pitch: self.decodeTable(data.pitch), pitcher: self.decodeTable(data.pitcher),
+                 hitter: self.decodeTable(data.hitter), indexes: data.indexes || {} };
+      }).catch(function (e) {
+        console.error(e);
+        delete self.windowLoads[key]; // let a later pick retry
+        return null;
+      });
+    }
+    return this.windowLoads[key];
+  },
+
+  addWindow: function (key, data) {
+    this.receivedWindows[key] = data;
+  },
+
+  /**
+   * Show the season ('season') or a rolling window's leaderboards in every tab, with their
+   * filter indexes. Resolves to the period actually shown: the season if the window could
+   * not be loaded.
+   */
+  setPeriod: function (period) {
+    var self = this;
+    if (!this.season) {
+      this.season = { pitch: this.pitchData, pitcher: this.pitcherData, hitter: this.hitterData,
+                      indexes: this.indexes };
+    }
+    var load = period === 'season' ? Promise.resolve(null) : this.loadWindow(period);
+    return load.then(function (tables) {
+      var shown = tables || self.season;
+      self.pitchData = shown.pitch;
+      self.pitcherData = shown.pitcher;
+      self.hitterData = shown.hitter;
+      self.indexes = shown.indexes;
+      self.period = tables ? period : 'season';
+      return self.period;
+    });
+  },
+
+  /**
+   * Search words of a name or query: accents stripped, lower-cased, split on anything that
+   * is not a letter or digit (same as name_words in process_data.py).
+   */
+  nameWords: function (text) {
+    return text.normalize('NFKD').replace(/\p{Mn}/gu, '').toLowerCase().match(/[\p{L}\p{N}]+/gu) || [];
+  },
+
+  sourceFor: function (tab) {
+    if (tab === 'pitch') return this.pitchData;
+    if (tab === 'pitcher') return this.pitcherData;
+    if (tab === 'hitter') return this.hitterData;
+    return null;
+  },
+
+  /** The tab's filter index, if it was built from the rows currently loaded. */
+  indexFor: function (tab) {
+    var source = this.sourceFor(tab);
+    var index = this.indexes[tab];
+    return source && index && index.rows === source.length ? index : null;
+  },
+
+  /**
+   * Ids (into index.names) of the names matching a search: every query word must be a
+   * prefix of one of the name's words. index.words is sorted, so the words starting with a
+   * prefix are a contiguous run found by binary search.
+   */
+  searchNames: function (index, queryWords) {
+    var words = index.words;
+    var matched = null;
+    for (var q = 0; q < queryWords.length; q++) {
+      var prefix = queryWords[q];
+      var lo = 0, hi = words.length;
+      while (lo < hi) {
+        var mid = (lo + hi) >>> 1;
+        if (words[mid] < prefix) lo = mid + 1;
+        else hi = mid;
+      }
+      var names = {};
+      for (var w = lo; w < words.length && words[w].lastIndexOf(prefix, 0) === 0; w++) {
+        var ids = index.wordNames[w];
+        for (var k = 0; k < ids.length; k++) {
+          if (!matched || matched[ids[k]]) names[ids[k]] = true;
+        }
+      }
+      matched = names;
+    }
+    return matched;
+  },
+
+  /**
+   * Rows of one player (pitcher or hitter name) in a tab: of the period shown, or of the
+   * season when `season` is set.
+   */
+  rowsForName: function (tab, name, season) {
+    var tables = season && this.season;
+    var source = tables ? tables[tab] : this.sourceFor(tab);
+    if (!source) return [];
+    var index = tables ? tables.indexes[tab] : this.indexFor(tab);
+    if (!index || index.rows !== source.length) {
+      return source.filter(function (row) { return (row.pitcher || row.hitter) === name; });
+    }
+    var id = index.names.indexOf(name);
+    return id === -1 ? [] : index.nameRows[id].map(function (i) { return source[i]; });
+  },
+
   /**
    * Filter data based on current filters.
    * pitchTypes can be an array for multi-select: ['FF', 'SI'] or 'all'
+   *
+   * With a filter index each dropdown and the search contribute a set of row ids; a row is
+   * kept when it is in all of them (counted per row), so only those rows are looked at for
+   * the count thresholds. Search matches names word by word (see searchNames).
    */
   getFilteredData: function (tab, filters) {
-    var source;
-    if (tab === 'pitch') source = this.pitchData;
-    else if (tab === 'pitcher') source = this.pitcherData;
-    else if (tab === 'hitter') source = this.hitterData;
+    var source = this.sourceFor(tab);
     if (!source) return [];
+    var index = this.indexFor(tab);
+    if (!index) return this.scanFilteredData(tab, source, filters);
+
+    // Each constraint is a union of disjoint row-id lists (rows have one team, pitch type,
+    // name, ...), so a row that satisfies all of them is hit exactly `required` times.
+    var hits = new Uint8Array(source.length);
+    var required = 0;
+    function mark(ids) {
+      if (!ids) return;
+      for (var i = 0; i < ids.length; i++) hits[ids[i]]++;
+    }
+    if (filters.team !== 'all') {
+      mark(index.by.team[filters.team]);
+      required++;
+    }
+    // Throws filter applies to pitchers; stands filter applies to hitters (same dropdown)
+    if (filters.throws !== 'all') {
+      mark(index.by[tab === 'hitter' ? 'stands' : 'throws'][filters.throws]);
+      required++;
+    }
+    if (tab === 'pitch' && filters.pitchTypes !== 'all') {
+      for (var p = 0; p < filters.pitchTypes.length; p++) mark(index.by.pitchType[filters.pitchTypes[p]]);
+      required++;
+    }
+    var queryWords = filters.search ? this.nameWords(filters.search) : [];
+    if (queryWords.length) {
+      var names = this.searchNames(index, queryWords);
+      for (var n in names) mark(index.nameRows[n]);
+      required++;
+    }
 
+    var result = [];
+    var hitter = tab === 'hitter';
+    for (var r = 0; r < hits.length; r++) {
+      if (hits[r] !== required) continue;
+      var row = source[r];
+      if (row.count < filters.minCount) continue;
+      if (hitter && filters.minSwings && row.nSwings < filters.minSwings) continue;
+      result.push(row);
+    }
+    return result;
+  },
+
+  /**
+   * getFilteredData without an index (a data file from an older build): test every row.
+   * Search matches names as searchNames does: each query word a prefix of a name word.
+   */
+  scanFilteredData: function (tab, source, filters) {
     var selectedPitchTypes = filters.pitchTypes; // array or 'all'
+    var queryWords = filters.search ? this.nameWords(filters.search) : [];
+    var nameWords = this.nameWords;
 
     return source.filter(function (row) {
       if (filters.team !== 'all' && row.team !== filters.team) return false;
@@ -61,9 +343,13 @@ var DataStore = {
       }
       if (row.count < filters.minCount) return false;
       if (tab === 'hitter' && filters.minSwings && row.nSwings < filters.minSwings) return false;
-      if (filters.search) {
-        var name = (row.pitcher || row.hitter || '').toLowerCase();
-        if (name.indexOf(filters.search.toLowerCase()) === -1) return false;
+      if (queryWords.length) {
+        var words = nameWords(row.pitcher || row.hitter || '');
+        for (var q = 0; q < queryWords.length; q++) {
+          var found = false;
+          for (var w = 0; w < words.length && !found; w++) found = words[w].lastIndexOf(queryWords[q], 0) === 0;
+          if (!found) return false;
+        }
       }
       return true;
     });
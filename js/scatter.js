@@ -1,7 +1,10 @@
 var ScatterChart = {
   chart: null,
+  veloChart: null,
   compareChart: null,
   currentPitcher: null,
+  view: 'summary',    // 'summary': density + sampled points; 'pitches': every pitch (loaded on demand)
+  compareRequest: 0, // bumped per renderCompare call, so only the latest one draws
 
   COLORS: {
     FF: { bg: '#0000FF', border: '#0000CC' },
@@ -33,7 +36,11 @@ var ScatterChart = {
       var dx = points[i].x - mx, dy = points[i].y - my;
       cxx += dx * dx; cxy += dx * dy; cyy += dy * dy;
     }
-    cxx /= n; cxy /= n; cyy /= n;
+    return this.ellipseFromMoments(mx, my, cxx / n, cxy / n, cyy / n);
+  },
+
+  // Ellipse from means and (population) covariances, e.g. those of a pitch summary
+  ellipseFromMoments: function (mx, my, cxx, cxy, cyy) {
     var trace = cxx + cyy;
     var det = cxx * cyy - cxy * cxy;
     var disc = Math.sqrt(Math.max(0, trace * trace / 4 - det));
@@ -47,6 +54,37 @@ var ScatterChart = {
     return { cx: mx, cy: my, rx: rx, ry: ry, angle: angle };
   },
 
+  // Movement histogram cells of the summary view, shaded by pitch count, under the points
+  densityPlugin: {
+    id: 'densityPlugin',
+    beforeDatasetsDraw: function (chart) {
+      var meta = chart._densityMeta;
+      if (!meta) return;
+      var ctx = chart.ctx;
+      var xScale = chart.scales.x;
+      var yScale = chart.scales.y;
+      var area = chart.chartArea;
+      ctx.save();
+      ctx.beginPath();
+      ctx.rect(area.left, area.top, area.right - area.left, area.bottom - area.top);
+      ctx.clip();
+      for (var i = 0; i < meta.length; i++) {
+        var d = meta[i];
+        ctx.fillStyle = d.color;
+        for (var c = 0; c < d.cells.length; c++) {
+          var cell = d.cells[c];
+          var x0 = xScale.getPixelForValue(cell[0] * d.bin);
+          var x1 = xScale.getPixelForValue((cell[0] + 1) * d.bin);
+          var y0 = yScale.getPixelForValue(cell[1] * d.bin);
+          var y1 = yScale.getPixelForValue((cell[1] + 1) * d.bin);
+          ctx.globalAlpha = 0.08 + 0.42 * cell[2] / d.max;
+          ctx.fillRect(Math.min(x0, x1), Math.min(y0, y1), Math.abs(x1 - x0), Math.abs(y1 - y0));
+        }
+      }
+      ctx.restore();
+    }
+  },
+
   // Custom Chart.js plugin for ellipses and crosshairs
   ellipsePlugin: {
     id: 'ellipsePlugin',
@@ -99,10 +137,7 @@ var ScatterChart = {
     }
   },
 
-  _buildMovementData: function (pitcherName) {
-    var details = window.PITCH_DETAILS;
-    if (!details) return null;
-    var pitches = details[pitcherName];
+  _buildMovementData: function (pitches) {
     if (!pitches || pitches.length === 0) return null;
 
     var groups = {};
@@ -114,10 +149,141 @@ var ScatterChart = {
     return groups;
   },
 
+  /**
+   * Movement plot of one pitcher. The summary view draws from the pitcher's summary shard
+   * (density cells, ellipses from all pitches, a sample of points); every pitch is only
+   * loaded when the 'pitches' view is picked, or when there are no summaries (older data).
+   */
   render: function (pitcherName) {
     this.currentPitcher = pitcherName;
+    this.setView('summary');
+  },
+
+  setView: function (view) {
+    this.view = view;
+    var buttons = document.querySelectorAll('.chart-view-btn');
+    for (var i = 0; i < buttons.length; i++) {
+      buttons[i].classList.toggle('active', buttons[i].getAttribute('data-view') === view);
+    }
+    var pitcherName = this.currentPitcher;
+    if (!pitcherName) return;
+    var self = this;
+    DataStore.loadDetails('summaries', pitcherName).then(function (summary) {
+      // The panel may have moved on to another pitcher, view (or closed) while the shard loaded
+      if (self.currentPitcher !== pitcherName || self.view !== view) return;
+      self._renderVelocity(summary);
+      if (summary && view === 'summary') {
+        self._renderSummary(summary);
+        return;
+      }
+      DataStore.loadDetails('pitchers', pitcherName).then(function (pitches) {
+        if (self.currentPitcher === pitcherName && self.view === view) self._renderMovement(pitches);
+      });
+    });
+  },
+
+  _renderSummary: function (summary) {
+    var bin = DataStore.detailsManifest.summaryBins.movement;
+    var datasets = [];
+    var ellipseMeta = [];
+    var densityMeta = [];
+    var pitchTypes = Object.keys(summary).sort();
+
+    for (var j = 0; j < pitchTypes.length; j++) {
+      var pt = pitchTypes[j];
+      var s = summary[pt];
+      var color = this.getColor(pt);
+      var pts = s.sample.map(function (p) { return { x: p[0], y: p[1] }; });
+
+      datasets.push({
+        label: pt + ' - ' + (Utils.pitchTypeLabel(pt) || pt),
+        data: pts,
+        backgroundColor: color.bg,
+        borderColor: color.border,
+        borderWidth: 1.5,
+        pointRadius: 5,
+        pointHoverRadius: 7,
+      });
+
+      var ellipse = s.n < 3 ? null : this.ellipseFromMoments(s.mean[0], s.mean[1], s.cov[0], s.cov[1], s.cov[2]);
+      ellipseMeta.push({ color: color.border, ellipse: ellipse });
+      var max = 0;
+      for (var c = 0; c < s.move.length; c++) max = Math.max(max, s.move[c][2]);
+      densityMeta.push({ color: color.bg, cells: s.move, max: max, bin: bin });
+    }
+    this._drawMovement(datasets, ellipseMeta, densityMeta);
+  },
+
+  // Velocity distribution per pitch type, under the movement plot (summaries only)
+  _renderVelocity: function (summary) {
+    if (this.veloChart) { this.veloChart.destroy(); this.veloChart = null; }
+    var container = document.querySelector('.velo-chart-container');
+    if (!summary) {
+      if (container) container.style.display = 'none';
+      return;
+    }
+    if (container) container.style.display = '';
+    var bin = DataStore.detailsManifest.summaryBins.velocity;
+    var datasets = [];
+    var pitchTypes = Object.keys(summary).sort();
+    for (var j = 0; j < pitchTypes.length; j++) {
+      var pt = pitchTypes[j];
+      var velo = summary[pt].velo;
+      if (!velo) continue;
+      var lo = velo[0], counts = velo[1];
+      var data = [{ x: lo * bin, y: 0 }];
+      for (var i = 0; i < counts.length; i++) data.push({ x: (lo + i + 0.5) * bin, y: counts[i] });
+      data.push({ x: (lo + counts.length) * bin, y: 0 });
+      var color = this.getColor(pt);
+      datasets.push({
+        label: pt,
+        data: data,
+        borderColor: color.bg,
+        backgroundColor: color.bg,
+        borderWidth: 2,
+        pointRadius: 0,
+        tension: 0.3,
+      });
+    }
 
-    var groups = this._buildMovementData(pitcherName);
+    var canvas = document.getElementById('velo-chart');
+    if (!canvas) return;
+    this.veloChart = new Chart(canvas.getContext('2d'), {
+      type: 'line',
+      data: { datasets: datasets },
+      options: {
+        responsive: true,
+        maintainAspectRatio: true,
+        aspectRatio: 2.5,
+        plugins: {
+          legend: { display: false },
+          tooltip: {
+            callbacks: {
+              label: function (ctx) {
+                return ctx.dataset.label + ': ' + ctx.parsed.y + ' pitches';
+              }
+            }
+          }
+        },
+        scales: {
+          x: {
+            type: 'linear',
+            title: { display: true, text: 'Velocity (mph)', font: { size: 12, weight: 'bold' } },
+            grid: { display: true, color: 'rgba(0,0,0,0.06)' },
+          },
+          y: {
+            title: { display: true, text: 'Pitches', font: { size: 12, weight: 'bold' } },
+            beginAtZero: true,
+            grid: { display: true, color: 'rgba(0,0,0,0.06)' },
+          },
+        },
+        animation: { duration: 300 },
+      },
+    });
+  },
+
+  _renderMovement: function (pitches) {
+    var groups = this._buildMovementData(pitches);
     if (!groups) return;
 
     var datasets = [];
@@ -143,7 +309,10 @@ var ScatterChart = {
       var ellipse = this.computeEllipse(pts);
       ellipseMeta.push({ color: color.border, ellipse: ellipse });
     }
+    this._drawMovement(datasets, ellipseMeta, null);
+  },
 
+  _drawMovement: function (datasets, ellipseMeta, densityMeta) {
     this.destroyMain();
 
     var canvas = document.getElementById('pitch-chart');
@@ -185,23 +354,33 @@ var ScatterChart = {
         },
         animation: { duration: 300 },
       },
-      plugins: [this.ellipsePlugin],
+      plugins: [this.densityPlugin, this.ellipsePlugin],
     });
 
     this.chart._ellipseMeta = ellipseMeta;
+    this.chart._densityMeta = densityMeta;
   },
 
   // Compare mode: overlay multiple pitchers
   renderCompare: function (pitcherNames) {
     if (!pitcherNames || pitcherNames.length === 0) return;
 
+    // Every pitch of each compared pitcher, from its detail shard (loaded on demand)
+    var request = ++this.compareRequest;
+    var self = this;
+    Promise.all(pitcherNames.map(function (name) {
+      return DataStore.loadDetails('pitchers', name);
+    })).then(function (details) {
+      if (request === self.compareRequest) self._renderCompare(pitcherNames, details);
+    });
+  },
+
+  _renderCompare: function (pitcherNames, details) {
     var datasets = [];
-    var details = window.PITCH_DETAILS;
-    if (!details) return;
 
     for (var pi = 0; pi < pitcherNames.length; pi++) {
       var name = pitcherNames[pi];
-      var pitches = details[name];
+      var pitches = details[pi];
       if (!pitches) continue;
 
       var groups = {};
@@ -283,10 +462,13 @@ var ScatterChart = {
   },
 
   destroyCompare: function () {
+    this.compareRequest++;
     if (this.compareChart) { this.compareChart.destroy(); this.compareChart = null; }
   },
 
   destroy: function () {
+    this.currentPitcher = null;
     this.destroyMain();
+    if (this.veloChart) { this.veloChart.destroy(); this.veloChart = null; }
   },
 };
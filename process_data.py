@@ -3,17 +3,57 @@
 
 import gspread
 from google.oauth2.service_account import Credentials
+import argparse
+import cProfile
+import csv
+import gzip
+import hashlib
+import io
 import json
 import math
 import os
+import pstats
+import queue
+import random
+import re
+import sys
+import tempfile
+import threading
+import tracemalloc
+import unicodedata
+from array import array
+import numpy as np
 import time as time_module
-from datetime import datetime, time
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from datetime import date, datetime, time, timedelta
+from collections import defaultdict, deque
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not on Windows; peak RSS is then left out of the build report
+    resource = None
 
 PITCHING_SPREADSHEET_ID = '1nIk00hnO2VlXLoApMRK2wSmnEKslqI7ybRjHO5HOG4w'
 HITTING_SPREADSHEET_ID = '122pPITUxDJK0M_CyXJ4dkWOmGFodEBosAgcjE1PZ3RE'
 SERVICE_ACCOUNT_FILE = os.path.join(os.path.dirname(__file__), 'service_account.json')
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+# Raw worksheet snapshots, reused while a tab's fingerprint is unchanged (--full-rebuild re-downloads them all)
+SHEET_CACHE_DIR = os.path.join(os.path.dirname(__file__), '.cache', 'sheets')
+
+# Sheets API pacing: worksheets of both spreadsheets are read on a small thread pool that shares
+# one token bucket (the read quota is 60 requests/minute/user), and 429s back off exponentially.
+# The first three are defaults for --fetch-workers, --fetch-rate and --fetch-burst.
+FETCH_WORKERS = 4
+FETCH_RATE = 1.0    # sustained requests per second
+FETCH_BURST = 5     # requests allowed back-to-back after an idle spell
+RETRY_BASE_WAIT = 15
+RETRY_MAX_WAIT = 120
+RETRY_STATUSES = {429, 500, 502, 503, 504}  # rate limits and transient server errors
+BATCH_RANGES = 10   # worksheets fetched per values:batchGet request
+FETCH_AHEAD = 3     # batches per spreadsheet downloaded ahead of the worksheet being processed
 
 METRIC_COLS = [
     'Velocity', 'Spin Rate', 'IndVertBrk', 'HorzBrk',
@@ -47,6 +87,64 @@ HITTER_STAT_KEYS = [
 # Hitter stats where lower is better (invert percentile so low value = red/high pctl)
 HITTER_INVERT_PCTL = {'swingPct', 'chasePct', 'whiffPct', 'gbPct'}
 
+# --- Typed record schema: the sheet columns the leaderboards read and the type each is parsed to ---
+# Every cell is validated and converted exactly once, at ingest; aggregators only see typed arrays.
+TEXT, FLOAT, INT, TILT = 'text', 'float', 'int', 'tilt'
+INT_NONE = -1  # stands in for a missing int/tilt value (never in IN_ZONE / OUT_ZONE)
+PITCH_SCHEMA = [
+    ('Date', TEXT), ('Pitcher', TEXT), ('Team', TEXT), ('Throws', TEXT), ('Pitch Type', TEXT),
+    ('Zone', INT), ('Description', TEXT), ('BB Type', TEXT), ('Break Tilt', TILT),
+] + [(col, FLOAT) for col in METRIC_COLS]
+HITTER_SCHEMA = [
+    ('Date', TEXT), ('Hitter', TEXT), ('Team', TEXT), ('Stands', TEXT), ('Pitch Type', TEXT),
+    ('Zone', INT), ('Description', TEXT), ('BB Type', TEXT),
+    ('Exit Velocity', FLOAT), ('Launch Angle', FLOAT), ('xBA', FLOAT), ('xSLG', FLOAT),
+]
+
+def safe_float(val):
+    """Convert a value to float, returning None if not possible."""
+    if val is None or val == '':
+        return None
+    try:
+        return float(val)
+    except (ValueError, TypeError):
+        return None
+
+
+def safe_int(val):
+    """Convert a value to int, returning None if not possible."""
+    if val is None or val == '':
+        return None
+    try:
+        return int(float(val))
+    except (ValueError, TypeError):
+        return None
+
+
+def round_metric(key, value):
+    """Round a metric value according to its type."""
+    if value is None:
+        return None
+    if key == 'Spin Rate':
+        return round(value)
+    if key in ('VAA', 'HAA', 'VRA', 'HRA'):
+        return round_float(value, 2)
+    return round_float(value, 1)
+
+
+def round_float(value, ndigits):
+    """round() for floats written to the outputs, with -0.0 folded into 0.0 so that equal values
+    always serialise the same way."""
+    return round(value, ndigits) + 0.0
+
+
+# ======================================================================
+#  BREAK TILT (clock-face circular statistics)
+# ======================================================================
+# Break Tilt is a clock reading (H:MM, 12 hours = 720 minutes), so its averages are circular:
+# each value becomes an angle, groups add up the angles' sin and cos (tilt_components, summed by
+# the group accumulators, so the sums carry over between incremental runs) and the mean is the
+# direction of the summed vector.
 
 def break_tilt_to_minutes(val):
     """Convert a time value (clock notation) to total minutes (0-719).
@@ -67,13 +165,44 @@ def break_tilt_to_minutes(val):
     return None
 
 
+def parse_tilts(cells):
+    """Break Tilt cells ('H:MM' strings, None when empty) as an int64 array of clock minutes,
+    INT_NONE where empty or unparseable, and the number of unparseable cells. A season has a few
+    hundred distinct readings, so each is parsed once and spread back with a single take."""
+    distinct = {}
+    codes = np.fromiter((distinct.setdefault(c, len(distinct)) for c in cells), np.int64, len(cells))
+    parsed = [INT_NONE if c is None else break_tilt_to_minutes(c) for c in distinct]
+    bad = np.array([m is None for m in parsed], dtype=bool)
+    table = np.array([INT_NONE if m is None else m for m in parsed], dtype=np.int64)
+    invalid = int(np.bincount(codes, minlength=len(parsed))[bad].sum()) if bad.any() else 0
+    return table[codes], invalid
+
+
+def tilt_components(minutes):
+    """(sin, cos) of the clock angle of each Break Tilt value, NaN where missing. math.sin/cos run
+    once per distinct minute value, so the terms do not depend on the platform's vector math."""
+    uniq, inverse = np.unique(minutes, return_inverse=True)
+    angles = [m / 720.0 * 2 * math.pi for m in uniq.tolist()]
+    missing = minutes == INT_NONE
+    sin = np.where(missing, np.nan, np.array([math.sin(a) for a in angles])[inverse])
+    cos = np.where(missing, np.nan, np.array([math.cos(a) for a in angles])[inverse])
+    return sin, cos
+
+
 def circular_mean_minutes(minute_values):
     """Circular mean for clock-face values (0-719 minutes = 12 hours)."""
-    if not minute_values:
+    if not len(minute_values):
         return None
-    angles = [m / 720.0 * 2 * math.pi for m in minute_values]
-    sin_avg = sum(math.sin(a) for a in angles) / len(angles)
-    cos_avg = sum(math.cos(a) for a in angles) / len(angles)
+    sin, cos = tilt_components(np.asarray(minute_values, dtype=np.int64))
+    return circular_mean_from_sums(sum(sin.tolist()), sum(cos.tolist()), len(minute_values))
+
+
+def circular_mean_from_sums(sin_sum, cos_sum, n):
+    """circular_mean_minutes() from the sums of sin/cos of the clock angles and their count."""
+    if not n:
+        return None
+    sin_avg = sin_sum / n
+    cos_avg = cos_sum / n
     avg_angle = math.atan2(sin_avg, cos_avg)
     if avg_angle < 0:
         avg_angle += 2 * math.pi
@@ -81,6 +210,24 @@ def circular_mean_minutes(minute_values):
     return round(avg_minutes)
 
 
+def circular_means_from_sums(sin_sums, cos_sums, counts):
+    """circular_mean_from_sums() for every group at once: lists of per-group sin / cos sums and
+    counts in, a list of mean minutes out (None for groups without a value). np.arctan2 may be a
+    bit off math.atan2, which only shows at a half-minute tie (two pitches a minute apart), so
+    those groups are redone with circular_mean_from_sums and every result matches it."""
+    sin_sums, cos_sums = np.asarray(sin_sums, dtype=np.float64), np.asarray(cos_sums, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        angles = np.arctan2(sin_sums / counts, cos_sums / counts)
+    angles = np.where(angles < 0, angles + 2 * math.pi, angles)
+    raw = angles / (2 * math.pi) * 720
+    minutes = np.rint(raw)
+    ties = np.flatnonzero(np.abs(np.abs(raw - minutes) - 0.5) < 1e-9)
+    minutes[ties] = [circular_mean_from_sums(s, c, n) for s, c, n in
+                     zip(sin_sums[ties].tolist(), cos_sums[ties].tolist(), counts[ties].tolist())]
+    return [int(m) if n else None for m, n in zip(minutes.tolist(), counts.tolist())]
+
+
 def minutes_to_tilt_display(total_minutes):
     """Convert minutes back to H:MM display format."""
     if total_minutes is None:
@@ -92,257 +239,1927 @@ def minutes_to_tilt_display(total_minutes):
     return f"{h}:{m:02d}"
 
 
-def safe_float(val):
-    """Convert a value to float, returning None if not possible."""
-    if val is None or val == '':
-        return None
-    try:
-        return float(val)
-    except (ValueError, TypeError):
-        return None
+# ======================================================================
+#  INSTRUMENTATION
+# ======================================================================
+# REPORT collects per-stage timings and fetch counters for the run; main() writes it to
+# data/build_report.json next to metadata.json (git-ignored: it changes on every run, so the
+# workflow uploads it as an artifact instead).
 
+REPORT_FILE = 'build_report.json'
+PROFILE_FILE = 'build_profile.pstats'  # written by --profile (not committed)
 
-def safe_int(val):
-    """Convert a value to int, returning None if not possible."""
-    if val is None or val == '':
-        return None
-    try:
-        return int(float(val))
-    except (ValueError, TypeError):
+
+def peak_rss_mb():
+    """The process's peak resident set size so far in MB (None where `resource` is unavailable)."""
+    if resource is None:
         return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)  # bytes on macOS, KiB on Linux
+
+
+class BuildReport:
+    """Stage timings and counters for one run.
+
+    `with REPORT.stage(name) as st:` records the stage's wall and CPU seconds and the peak RSS
+    after it (plus the tracemalloc peak while tracemalloc is tracing, unless a stage ran on another
+    thread meanwhile: the peak is process-wide); set st['rows'] (or other keys) to add counts.
+    Stages may nest (an inner stage names its 'parent', open stages are per thread) and are listed
+    in the order they started. record() lists a stage whose time the caller adds up itself (work
+    spread over a pipeline). count() adds to a counter from any thread (API calls, retries, sleeps).
+
+    profile=True stages run under cProfile while self.profiler is set: the main thread's stages
+    under self.profiler, other threads' under a profiler of their own (cProfile only sees the
+    thread that enabled it before Python 3.12; from 3.12 one profiler sees every thread and no
+    second one can start). profile_stats() combines them."""
+
+    def __init__(self):
+        self.stages = []
+        self.local = threading.local()
+        self.counters = defaultdict(int)
+        self.lock = threading.Lock()
+        self.profiler = None  # a cProfile.Profile enabled during stages opened with profile=True
+        self.thread_profilers = []  # the profilers of profile=True stages on other threads
+        self.running = []  # (thread id, record) of the stages open on any thread
+        self.overlapped = set()  # id() of the stages that shared some time with another thread's
+        self.started = time_module.perf_counter()
+
+    @property
+    def open_stages(self):
+        if not hasattr(self.local, 'open_stages'):
+            self.local.open_stages = []
+        return self.local.open_stages
+
+    def record(self, name):
+        """A stage record nested in the current stage, for the caller to fill in."""
+        record = {'name': name}
+        if self.open_stages:
+            record['parent'] = self.open_stages[-1]['name']
+        self.stages.append(record)
+        return record
+
+    @contextmanager
+    def stage(self, name, profile=False):
+        record = self.record(name)
+        self.open_stages.append(record)
+        thread = threading.get_ident()
+        with self.lock:
+            others = [other for t, other in self.running if t != thread]
+            if others:
+                self.overlapped.update(map(id, others + [record]))
+            self.running.append((thread, record))
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        wall, cpu = time_module.perf_counter(), time_module.process_time()
+        profiler = self.start_profiler() if profile else None
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self.open_stages.pop()
+            record['wallSeconds'] = round(time_module.perf_counter() - wall, 3)
+            record['cpuSeconds'] = round(time_module.process_time() - cpu, 3)
+            record['peakRssMb'] = peak_rss_mb()
+            with self.lock:
+                self.running.remove((thread, record))
+                overlapped = id(record) in self.overlapped
+            if tracemalloc.is_tracing() and not overlapped:
+                record['tracedPeakMb'] = round(tracemalloc.get_traced_memory()[1] / (1 << 20), 1)
+
+    def start_profiler(self):
+        """Enable and return this thread's profiler for a profile=True stage (None if not profiling,
+        or if Python 3.12+ refuses a second active profiler: that one already sees this thread)."""
+        if self.profiler is None:
+            return None
+        main = threading.current_thread() is threading.main_thread()
+        profiler = self.profiler if main else cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None
+        if not main:
+            with self.lock:
+                self.thread_profilers.append(profiler)
+        return profiler
+
+    def profile_stats(self):
+        """pstats.Stats of every profiler that ran (None if none did)."""
+        stats = None
+        for profiler in [self.profiler] + self.thread_profilers:
+            profiler.create_stats()
+            if not profiler.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+        return stats
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.counters[key] += n
+
+    def to_json(self, **info):
+        return {
+            'generatedAt': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            **info,
+            'wallSeconds': round(time_module.perf_counter() - self.started, 3),
+            'peakRssMb': peak_rss_mb(),
+            'counters': {k: round(v, 3) for k, v in sorted(self.counters.items())},
+            'stages': self.stages,
+        }
 
+    def write(self, path, **info):
+        with open(path, 'w') as f:
+            json.dump(self.to_json(**info), f, indent=2)
+            f.write('\n')
 
-def avg(values):
-    """Average a list of numbers, ignoring None."""
-    nums = [v for v in values if v is not None]
-    if not nums:
-        return None
-    return sum(nums) / len(nums)
 
+REPORT = BuildReport()
 
-def compute_stats(pitches):
-    """Compute IZ%, SwStr%, CSW%, Chase%, GB% from a list of pitch dicts."""
-    total = len(pitches)
-    if total == 0:
-        return {k: None for k in STAT_KEYS}
 
-    iz = sum(1 for p in pitches if p['Zone'] in IN_ZONE)
-    swstr = sum(1 for p in pitches if p['Description'] == 'Swinging Strike')
-    csw = sum(1 for p in pitches if p['Description'] in ('Called Strike', 'Swinging Strike'))
+def timed_sheets(sheets, record):
+    """Pass (worksheet, rows) through, adding the seconds spent waiting on `sheets` (downloads,
+    cache and file reads) to record['sourceSeconds'] and the worksheets to record['worksheets']."""
+    record.setdefault('sourceSeconds', 0.0)
+    record.setdefault('worksheets', 0)
+    sheets = iter(sheets)
+    while True:
+        t0 = time_module.perf_counter()
+        try:
+            item = next(sheets)
+        except StopIteration:
+            return
+        finally:
+            record['sourceSeconds'] = round(record['sourceSeconds'] + time_module.perf_counter() - t0, 3)
+        record['worksheets'] += 1
+        yield item
 
-    ooz = [p for p in pitches if p['Zone'] in OUT_ZONE]
-    ooz_swung = sum(1 for p in ooz if p['Description'] in ('Swinging Strike', 'In Play', 'Foul'))
 
-    bip = [p for p in pitches if p['BB Type'] is not None]
-    gb = sum(1 for p in bip if p['BB Type'] == 'ground_ball')
+# ======================================================================
+#  COLUMNAR INGEST + GROUPED AGGREGATION
+# ======================================================================
 
-    return {
-        'izPct': iz / total,
-        'swStrPct': swstr / total,
-        'cswPct': csw / total,
-        'chasePct': ooz_swung / len(ooz) if ooz else None,
-        'gbPct': gb / len(bip) if bip else None,
-    }
+INVALID = object()  # parser result for a non-empty cell that does not fit its column type
 
 
-def round_metric(key, value):
-    """Round a metric value according to its type."""
-    if value is None:
-        return None
-    if key == 'Spin Rate':
-        return round(value)
-    if key in ('VAA', 'HAA', 'VRA', 'HRA'):
-        return round(value, 2)
-    return round(value, 1)
+def parse_text(val):
+    """Sheet text cell: empty strings become None."""
+    return None if val == '' else val
 
 
-def median(values):
-    """Compute median, ignoring None values."""
-    nums = sorted(v for v in values if v is not None)
-    if not nums:
-        return None
-    n = len(nums)
-    if n % 2 == 1:
-        return nums[n // 2]
-    return (nums[n // 2 - 1] + nums[n // 2]) / 2
+def parse_float(val):
+    """Sheet numeric cell as a float, NaN when empty."""
+    if val is None or val == '':
+        return np.nan
+    v = safe_float(val)
+    return INVALID if v is None else v
 
 
-def is_barrel(ev, la):
-    """Statcast barrel definition.
-    EV >= 98 mph, then LA must be within a range that expands with velocity."""
-    if ev is None or la is None:
-        return False
-    if ev < 98:
-        return False
-    lower_la = max(8, 26 - (ev - 98))
-    upper_la = min(50, 30 + 1.2 * (ev - 98))
-    return lower_la <= la <= upper_la
-
-
-def compute_hitter_stats(pitches):
-    """Compute hitter stats from a list of pitch dicts (already Zone-converted)."""
-    total = len(pitches)
-    if total == 0:
-        return {k: None for k in HITTER_STAT_KEYS}
-
-    # Swings
-    swings = [p for p in pitches if p['Description'] in SWING_DESCRIPTIONS]
-    n_swings = len(swings)
-    whiffs = sum(1 for p in pitches if p['Description'] in ('Swinging Strike', 'Swinging Strike (Blocked)'))
-
-    # In-zone / Out-of-zone
-    iz_pitches = [p for p in pitches if p['Zone'] in IN_ZONE]
-    ooz_pitches = [p for p in pitches if p['Zone'] in OUT_ZONE]
-    iz_swings = sum(1 for p in iz_pitches if p['Description'] in SWING_DESCRIPTIONS)
-    ooz_swings = sum(1 for p in ooz_pitches if p['Description'] in SWING_DESCRIPTIONS)
-
-    iz_swing_pct = iz_swings / len(iz_pitches) if iz_pitches else None
-    chase_pct = ooz_swings / len(ooz_pitches) if ooz_pitches else None
-
-    # Batted balls (balls in play with BB Type)
-    bip = [p for p in pitches if p['BB Type'] is not None]
-    n_bip = len(bip)
-    gb = sum(1 for p in bip if p['BB Type'] == 'ground_ball')
-    ld = sum(1 for p in bip if p['BB Type'] == 'line_drive')
-    fb = sum(1 for p in bip if p['BB Type'] in ('fly_ball', 'popup'))
-
-    # Exit Velocity & Launch Angle (only LA > 0 for EV stats)
-    ev_la_pos = [(safe_float(p.get('Exit Velocity')), safe_float(p.get('Launch Angle')))
-                 for p in bip
-                 if safe_float(p.get('Launch Angle')) is not None and safe_float(p.get('Launch Angle')) > 0
-                 and safe_float(p.get('Exit Velocity')) is not None]
-    evs_pos = [ev for ev, la in ev_la_pos]
-
-    # Barrels: need EV and LA on all batted balls
-    ev_la_all = [(safe_float(p.get('Exit Velocity')), safe_float(p.get('Launch Angle')))
-                 for p in bip
-                 if safe_float(p.get('Exit Velocity')) is not None
-                 and safe_float(p.get('Launch Angle')) is not None]
-    barrels = sum(1 for ev, la in ev_la_all if is_barrel(ev, la))
-
-    # Median launch angle on ALL batted balls
-    all_la = [safe_float(p.get('Launch Angle')) for p in bip
-              if safe_float(p.get('Launch Angle')) is not None]
-
-    # xBA and xSLG on batted balls
-    xba_vals = [safe_float(p.get('xBA')) for p in bip if safe_float(p.get('xBA')) is not None]
-    xslg_vals = [safe_float(p.get('xSLG')) for p in bip if safe_float(p.get('xSLG')) is not None]
+def parse_int(val):
+    """Sheet integer cell (e.g. Zone), INT_NONE when empty."""
+    if val is None or val == '':
+        return INT_NONE
+    v = safe_int(val)
+    return INVALID if v is None else v
 
-    return {
-        'nSwings': n_swings,
-        'swingPct': n_swings / total if total > 0 else None,
-        'izSwingPct': iz_swing_pct,
-        'chasePct': chase_pct,
-        'izSwChase': round(iz_swing_pct - chase_pct, 4) if iz_swing_pct is not None and chase_pct is not None else None,
-        'whiffPct': whiffs / n_swings if n_swings > 0 else None,
-        'medEV': round(median(evs_pos), 1) if evs_pos else None,
-        'maxEV': round(max(evs_pos), 1) if evs_pos else None,
-        'barrelPct': barrels / n_bip if n_bip > 0 else None,
-        'xBA': round(avg(xba_vals), 3) if xba_vals else None,
-        'xSLG': round(avg(xslg_vals), 3) if xslg_vals else None,
-        'gbPct': gb / n_bip if n_bip > 0 else None,
-        'ldPct': ld / n_bip if n_bip > 0 else None,
-        'fbPct': fb / n_bip if n_bip > 0 else None,
-        'medLA': round(median(all_la), 1) if all_la else None,
-    }
 
+PARSERS = {TEXT: parse_text, FLOAT: parse_float, INT: parse_int, TILT: parse_text}  # tilts: parse_tilts
+MISSING = {TEXT: None, FLOAT: np.nan, INT: INT_NONE, TILT: INT_NONE}
+
+
+def iter_sheet_records(rows, schema, key_col, invalid=None):
+    """Stream the data rows of one sheet (header row first) as tuples holding only the schema's
+    columns, each value already typed. Rows with an empty key_col are skipped; missing columns
+    and short rows parse as missing values. Cells that fail validation also become missing and
+    are tallied per column in the `invalid` dict, if given."""
+    if not rows:
+        return
+    col_idx = {name: i for i, name in enumerate(rows[0]) if name}
+    if key_col not in col_idx:
+        return
+    key_i = col_idx[key_col]
+    picks = [(col_idx.get(name, -1), PARSERS[kind]) for name, kind in schema]
+    for r in range(1, len(rows)):
+        row = rows[r]
+        if key_i >= len(row) or not row[key_i]:
+            continue
+        width = len(row)
+        values = [parse(row[i] if 0 <= i < width else None) for i, parse in picks]
+        if INVALID in values:
+            for j, v in enumerate(values):
+                if v is INVALID:
+                    name, kind = schema[j]
+                    values[j] = MISSING[kind]
+                    if invalid is not None:
+                        invalid[name] = invalid.get(name, 0) + 1
+        yield tuple(values)
+
+
+class ColumnStore:
+    """Struct-of-arrays buffer for typed sheet records: numeric columns are packed into typed
+    arrays (8 bytes per value) and repeated text values share one string object. Tilt cells are
+    kept as (shared) text and converted in bulk by to_arrays (parse_tilts)."""
+
+    def __init__(self, schema):
+        self.schema = list(schema)
+        self.buffers = [[] if kind in (TEXT, TILT) else array('d') if kind == FLOAT else array('q')
+                        for _, kind in self.schema]
+        self.strings = {}
+        self.invalid = {}  # column name -> cells that failed validation at ingest
+        self.size = 0
+
+    def extend(self, records):
+        """Append records (tuples in schema order), e.g. from iter_sheet_records."""
+        columns = [(buf, kind in (TEXT, TILT)) for buf, (_, kind) in zip(self.buffers, self.schema)]
+        strings = self.strings
+        n = 0
+        for record in records:
+            for (buf, is_text), val in zip(columns, record):
+                if is_text and val is not None:
+                    val = strings.setdefault(val, val)
+                buf.append(val)
+            n += 1
+        self.size += n
+        return n
+
+    def add_sheet(self, rows, key_col):
+        """Parse one sheet (header row first) into the store, validating every cell once."""
+        return self.extend(iter_sheet_records(rows, self.schema, key_col, self.invalid))
+
+    def to_arrays(self):
+        """Typed numpy arrays by column name (object arrays for text columns). Unparseable tilt
+        cells become missing and are tallied in self.invalid."""
+        arrays = {}
+        for (name, kind), buf in zip(self.schema, self.buffers):
+            if kind == TILT:
+                arr, invalid = parse_tilts(buf)
+                if invalid:
+                    self.invalid[name] = self.invalid.get(name, 0) + invalid
+            elif kind == TEXT:
+                arr = np.empty(len(buf), dtype=object)
+                arr[:] = buf
+            else:
+                arr = np.frombuffer(buf, dtype=np.float64 if kind == FLOAT else np.int64)
+            arrays[name] = arr
+        return arrays
+
+
+def report_invalid(store, label):
+    """Print the cells that failed validation at ingest (they were treated as missing)."""
+    if store.invalid:
+        detail = ', '.join(f"{name} ({n})" for name, n in sorted(store.invalid.items()))
+        print(f"  {label}: unparseable values treated as missing: {detail}")
+
+
+# --- On-disk pitch store: ingest spills typed columns to binary files, the folds read them by memmap ---
+STORE_FLUSH_ROWS = 1 << 16  # records parsed in memory before they are appended to the column files
+STORE_CHUNK_ROWS = 1 << 18  # rows per table the fold methods are given (sums carry on in row order across them)
+STORE_DTYPES = {TEXT: np.int32, FLOAT: np.float64, INT: np.int64, TILT: np.int64}
+
+
+class PitchStore:
+    """Typed records (one per pitch, from the pitching or the hitting sheets) kept on disk as one
+    fixed-width binary file per column under folder: floats and ints as 8-byte values, Break
+    Tilt as parsed minutes and text (pitcher, hitter, team, pitch type, description, ...) as
+    int32 codes into a per-column dictionary, -1 for an empty cell. Every record also carries its
+    game day ('Day', see game_days). Sheets are parsed through a ColumnStore of at most about
+    STORE_FLUSH_ROWS records, and chunks() maps the files back with numpy.memmap, so neither
+    ingest nor the folds hold more than a chunk of the season in memory. Chunks can be taken
+    while sheets are still being added (each record is handed out once)."""
+
+    def __init__(self, schema, folder):
+        self.schema = list(schema) + [('Day', TEXT)]
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.files = {name: open(self.path(name), 'wb') for name, _ in self.schema}
+        self.words = {name: {} for name, kind in self.schema if kind == TEXT}  # column -> {text: code}
+        self.buffer = ColumnStore(schema)
+        self.titles = []  # (worksheet title, records) of the sheets in the buffer
+        self.invalid = {}
+        self.size = 0
+        self.taken = 0  # records already handed out by chunks()
+
+    def path(self, name):
+        return os.path.join(self.folder, name.replace(' ', '_') + '.bin')
+
+    def add_sheet(self, rows, key_col, title):
+        """Parse one sheet (header row first) into the store. Returns the records added."""
+        n = self.buffer.add_sheet(rows, key_col)
+        self.titles.append((title, n))
+        if self.buffer.size >= STORE_FLUSH_ROWS:
+            self.flush()
+        return n
+
+    def flush(self):
+        """Append the buffered records to the column files."""
+        if not self.buffer.size:
+            return
+        cols = self.buffer.to_arrays()
+        cols['Day'] = game_days(cols['Date'], self.titles)
+        for name, kind in self.schema:
+            values = cols[name]
+            if kind == TEXT:
+                index = self.words[name]
+                values = [-1 if v is None else index.setdefault(v, len(index)) for v in values.tolist()]
+            np.asarray(values, dtype=STORE_DTYPES[kind]).tofile(self.files[name])
+            self.files[name].flush()  # visible to chunks() from here on
+        for name, n in self.buffer.invalid.items():
+            self.invalid[name] = self.invalid.get(name, 0) + n
+        self.size += self.buffer.size
+        self.buffer = ColumnStore(self.schema[:-1])
+        self.titles = []
+
+    def close(self):
+        """Flush the buffer and close the column files (chunks() does this itself)."""
+        self.flush()
+        for f in self.files.values():
+            f.close()
+
+    def chunks(self, rows=STORE_CHUNK_ROWS, final=True):
+        """The records not handed out yet, as typed tables of `rows` rows ({column: array}, text
+        columns as Categorical codes into the store's dictionaries) read through numpy.memmap.
+        final closes the store and also yields the last, shorter chunk; otherwise that is left
+        for a later call, so chunk boundaries only depend on `rows`."""
+        if final:
+            self.close()
+        while self.size - self.taken >= rows or (final and self.size > self.taken):
+            lo, n = self.taken, min(rows, self.size - self.taken)
+            cols = {}
+            for name, kind in self.schema:
+                dtype = np.dtype(STORE_DTYPES[kind])
+                column = np.memmap(self.path(name), dtype=dtype, mode='r', offset=lo * dtype.itemsize, shape=(n,))
+                chunk = np.array(column)
+                cols[name] = Categorical(chunk, list(self.words[name])) if kind == TEXT else chunk
+            self.taken += n
+            yield cols
+
+
+class PitchDetails(Mapping):
+    """The scatter-plot points (pitch type, movement, velo, release) of one detail shard's
+    pitchers, as columns rather than a dict per pitch: pitcher and pitch type as int32 codes into
+    `pitchers` and `pitch_types`, and one float64 array per value, rounded as it is written out
+    (NaN when missing). Reads as {pitcher: [detail, ...]}, each pitcher's list of dicts built when
+    it is looked up."""
+
+    VALUES = (('ivb', 'IndVertBrk', 1), ('hb', 'HorzBrk', 1), ('v', 'Velocity', 1),
+              ('rx', 'RelPosX', 2), ('rz', 'RelPosZ', 2))  # (detail key, column, decimals)
+    RECORD = np.dtype([('pitcher', '<i4'), ('pitchType', '<i4')]
+                      + [(key, '<f8') for key, _, _ in VALUES])  # one pitch in PitchDetailStore's files
+
+    def __init__(self, pitchers, pitch_types, pitcher, pitch_type, values):
+        self.pitchers, self.pitch_types = pitchers, pitch_types
+        self.pitcher_index = {name: i for i, name in enumerate(pitchers)}
+        self.pitcher, self.pitch_type, self.values = pitcher, pitch_type, values
+        self.rows = None  # per-pitcher row numbers, built on first lookup
+
+    @classmethod
+    def merge(cls, previous, records, pitchers, pitch_types):
+        """The points of `previous` ({pitcher: [detail, ...]}, as a shard script holds them)
+        followed by `records` (RECORD rows, codes into pitchers / pitch_types), so each
+        pitcher's points stay in the order they were folded in."""
+        pitcher_index, pitch_type_index = {}, {}
+        codes, types, values = [], [], {key: [] for key, _, _ in cls.VALUES}
+        for name, details in previous.items():
+            code = pitcher_index.setdefault(name, len(pitcher_index))
+            for detail in details:
+                codes.append(code)
+                types.append(pitch_type_index.setdefault(detail['pt'], len(pitch_type_index)))
+                for key, column in values.items():
+                    column.append(detail.get(key, math.nan))
+        new_pitchers = recode(Categorical(records['pitcher'], pitchers), pitcher_index)
+        new_types = recode(Categorical(records['pitchType'], pitch_types), pitch_type_index)
+        return cls(list(pitcher_index), list(pitch_type_index),
+                   np.concatenate([np.array(codes, dtype=np.int32), new_pitchers]),
+                   np.concatenate([np.array(types, dtype=np.int32), new_types]),
+                   {key: np.concatenate([np.array(column, dtype=np.float64), records[key]])
+                    for key, column in values.items()})
+
+    @property
+    def size(self):
+        """Pitches held."""
+        return len(self.pitcher)
+
+    def __len__(self):
+        return len(self.pitchers)
+
+    def __iter__(self):
+        return iter(self.pitchers)
+
+    def __getitem__(self, pitcher):
+        if self.rows is None:
+            order = np.argsort(self.pitcher, kind='stable')
+            self.rows = np.split(order, np.cumsum(np.bincount(self.pitcher, minlength=len(self.pitchers)))[:-1])
+        rows = self.rows[self.pitcher_index[pitcher]]
+        pitch_types = [self.pitch_types[code] for code in self.pitch_type[rows].tolist()]
+        columns = [(key, self.values[key][rows].tolist()) for key, _, _ in self.VALUES]
+        details = []
+        for i, pt in enumerate(pitch_types):
+            detail = {'pt': pt}
+            for key, values in columns:
+                if not math.isnan(values[i]):  # ivb / hb always have a value
+                    detail[key] = values[i]
+            details.append(detail)
+        return details
+
+
+MOVEMENT_BIN = 2.0        # inches per side of a movement histogram cell
+VELO_BIN = 1.0            # mph per velocity histogram bin
+SUMMARY_SAMPLE_SIZE = 40  # raw points kept per pitcher, split across its pitch types
+
+
+def sample_counts(counts, size):
+    """Split `size` sample slots across strata of the given sizes in proportion to them (largest
+    remainder, ties to the earlier stratum), then move slots from the largest quotas so every
+    stratum gets at least one while that is possible."""
+    total = sum(counts)
+    if total <= size:
+        return list(counts)
+    quotas = [c * size // total for c in counts]
+    by_remainder = sorted(range(len(counts)), key=lambda i: (-(counts[i] * size % total), i))
+    for i in by_remainder[:size - sum(quotas)]:
+        quotas[i] += 1
+    for i in range(len(quotas)):
+        donor = max(range(len(quotas)), key=lambda j: (quotas[j], -j))
+        if quotas[i] == 0 and quotas[donor] > 1:
+            quotas[donor] -= 1
+            quotas[i] = 1
+    return quotas
+
+
+def binned_counts(codes, *bins):
+    """Rows of (code, bin, ..., count) for every distinct combination of a group code and integer
+    bin numbers (floats holding whole numbers), sorted. The columns are packed into one int64 key
+    so a single 1-D np.unique does the counting (row-wise np.unique if they don't fit)."""
+    columns = [codes] + [b.astype(np.int64) for b in bins]
+    if not len(codes):
+        return []
+    lows = [int(c.min()) for c in columns]
+    spans = [int(c.max()) - lo + 1 for c, lo in zip(columns, lows)]
+    if math.prod(spans) >= 2 ** 62:  # outlandish bins (bad movement data)
+        uniq, counts = np.unique(np.stack(columns, axis=1), axis=0, return_counts=True)
+        return [tuple(row) + (count,) for row, count in zip(uniq.tolist(), counts.tolist())]
+    key = np.zeros(len(codes), dtype=np.int64)
+    for c, lo, span in zip(columns, lows, spans):
+        key = key * span + (c - lo)
+    uniq, counts = np.unique(key, return_counts=True)
+    parts = []
+    for lo, span in reversed(list(zip(lows, spans))):
+        parts.append((uniq % span + lo).tolist())
+        uniq = uniq // span
+    return list(zip(*reversed(parts), counts.tolist()))
+
+
+def build_pitch_summaries(pitch_details):
+    """Per-pitcher, per-pitch-type summaries of the scatter-plot points, so the page can draw the
+    movement plot without every pitch:
+      n:      pitches with movement
+      mean:   [hb, ivb] means; cov: [hb var, hb/ivb cov, ivb var] (population), for the ellipse
+      move:   [[hb bin, ivb bin, pitches], ...], cells of MOVEMENT_BIN inches (bin i covers
+              [i * MOVEMENT_BIN, (i + 1) * MOVEMENT_BIN))
+      velo:   [first bin, [pitches per VELO_BIN mph bin, ...]], when any pitch has a velocity
+      sample: [[hb, ivb], ...], evenly spaced pitches of the type; a pitcher's SUMMARY_SAMPLE_SIZE
+              points are split across its pitch types by usage (sample_counts)
+    Returns {pitcher: {pitch type: summary}} for a PitchDetails."""
+    if not pitch_details.size:
+        return {}
+    names = sorted(pitch_details)
+    rank = np.empty(len(names), dtype=np.int64)  # pitcher code -> position in names
+    rank[[pitch_details.pitcher_index[name] for name in names]] = np.arange(len(names))
+    n_types = len(pitch_details.pitch_types)
+    uniq, codes = np.unique(rank[pitch_details.pitcher] * n_types + pitch_details.pitch_type, return_inverse=True)
+    keys = [(i, pitch_details.pitch_types[pt]) for i, pt in zip((uniq // n_types).tolist(), (uniq % n_types).tolist())]
+    hb, ivb, velo = pitch_details.values['hb'], pitch_details.values['ivb'], pitch_details.values['v']
+    n_groups = len(keys)
+    n = np.bincount(codes, minlength=n_groups)
+    mean_hb = np.bincount(codes, hb, n_groups) / n
+    mean_ivb = np.bincount(codes, ivb, n_groups) / n
+    dx, dy = hb - mean_hb[codes], ivb - mean_ivb[codes]
+    cov = [(np.bincount(codes, w, n_groups) / n).tolist() for w in (dx * dx, dx * dy, dy * dy)]
+    n, mean_hb, mean_ivb = n.tolist(), mean_hb.tolist(), mean_ivb.tolist()
+
+    move = defaultdict(list)
+    for code, bx, by, count in binned_counts(codes, np.floor(hb / MOVEMENT_BIN), np.floor(ivb / MOVEMENT_BIN)):
+        move[code].append([bx, by, count])
+    velo_bins = defaultdict(dict)
+    has_velo = ~np.isnan(velo)
+    for code, vb, count in binned_counts(codes[has_velo], np.floor(velo[has_velo] / VELO_BIN)):
+        velo_bins[code][vb] = count
+
+    order = np.argsort(codes, kind='stable')  # each group's pitches, in pitch order
+    starts = np.concatenate([[0], np.cumsum(n)]).tolist()
+    by_pitcher = defaultdict(list)
+    for code, (i, pt) in enumerate(keys):
+        by_pitcher[i].append((pt, code))
+
+    summaries = {}
+    for i, groups in by_pitcher.items():
+        groups.sort()
+        quotas = sample_counts([n[code] for _, code in groups], SUMMARY_SAMPLE_SIZE)
+        summary = {}
+        for (pt, code), quota in zip(groups, quotas):
+            size = n[code]
+            picked = order[[starts[code] + k * size // quota for k in range(quota)]]
+            entry = {
+                'n': size,
+                'mean': [round_float(mean_hb[code], 2), round_float(mean_ivb[code], 2)],
+                'cov': [round_float(c[code], 3) for c in cov],
+                'move': move[code],
+            }
+            if velo_bins[code]:
+                lo, hi = min(velo_bins[code]), max(velo_bins[code])
+                entry['velo'] = [lo, [velo_bins[code].get(b, 0) for b in range(lo, hi + 1)]]
+            entry['sample'] = [list(point) for point in zip(hb[picked].tolist(), ivb[picked].tolist())]
+            summary[pt] = entry
+        summaries[names[i]] = summary
+    return summaries
+
+
+class PitchDetailStore:
+    """Every pitcher's scatter-plot points, kept out of memory and out of the aggregate state.
+    The points folded in by earlier runs are the detail shards they wrote (under details_dir;
+    `shards` maps a shard to [pitchers hash, summaries hash, pitches, pitchers]), and the pitches
+    folded in by this run are appended, by shard, to files of PitchDetails.RECORD rows in a
+    temporary directory. build_shards merges the two one shard at a time, so only a shard's worth
+    of points is ever in memory (about 48 bytes and a detail dict per pitch), and stages the
+    rebuilt shard scripts for write_outputs."""
+
+    KINDS = ('pitchers', 'summaries')  # detail shard kinds kept here, in the order of a `shards` entry
+
+    def __init__(self, details_dir=None, shards=None):
+        self.details_dir = details_dir
+        self.shards = dict(shards or {})
+        self.pitcher_index, self.pitch_type_index = {}, {}  # names of the new pitches -> code
+        self.pitcher_shard = []  # pitcher code -> shard
+        self.new = {}     # shard -> pitches folded in since the last build_shards
+        self.staged = set()  # shards rebuilt by build_shards, their scripts under self.folder
+        self.tmp = None   # TemporaryDirectory, made when first needed
+
+    @property
+    def folder(self):
+        if self.tmp is None:
+            self.tmp = tempfile.TemporaryDirectory(prefix='pitch-details-')
+        return self.tmp.name
+
+    @property
+    def size(self):
+        """Pitches held."""
+        return sum(entry[2] for entry in self.shards.values()) + sum(self.new.values())
+
+    @property
+    def pitcher_count(self):
+        """Pitchers with points, as of the last build_shards."""
+        return sum(entry[3] for entry in self.shards.values())
+
+    def extend(self, cols):
+        """Append the pitches of a typed pitch table that have a pitch type and movement to their
+        shards' files."""
+        pitch_type = as_categorical(cols['Pitch Type'])
+        has_detail = (pitch_type.codes >= 0) & ~np.isnan(cols['IndVertBrk']) & ~np.isnan(cols['HorzBrk'])
+        if not has_detail.any():
+            return
+        records = np.empty(int(has_detail.sum()), dtype=PitchDetails.RECORD)
+        records['pitcher'] = recode(as_categorical(cols['Pitcher'])[has_detail], self.pitcher_index)
+        records['pitchType'] = recode(pitch_type[has_detail], self.pitch_type_index)
+        for key, col, ndigits in PitchDetails.VALUES:
+            records[key] = [(round(v, ndigits) if key == 'v' else round_float(v, ndigits))
+                            for v in cols[col][has_detail].tolist()]
+        self.pitcher_shard.extend(detail_shard(name) for name in list(self.pitcher_index)[len(self.pitcher_shard):])
+        shards = np.array(self.pitcher_shard)[records['pitcher']]
+        order = np.argsort(shards, kind='stable')
+        names, starts = np.unique(shards[order], return_index=True)
+        os.makedirs(os.path.join(self.folder, 'new'), exist_ok=True)
+        for shard, part in zip(names.tolist(), np.split(records[order], starts[1:])):
+            with open(os.path.join(self.folder, 'new', shard + '.bin'), 'ab') as f:
+                part.tofile(f)
+            self.new[shard] = self.new.get(shard, 0) + len(part)
+
+    def script_path(self, kind, shard):
+        """Where the current script of a shard of `kind` is: staged by build_shards or, if the shard
+        has not been rebuilt, where an earlier run wrote it."""
+        file_name = f'{shard}.{self.shards[shard][self.KINDS.index(kind)]}.js'
+        if shard in self.staged:
+            return os.path.join(self.folder, kind, file_name)
+        return os.path.join(self.details_dir, kind, file_name)
+
+    def on_disk(self):
+        """Whether the scripts of every shard are still there (a run that rewrote the shards but
+        did not get to save its state leaves some of them missing)."""
+        return all(os.path.exists(self.script_path(kind, shard)) for shard in self.shards for kind in self.KINDS)
+
+    def build_shards(self):
+        """Rebuild the shards the pitches folded in since the last call fall in, one at a time:
+        the shard's earlier points (read back from its script) and the new ones become a
+        PitchDetails, staged as the shard's 'pitchers' script and, through build_pitch_summaries,
+        its 'summaries' one. Returns the number of shards rebuilt."""
+        for shard in sorted(self.new):
+            previous = read_detail_shard(self.script_path('pitchers', shard)) if shard in self.shards else {}
+            path = os.path.join(self.folder, 'new', shard + '.bin')
+            details = PitchDetails.merge(previous, np.fromfile(path, dtype=PitchDetails.RECORD),
+                                         list(self.pitcher_index), list(self.pitch_type_index))
+            os.remove(path)
+            entry = []
+            for kind, value in zip(self.KINDS, (details, build_pitch_summaries(details))):
+                data = detail_shard_script(kind, shard, value)
+                entry.append(content_hash(data))
+                os.makedirs(os.path.join(self.folder, kind), exist_ok=True)
+                with open(os.path.join(self.folder, kind, f'{shard}.{entry[-1]}.js'), 'wb') as f:
+                    f.write(data)
+            self.shards[shard] = entry + [details.size, len(details)]
+            self.staged.add(shard)
+        rebuilt, self.new = len(self.new), {}
+        return rebuilt
+
+    def digests(self, kind):
+        """{shard: content hash} of the scripts of `kind`, by shard."""
+        return {shard: self.shards[shard][self.KINDS.index(kind)] for shard in sorted(self.shards)}
+
+
+def group_codes(*keys):
+    """Assign every row an integer group code, numbered in order of first appearance
+    (the same order a defaultdict(list) would iterate). The key columns are text (Categorical,
+    or object arrays to encode); their codes are packed into one int64 per row, so a single
+    np.unique does the grouping. Returns (codes, group_keys)."""
+    keys = [as_categorical(k) for k in keys]
+    spans = [len(k.categories) + 1 for k in keys]
+    if math.prod(spans) >= 2 ** 62:  # too many distinct values to pack: group the key tuples
+        index = {}
+        codes = [index.setdefault(key, len(index)) for key in zip(*(k.tolist() for k in keys))]
+        return np.array(codes, dtype=np.int64), list(index)
+    packed = np.zeros(len(keys[0]), dtype=np.int64)
+    for k, span in zip(keys, spans):
+        packed = packed * span + (k.codes + 1)
+    _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+    order = np.argsort(first)  # groups by first appearance
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    rows = first[order]
+    return rank[inverse.reshape(-1)], list(zip(*(k[rows].tolist() for k in keys)))
+
+
+def exact_group_sums(codes, values, n_groups):
+    """Per-group sums of the non-NaN values as (hi, lo) arrays: hi is the correctly rounded sum
+    (math.fsum) and lo the correctly rounded remainder, so hi + lo carries the exact sum to ~106
+    bits and the result does not depend on the order the values arrive in."""
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    vals = values[np.argsort(codes, kind='stable')].tolist()
+    hi, lo = np.zeros(n_groups), np.zeros(n_groups)
+    start = 0
+    for g, n in enumerate(np.bincount(codes, minlength=n_groups).tolist()):
+        if n:
+            seg = vals[start:start + n]
+            start += n
+            hi[g] = total = math.fsum(seg)
+            if math.isfinite(total):
+                seg.append(-total)
+                lo[g] = math.fsum(seg)
+    return hi, lo
+
+
+# --- Categorical columns: text as int32 codes, predicates as per-category lookup tables ---
+DESCRIPTION_FLAGS = {  # per-pitch flag -> the Description values it holds for
+    'is_swing': SWING_DESCRIPTIONS,                                # hitter swings
+    'is_whiff': {'Swinging Strike', 'Swinging Strike (Blocked)'},  # hitter whiffs
+    'is_swstr': {'Swinging Strike'},                               # pitcher SwStr%
+    'is_csw': {'Called Strike', 'Swinging Strike'},
+    'is_chase_swing': {'Swinging Strike', 'In Play', 'Foul'},      # pitcher Chase% (out of the zone)
+}
+ZONE_FLAGS = {'is_in_zone': IN_ZONE, 'is_chase_zone': OUT_ZONE}
+BB_NONE, BB_GB, BB_LD, BB_FB, BB_OTHER = range(5)  # bb_class: not in play, ground ball, line drive, fly ball, other
+BB_CLASS = {'ground_ball': BB_GB, 'line_drive': BB_LD, 'fly_ball': BB_FB, 'popup': BB_FB}
+
+
+class Categorical:
+    """A dictionary-encoded text column: int32 codes into `categories`, -1 for an empty cell.
+    A predicate on the text is evaluated once per category and gathered by code (lookup)."""
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def encode(cls, values):
+        """Encode an object array (None for empty cells), categories in order of first appearance."""
+        index = {}
+        codes = [-1 if v is None else index.setdefault(v, len(index)) for v in values.tolist()]
+        return cls(np.array(codes, dtype=np.int32), list(index))
+
+    def __len__(self):
+        return len(self.codes)
 
-def read_sheet_with_retry(ws, max_retries=3):
-    """Read a worksheet with retry logic for rate limiting (429 errors)."""
+    def __getitem__(self, rows):
+        return Categorical(self.codes[rows], self.categories)
+
+    def lookup(self, table):
+        """Per-row entries of table: one entry per category, then the one for an empty cell."""
+        return np.asarray(table)[self.codes]
+
+    def isin(self, values):
+        """Elementwise membership of the text in values (an empty cell never matches)."""
+        return self.lookup([c in values for c in self.categories] + [False])
+
+    def present(self):
+        """The categories that occur, in code order."""
+        return [self.categories[c] for c in np.unique(self.codes).tolist() if c >= 0]
+
+    def tolist(self):
+        return self.lookup(np.array(self.categories + [None], dtype=object)).tolist()
+
+
+def as_categorical(column):
+    """column as a Categorical (object arrays, e.g. from ColumnStore.to_arrays, are encoded)."""
+    return column if isinstance(column, Categorical) else Categorical.encode(column)
+
+
+def recode(column, index):
+    """A Categorical's codes (no empty cells) as codes into index, a {text: code} dict that new
+    text is added to in order of first appearance."""
+    present, first = np.unique(column.codes, return_index=True)
+    mapping = np.zeros(len(column.categories), dtype=np.int32)
+    for code in present[np.argsort(first)].tolist():
+        mapping[code] = index.setdefault(column.categories[code], len(index))
+    return mapping[column.codes]
+
+
+def zone_table(zones):
+    """Lookup table by zone number, True for `zones`; its last entry (False) also stands in for
+    missing and out-of-range zones."""
+    table = np.zeros(max(zones) + 2, dtype=bool)
+    table[sorted(zones)] = True
+    return table
+
+
+ZONE_TABLES = {name: zone_table(zones) for name, zones in ZONE_FLAGS.items()}
+
+
+def zone_flag(zone, name):
+    """ZONE_FLAGS[name] for every pitch of an int Zone column (INT_NONE when missing)."""
+    table = ZONE_TABLES[name]
+    return table[np.clip(zone, -1, len(table) - 1)]
+
+
+def description_flags(desc, names):
+    """The DESCRIPTION_FLAGS in names for every pitch of a Description column."""
+    desc = as_categorical(desc)
+    return [desc.isin(DESCRIPTION_FLAGS[name]) for name in names]
+
+
+def bb_classes(bb):
+    """The bb_class (BB_NONE, BB_GB, ...) of every pitch of a BB Type column."""
+    bb = as_categorical(bb)
+    return bb.lookup(np.array([BB_CLASS.get(c, BB_OTHER) for c in bb.categories] + [BB_NONE], dtype=np.int8))
+
+
+# --- Fused aggregation: one scan per table, mergeable per-group accumulators ---
+PITCH_COUNTERS = ['n', 'iz', 'swStr', 'csw', 'ooz', 'oozSwung', 'bip', 'gb']
+SKETCH_EXACT_LIMIT = 512   # values a group keeps for exact medians before switching to a histogram
+SKETCH_BINS_PER_UNIT = 10  # histogram resolution: 0.1 mph / 0.1 degrees
+HITTER_COUNTERS = ['n', 'swings', 'whiffs', 'iz', 'izSwings', 'ooz', 'oozSwings',
+                   'bip', 'gb', 'ld', 'fb', 'barrels']
+
+
+class Scan:
+    """Everything the stat accumulators need from a typed table, evaluated in one pass:
+    a (counters x rows) bool matrix of per-pitch flags, plus masked value columns
+    (NaN where a pitch does not contribute) for sums, maxima and quantile sketches."""
+
+    def __init__(self, counters, flags, values=None):
+        self.counters = counters
+        self.flags = flags
+        self.values = values or {}
+
+    def take(self, rows):
+        """The scan of the selected rows only (rows: bool mask or indices)."""
+        return Scan(self.counters, self.flags[:, rows], {name: v[rows] for name, v in self.values.items()})
+
+
+def scan_pitches(cols):
+    """Scan a typed pitch table for the pitch stat counters, metric values and Break Tilt components.
+    Every counter is a lookup by Zone number or text code (see DESCRIPTION_FLAGS, ZONE_FLAGS, BB_CLASS)."""
+    zone = cols['Zone']
+    swstr, csw, chase_swing = description_flags(cols['Description'], ('is_swstr', 'is_csw', 'is_chase_swing'))
+    ooz = zone_flag(zone, 'is_chase_zone')
+    bb_class = bb_classes(cols['BB Type'])
+    flags = np.vstack([
+        np.ones(len(zone), dtype=bool),
+        zone_flag(zone, 'is_in_zone'),
+        swstr,
+        csw,
+        ooz,
+        ooz & chase_swing,
+        bb_class != BB_NONE,
+        bb_class == BB_GB,
+    ])
+    values = {col: cols[col] for col in METRIC_COLS}
+    values['tiltSin'], values['tiltCos'] = tilt_components(cols['Break Tilt'])
+    return Scan(PITCH_COUNTERS, flags, values)
+
+
+def scan_hitter_pitches(cols):
+    """Scan a typed hitter table for the hitter stat counters and batted-ball values."""
+    zone, ev, la = cols['Zone'], cols['Exit Velocity'], cols['Launch Angle']
+    swing, whiff = description_flags(cols['Description'], ('is_swing', 'is_whiff'))
+    iz, ooz = zone_flag(zone, 'is_in_zone'), zone_flag(zone, 'is_chase_zone')
+    bb_class = bb_classes(cols['BB Type'])
+    bip = bb_class != BB_NONE
+    has_ev, has_la = ~np.isnan(ev), ~np.isnan(la)
+    with np.errstate(invalid='ignore'):
+        ev_pos = bip & has_la & (la > 0) & has_ev  # EV stats only count balls hit at LA > 0
+        # Statcast barrels: EV >= 98 mph and an LA range that widens with EV
+        barrel = (bip & has_ev & has_la & (ev >= 98)
+                  & (np.maximum(8, 26 - (ev - 98)) <= la) & (la <= np.minimum(50, 30 + 1.2 * (ev - 98))))
+    flags = np.vstack([
+        np.ones(len(zone), dtype=bool),
+        swing,
+        whiff,
+        iz, iz & swing, ooz, ooz & swing,
+        bip,
+        bb_class == BB_GB,
+        bb_class == BB_LD,
+        bb_class == BB_FB,
+        barrel,
+    ])
+    values = {
+        'EV': np.where(ev_pos, ev, np.nan),
+        'LA': np.where(bip & has_la, la, np.nan),
+        'xBA': np.where(bip, cols['xBA'], np.nan),
+        'xSLG': np.where(bip, cols['xSLG'], np.nan),
+    }
+    return Scan(HITTER_COUNTERS, flags, values)
+
+
+class GroupSketch:
+    """Per-group quantile sketch for the EV / LA medians.
+
+    A group keeps its raw values (exact quantiles) until it holds more than SKETCH_EXACT_LIMIT,
+    then switches to a histogram of 1 / SKETCH_BINS_PER_UNIT wide bins, each value recorded as
+    its nearest bin centre. Error bound: a quantile of a histogram group is within half a bin
+    (0.05 mph / 0.05 degrees) of the exact one, and values already recorded at bin resolution
+    (EV and LA come with at most one decimal) are exact. Memory per group is bounded by
+    max(SKETCH_EXACT_LIMIT, number of occupied bins); sketches merge exactly (values are pooled,
+    bin counts added), so merging never loosens the bound."""
+
+    def __init__(self):
+        self.n_groups = 0
+        self.codes = np.zeros(0, dtype=np.int64)   # raw values of groups still exact
+        self.values = np.zeros(0)
+        self.hist_codes = np.zeros(0, dtype=np.int64)   # (group, bin, count) for histogram groups
+        self.hist_bins = np.zeros(0, dtype=np.int64)
+        self.hist_counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, codes, values, n_groups):
+        """Add values (no NaNs); codes[i] is the group of values[i]."""
+        self.n_groups = max(self.n_groups, n_groups)
+        self.codes = np.concatenate([self.codes, codes])
+        self.values = np.concatenate([self.values, values])
+        self.compact()
+        return self
+
+    def merge(self, other, mapping, n_groups):
+        """Fold another sketch in, its group g landing in group mapping[g]."""
+        self.n_groups = max(self.n_groups, n_groups)
+        self.codes = np.concatenate([self.codes, mapping[other.codes]])
+        self.values = np.concatenate([self.values, other.values])
+        self.hist_codes = np.concatenate([self.hist_codes, mapping[other.hist_codes]])
+        self.hist_bins = np.concatenate([self.hist_bins, other.hist_bins])
+        self.hist_counts = np.concatenate([self.hist_counts, other.hist_counts])
+        self.compact(merged=True)
+        return self
+
+    def counts(self):
+        """Values per group."""
+        return (np.bincount(self.codes, minlength=self.n_groups)
+                + np.bincount(self.hist_codes, weights=self.hist_counts, minlength=self.n_groups).astype(np.int64))
+
+    def compact(self, merged=False):
+        """Move the raw values of groups over the limit (or already binned) into the histogram;
+        after a merge also combine duplicate (group, bin) entries."""
+        binned = self.counts() > SKETCH_EXACT_LIMIT
+        binned[self.hist_codes] = True
+        to_bin = binned[self.codes]
+        if not to_bin.any() and not merged:
+            return
+        codes = np.concatenate([self.hist_codes, self.codes[to_bin]])
+        bins = np.concatenate([self.hist_bins, np.rint(self.values[to_bin] * SKETCH_BINS_PER_UNIT).astype(np.int64)])
+        counts = np.concatenate([self.hist_counts, np.ones(int(to_bin.sum()), dtype=np.int64)])
+        self.codes, self.values = self.codes[~to_bin], self.values[~to_bin]
+        # One (group, bin) entry each, counts added
+        order = np.lexsort((bins, codes))
+        codes, bins, counts = codes[order], bins[order], counts[order]
+        first = np.ones(len(codes), dtype=bool)
+        first[1:] = (codes[1:] != codes[:-1]) | (bins[1:] != bins[:-1])
+        starts = np.flatnonzero(first)
+        self.hist_codes, self.hist_bins = codes[starts], bins[starts]
+        self.hist_counts = np.add.reduceat(counts, starts) if len(starts) else counts
+
+    def medians(self):
+        """Per-group median (the middle value, or the mean of the middle two) as Python floats, None for
+        empty groups."""
+        codes = np.concatenate([self.codes, self.hist_codes])
+        values = np.concatenate([self.values, self.hist_bins / SKETCH_BINS_PER_UNIT])
+        weights = np.concatenate([np.ones(len(self.codes), dtype=np.int64), self.hist_counts])
+        order = np.lexsort((values, codes))
+        values, cum = values[order], np.cumsum(weights[order])
+        n = self.counts()
+        before = np.cumsum(n) - n  # values in lower-numbered groups
+        # 0-based ranks of the lower / upper middle value, located through the cumulative weights
+        lower = np.searchsorted(cum, before + (n - 1) // 2 + 1)
+        upper = np.searchsorted(cum, before + n // 2 + 1)
+        vals = values.tolist()
+        out = []
+        for count, lo, hi in zip(n.tolist(), lower.tolist(), upper.tolist()):
+            if count == 0:
+                out.append(None)
+            elif count % 2 == 1:
+                out.append(vals[lo])
+            else:
+                out.append((vals[lo] + vals[hi]) / 2)
+        return out
+
+    def subset(self, lo, hi):
+        """A sketch of groups lo..hi-1 only, renumbered from 0."""
+        part = GroupSketch()
+        part.n_groups = hi - lo
+        keep = (self.codes >= lo) & (self.codes < hi)
+        part.codes, part.values = self.codes[keep] - lo, self.values[keep]
+        keep = (self.hist_codes >= lo) & (self.hist_codes < hi)
+        part.hist_codes, part.hist_bins, part.hist_counts = self.hist_codes[keep] - lo, self.hist_bins[keep], self.hist_counts[keep]
+        return part
+
+    def take(self, groups):
+        """A sketch of the given groups only, group groups[i] renumbered to i."""
+        part = GroupSketch()
+        part.n_groups = len(groups)
+        renumber = np.full(self.n_groups, -1, dtype=np.int64)
+        renumber[groups] = np.arange(len(groups))
+        codes = renumber[self.codes]
+        keep = codes >= 0
+        part.codes, part.values = codes[keep], self.values[keep]
+        codes = renumber[self.hist_codes]
+        keep = codes >= 0
+        part.hist_codes, part.hist_bins, part.hist_counts = codes[keep], self.hist_bins[keep], self.hist_counts[keep]
+        return part
+
+    def to_arrays(self, prefix):
+        """The sketch as named arrays (for np.savez)."""
+        return {prefix + 'codes': self.codes, prefix + 'values': self.values, prefix + 'hist_codes': self.hist_codes,
+                prefix + 'hist_bins': self.hist_bins, prefix + 'hist_counts': self.hist_counts}
+
+    def load_arrays(self, prefix, arrays, n_groups):
+        """Restore what to_arrays() saved."""
+        self.codes, self.values = arrays[prefix + 'codes'], arrays[prefix + 'values']
+        self.hist_codes, self.hist_bins = arrays[prefix + 'hist_codes'], arrays[prefix + 'hist_bins']
+        self.hist_counts = arrays[prefix + 'hist_counts']
+        self.n_groups = n_groups
+        return self
+
+
+class GroupAccumulator:
+    """Per-group aggregate state, filled from Scans and mergeable.
+
+    counts:  integer tallies of the scan's flags
+    sums:    float sums and value counts
+    maxima:  running maxima
+    quantiles: a GroupSketch per value, for medians
+    Counts, maxima and sketches add and merge exactly. Sums are sequential by default: each value
+    is added to its group's running sum in the order the rows are folded in, as sum() over them
+    would, however the rows are batched (a full rebuild reproduces the original per-group loops
+    bit for bit; --check-state refolds in the state's fold order). With exact=True they are
+    (hi, lo) pairs instead (see exact_group_sums), which merge exactly, so the result does not
+    depend on the order or grouping of the rows at all (the per-day groups windows merge from).
+    Group codes are dense ints; the accumulator grows as new groups appear. Fed through
+    add_rows(), it also keeps every group's key, so codes stay stable across calls and runs."""
+
+    def __init__(self, counters, sums=(), maxima=(), quantiles=(), exact=False):
+        self.counters = list(counters)
+        self.sum_names = list(sums)
+        self.max_names = list(maxima)
+        self.quantile_names = list(quantiles)
+        self.exact = exact
+        self.n_groups = 0
+        self.counts = np.zeros((len(self.counters), 0), dtype=np.int64)
+        self.sums = np.zeros((len(self.sum_names), 0))
+        self.sums_lo = np.zeros((len(self.sum_names), 0))  # remainders of exact sums (zero otherwise)
+        self.sum_counts = np.zeros((len(self.sum_names), 0), dtype=np.int64)
+        self.maxima = np.zeros((len(self.max_names), 0))
+        self.quantiles = {name: GroupSketch() for name in self.quantile_names}
+        self.keys = []   # group key per code (add_rows only)
+        self.index = {}
+
+    def grow(self, n_groups):
+        """Make room for group codes up to n_groups - 1."""
+        extra = n_groups - self.n_groups
+        if extra <= 0:
+            return
+        self.counts = np.pad(self.counts, ((0, 0), (0, extra)))
+        self.sums = np.pad(self.sums, ((0, 0), (0, extra)))
+        self.sums_lo = np.pad(self.sums_lo, ((0, 0), (0, extra)))
+        self.sum_counts = np.pad(self.sum_counts, ((0, 0), (0, extra)))
+        self.maxima = np.pad(self.maxima, ((0, 0), (0, extra)), constant_values=-np.inf)
+        self.n_groups = n_groups
+
+    def add(self, scan, codes, n_groups):
+        """Fold a scanned table in; codes[i] is the group of row i."""
+        self.grow(n_groups)
+        k = len(self.counters)
+        flags = scan.flags if scan.counters == self.counters else np.vstack(
+            [scan.flags[scan.counters.index(c)] for c in self.counters])
+        # All counters in a single bincount over (group, counter) cells
+        cells = (codes * k)[None, :] + np.arange(k)[:, None]
+        tally = np.bincount(cells[flags], minlength=self.n_groups * k)
+        self.counts += tally.reshape(self.n_groups, k).T
+        for j, name in enumerate(self.sum_names):
+            vals = scan.values[name]
+            self.fold_sums(j, codes, vals)
+            self.sum_counts[j] += np.bincount(codes[~np.isnan(vals)], minlength=self.n_groups)
+        for j, name in enumerate(self.max_names):
+            vals = scan.values[name]
+            valid = ~np.isnan(vals)
+            np.maximum.at(self.maxima[j], codes[valid], vals[valid])
+        for name in self.quantile_names:
+            vals = scan.values[name]
+            valid = ~np.isnan(vals)
+            self.quantiles[name].add(codes[valid], vals[valid], self.n_groups)
+        return self
+
+    def add_rows(self, scan, *key_cols):
+        """Fold a scanned table in, grouping rows by the key columns. Keys seen before keep
+        their code and new keys are numbered on in order of first appearance."""
+        codes, keys = group_codes(*key_cols)
+        mapping = np.array([self.index.setdefault(key, len(self.index)) for key in keys], dtype=np.int64)
+        self.keys = list(self.index)
+        return self.add(scan, mapping[codes], len(self.keys))
+
+    def merge(self, other, mapping=None):
+        """Fold another accumulator in. mapping[g] is the group in self that other's group g
+        belongs to (identity if None), so finer groups can be rolled up into coarser ones.
+        Counts, maxima, quantile sketches and exact sums merge exactly; sequential sums add
+        other's group totals in group order."""
+        if mapping is None:
+            mapping = np.arange(other.n_groups)
+        mapping = np.asarray(mapping, dtype=np.int64)
+        self.grow(int(mapping.max()) + 1 if len(mapping) else 0)
+        np.add.at(self.counts, (slice(None), mapping), other.counts)
+        for j in range(len(self.sum_names)):
+            if self.exact:
+                self.fold_sums(j, np.concatenate([mapping, mapping]),
+                               np.concatenate([other.sums[j], other.sums_lo[j]]))
+            else:
+                self.fold_sums(j, mapping, other.sums[j] + other.sums_lo[j])
+        np.add.at(self.sum_counts, (slice(None), mapping), other.sum_counts)
+        np.maximum.at(self.maxima, (slice(None), mapping), other.maxima)
+        for name in self.quantile_names:
+            self.quantiles[name].merge(other.quantiles[name], mapping, self.n_groups)
+        return self
+
+    def fold_sums(self, j, codes, values):
+        """Add values (NaN = skip) into sum j: one at a time, in order (np.add.at is unbuffered),
+        or for exact sums by re-summing the (hi, lo) pair of each group they fall in with them
+        (the other groups are left alone, so a small batch costs little)."""
+        valid = ~np.isnan(values)
+        if not self.exact:
+            np.add.at(self.sums[j], codes[valid], values[valid])
+            return
+        groups, local = np.unique(codes[valid], return_inverse=True)
+        if not len(groups):
+            return
+        own = np.arange(len(groups))
+        self.sums[j][groups], self.sums_lo[j][groups] = exact_group_sums(
+            np.concatenate([own, own, local]),
+            np.concatenate([self.sums[j][groups], self.sums_lo[j][groups], values[valid]]), len(groups))
+
+    def to_arrays(self, prefix):
+        """The accumulator as named arrays (for np.savez); keys are stored separately."""
+        arrays = {prefix + 'counts': self.counts, prefix + 'sums': self.sums, prefix + 'sums_lo': self.sums_lo,
+                  prefix + 'sum_counts': self.sum_counts, prefix + 'maxima': self.maxima}
+        for name in self.quantile_names:
+            arrays.update(self.quantiles[name].to_arrays(f'{prefix}{name}.'))
+        return arrays
+
+    def load_arrays(self, prefix, arrays, keys):
+        """Restore what to_arrays() saved into this (empty) accumulator."""
+        self.counts, self.sums, self.sums_lo = arrays[prefix + 'counts'], arrays[prefix + 'sums'], arrays[prefix + 'sums_lo']
+        self.sum_counts, self.maxima = arrays[prefix + 'sum_counts'], arrays[prefix + 'maxima']
+        shapes = [(len(self.counters), len(keys)), (len(self.sum_names), len(keys)), (len(self.max_names), len(keys))]
+        if ([self.counts.shape, self.sums.shape, self.maxima.shape] != shapes
+                or not self.sum_counts.shape == self.sums_lo.shape == self.sums.shape):
+            raise ValueError(f"aggregate state for {prefix!r} does not match its layout")
+        for name in self.quantile_names:
+            self.quantiles[name].load_arrays(f'{prefix}{name}.', arrays, len(keys))
+        self.keys = [tuple(key) for key in keys]
+        self.index = {key: g for g, key in enumerate(self.keys)}
+        self.n_groups = len(self.keys)
+        return self
+
+    def subset(self, lo, hi):
+        """An accumulator holding only groups lo..hi-1, renumbered from 0 (for splitting work)."""
+        part = GroupAccumulator(self.counters, self.sum_names, self.max_names, self.quantile_names, self.exact)
+        part.counts, part.sums, part.sums_lo = self.counts[:, lo:hi], self.sums[:, lo:hi], self.sums_lo[:, lo:hi]
+        part.sum_counts, part.maxima = self.sum_counts[:, lo:hi], self.maxima[:, lo:hi]
+        part.quantiles = {name: sketch.subset(lo, hi) for name, sketch in self.quantiles.items()}
+        part.keys = self.keys[lo:hi]
+        part.index = {key: g for g, key in enumerate(part.keys)}
+        part.n_groups = len(part.keys)
+        return part
+
+    def take(self, groups):
+        """An accumulator holding only the given groups (keys kept), group groups[i] renumbered to i."""
+        groups = np.asarray(groups, dtype=np.int64)
+        part = GroupAccumulator(self.counters, self.sum_names, self.max_names, self.quantile_names, self.exact)
+        part.counts, part.sums, part.sums_lo = self.counts[:, groups], self.sums[:, groups], self.sums_lo[:, groups]
+        part.sum_counts, part.maxima = self.sum_counts[:, groups], self.maxima[:, groups]
+        part.quantiles = {name: sketch.take(groups) for name, sketch in self.quantiles.items()}
+        part.keys = [self.keys[g] for g in groups.tolist()]
+        part.index = {key: g for g, key in enumerate(part.keys)}
+        part.n_groups = len(part.keys)
+        return part
+
+    def count(self, name):
+        """Per-group tally of a counter as Python ints."""
+        return self.counts[self.counters.index(name)].tolist()
+
+    def mean(self, name):
+        """Per-group mean of a summed value as Python floats (None where nothing was summed)."""
+        return [s / c if c else None for s, c in zip(self.total(name), self.sum_counts[self.sum_names.index(name)].tolist())]
+
+    def total(self, name):
+        """Per-group sum of a summed value as Python floats."""
+        j = self.sum_names.index(name)
+        return (self.sums[j] + self.sums_lo[j]).tolist()
+
+    def maximum(self, name):
+        """Per-group maximum of a value as Python floats (None where nothing was seen)."""
+        return [m if m != -math.inf else None for m in self.maxima[self.max_names.index(name)].tolist()]
+
+    def median(self, name):
+        """Per-group median of a sketched value (see GroupSketch for the error bound)."""
+        return self.quantiles[name].medians()
+
+
+def new_pitch_accumulator(exact=False):
+    """Accumulator for the pitch stat counters, metric sums and Break Tilt sin/cos sums."""
+    return GroupAccumulator(PITCH_COUNTERS, sums=METRIC_COLS + ['tiltSin', 'tiltCos'], exact=exact)
+
+
+def new_hitter_accumulator(exact=False):
+    """Accumulator for the hitter stat counters, xBA/xSLG sums, max EV and EV/LA sketches."""
+    return GroupAccumulator(HITTER_COUNTERS, sums=('xBA', 'xSLG'), maxima=('EV',), quantiles=('EV', 'LA'),
+                            exact=exact)
+
+
+def pitch_stats_from(acc):
+    """IZ%, SwStr%, CSW%, Chase% and GB% (STAT_KEYS) for every group of a pitch accumulator
+    (benchmarks/reference.py has the per-pitch definitions)."""
+    total, iz, swstr, csw = acc.count('n'), acc.count('iz'), acc.count('swStr'), acc.count('csw')
+    ooz, ooz_swung, bip, gb = acc.count('ooz'), acc.count('oozSwung'), acc.count('bip'), acc.count('gb')
+    out = []
+    for g in range(acc.n_groups):
+        if total[g] == 0:
+            out.append({k: None for k in STAT_KEYS})
+            continue
+        out.append({
+            'izPct': iz[g] / total[g],
+            'swStrPct': swstr[g] / total[g],
+            'cswPct': csw[g] / total[g],
+            'chasePct': ooz_swung[g] / ooz[g] if ooz[g] else None,
+            'gbPct': gb[g] / bip[g] if bip[g] else None,
+        })
+    return out
+
+
+def hitter_stats_from(acc):
+    """The HITTER_STAT_KEYS stats (and nSwings) for every group of a hitter accumulator
+    (benchmarks/reference.py has the per-pitch definitions)."""
+    total, n_swings, whiffs = acc.count('n'), acc.count('swings'), acc.count('whiffs')
+    n_iz, iz_swings, n_ooz, ooz_swings = acc.count('iz'), acc.count('izSwings'), acc.count('ooz'), acc.count('oozSwings')
+    n_bip, gb, ld, fb, barrels = acc.count('bip'), acc.count('gb'), acc.count('ld'), acc.count('fb'), acc.count('barrels')
+    xba, xslg = acc.mean('xBA'), acc.mean('xSLG')
+    med_ev, max_ev, med_la = acc.median('EV'), acc.maximum('EV'), acc.median('LA')
+
+    out = []
+    for g in range(acc.n_groups):
+        if total[g] == 0:
+            out.append({k: None for k in HITTER_STAT_KEYS})
+            continue
+        iz_swing_pct = iz_swings[g] / n_iz[g] if n_iz[g] else None
+        chase_pct = ooz_swings[g] / n_ooz[g] if n_ooz[g] else None
+        nb = n_bip[g]
+        out.append({
+            'nSwings': n_swings[g],
+            'swingPct': n_swings[g] / total[g],
+            'izSwingPct': iz_swing_pct,
+            'chasePct': chase_pct,
+            'izSwChase': round_float(iz_swing_pct - chase_pct, 4) if iz_swing_pct is not None and chase_pct is not None else None,
+            'whiffPct': whiffs[g] / n_swings[g] if n_swings[g] > 0 else None,
+            'medEV': round(med_ev[g], 1) if med_ev[g] is not None else None,
+            'maxEV': round(max_ev[g], 1) if max_ev[g] is not None else None,
+            'barrelPct': barrels[g] / nb if nb > 0 else None,
+            'xBA': round(xba[g], 3) if xba[g] is not None else None,
+            'xSLG': round(xslg[g], 3) if xslg[g] is not None else None,
+            'gbPct': gb[g] / nb if nb > 0 else None,
+            'ldPct': ld[g] / nb if nb > 0 else None,
+            'fbPct': fb[g] / nb if nb > 0 else None,
+            'medLA': round_float(med_la[g], 1) if med_la[g] is not None else None,
+        })
+    return out
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second on average, bursts of up to `capacity`.
+    Tokens are reserved under the lock (the count may go negative), so waiting callers are
+    served in arrival order and never oversubscribe the rate."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time_module.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until it is available. Returns the seconds waited."""
+        with self.lock:
+            now = time_module.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time_module.sleep(wait)
+        return wait
+
+
+def backoff_delay(attempt):
+    """Jittered exponential backoff: a random wait in [cap/2, cap], cap doubling per attempt."""
+    cap = min(RETRY_MAX_WAIT, RETRY_BASE_WAIT * 2 ** attempt)
+    return random.uniform(cap / 2, cap)
+
+
+def api_status(error):
+    """HTTP status of a gspread APIError (older gspread versions only keep it on the response)."""
+    status = getattr(error, 'code', None)
+    if not isinstance(status, int) or status < 0:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+def call_with_retry(fn, *args, limiter=None, max_retries=5):
+    """Call a Sheets API function, taking a limiter token per attempt and retrying rate-limit
+    (429) and transient server (5xx, RETRY_STATUSES) errors with jittered exponential backoff."""
     for attempt in range(max_retries):
+        if limiter is not None:
+            REPORT.count('throttleSleepSeconds', limiter.acquire())
+        REPORT.count('apiCalls')
         try:
-            return ws.get_all_values()
+            return fn(*args)
         except gspread.exceptions.APIError as e:
-            if '429' in str(e) and attempt < max_retries - 1:
-                wait = 30 * (attempt + 1)
-                print(f"    Rate limited, waiting {wait}s...")
+            status = api_status(e)
+            if status in RETRY_STATUSES and attempt < max_retries - 1:
+                wait = backoff_delay(attempt)
+                reason = 'Rate limited' if status == 429 else f"Sheets API error {status}"
+                print(f"    {reason}, waiting {wait:.0f}s...")
+                REPORT.count('apiRetries')
+                REPORT.count('retrySleepSeconds', wait)
                 time_module.sleep(wait)
             else:
                 raise
 
 
-def compute_percentile_ranks(rows, metric_key):
-    """Compute percentile rank (0-100) for each row's metric value.
-    Uses the 'mean rank' method for ties."""
-    pctl_key = metric_key + '_pctl'
-    valid = [(i, rows[i][metric_key]) for i in range(len(rows))
-             if rows[i].get(metric_key) is not None]
+def worksheet_fingerprints(sh, worksheets, limiter=None):
+    """Content fingerprint for every worksheet, from a single batch read of each tab's first column.
+    Covers the tab title, grid size and column A, so appended/removed rows, a renamed or re-pasted
+    tab or an edited date change it. An edit to any other cell that keeps the grid size (a
+    corrected velocity, pitch type or description in an old tab) does NOT: neither the snapshot
+    cache nor the aggregate state notice it until a --full-rebuild run, which re-downloads and
+    re-aggregates every worksheet (the scheduled workflow does one each week)."""
+    ranges = [gspread.utils.absolute_range_name(ws.title, 'A:A') for ws in worksheets]
+    resp = call_with_retry(sh.values_batch_get, ranges, limiter=limiter) if ranges else {'valueRanges': []}
+    fingerprints = []
+    for ws, value_range in zip(worksheets, resp.get('valueRanges', [])):
+        payload = [ws.title, ws.row_count, ws.col_count, value_range.get('values', [])]
+        fingerprints.append(hashlib.sha1(json.dumps(payload).encode('utf-8')).hexdigest())
+    return fingerprints
 
-    if len(valid) < 2:
-        for row in rows:
-            row[pctl_key] = 50 if row.get(metric_key) is not None else None
-        return
 
-    values = [v for _, v in valid]
-    n = len(values)
+def cached_sheet_path(cache_dir, sh, ws, fingerprint):
+    """Snapshot path for one worksheet revision: <cache_dir>/<spreadsheet id>/<worksheet id>-<fingerprint>.json."""
+    return os.path.join(cache_dir, sh.id, f'{ws.id}-{fingerprint}.json')
 
-    for idx, val in valid:
-        below = sum(1 for x in values if x < val)
-        equal = sum(1 for x in values if x == val)
-        pctl = (below + 0.5 * (equal - 1)) / max(1, n - 1) * 100
-        rows[idx][pctl_key] = max(0, min(100, round(pctl)))
 
-    # Set None for rows that don't have the metric
-    for row in rows:
-        if pctl_key not in row:
-            row[pctl_key] = None
+def load_cached_sheet(path):
+    """Worksheet values from a snapshot file, or None if it is missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 
-def main():
-    os.makedirs(DATA_DIR, exist_ok=True)
-
-    print(f"Connecting to Google Sheets...")
-    scopes = ['https://www.googleapis.com/auth/spreadsheets.readonly']
-    creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=scopes)
-    gc = gspread.authorize(creds)
-    sh = gc.open_by_key(PITCHING_SPREADSHEET_ID)
-    print(f"Spreadsheet: {sh.title} ({len(sh.worksheets())} sheets)")
-
-    # Read all pitches from all sheets
-    all_pitches = []
-    for i, ws in enumerate(sh.worksheets()):
-        print(f"  Reading {ws.title}...")
-        if i > 0:
-            time_module.sleep(1.5)
-        rows = read_sheet_with_retry(ws)
-        if not rows:
+def save_cached_sheet(path, values):
+    """Write a worksheet snapshot atomically (a crash mid-write never leaves a bad cache entry)
+    and drop older revisions of the same worksheet."""
+    folder, name = os.path.split(path)
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(values, f)
+    os.replace(tmp_path, path)
+    prefix = name.rsplit('-', 1)[0] + '-'
+    for other in os.listdir(folder):
+        if other.startswith(prefix) and other != name and other.endswith('.json'):
+            os.remove(os.path.join(folder, other))
+
+
+def download_worksheets(sh, batch, limiter):
+    """Download several worksheets of one spreadsheet with a single values:batchGet request
+    and store their snapshots (runs on a fetch thread). batch is a list of (ws, snapshot path);
+    returns the rows of each tab in the same order."""
+    ranges = [gspread.utils.absolute_range_name(ws.title) for ws, _ in batch]
+    resp = call_with_retry(sh.values_batch_get, ranges, limiter=limiter)
+    value_ranges = resp.get('valueRanges', [])
+    if len(value_ranges) != len(batch):
+        raise RuntimeError(f"values:batchGet returned {len(value_ranges)} ranges for {len(batch)} worksheets")
+    results = []
+    for (ws, path), value_range in zip(batch, value_ranges):
+        # batchGet drops trailing empty cells; pad back to a rectangle like get_all_values()
+        rows = value_range.get('values', [])
+        width = max(map(len, rows), default=0)
+        rows = [row + [''] * (width - len(row)) for row in rows]
+        save_cached_sheet(path, rows)
+        results.append(rows)
+    REPORT.count('worksheetsDownloaded', len(batch))
+    return results
+
+
+def read_spreadsheets(books, cache_dir=SHEET_CACHE_DIR, workers=FETCH_WORKERS, limiter=None, fingerprints=None,
+                      refresh=False):
+    """Read several spreadsheets at once. books is a list of (spreadsheet, worksheets).
+    Returns one iterator per book yielding (worksheet, rows) in sheet order. Worksheet
+    fingerprints are probed here unless already known (one list per book, see probe_spreadsheets).
+    refresh downloads every tab, replacing its snapshot, instead of trusting the cache.
+
+    Unchanged tabs come from the snapshot cache under cache_dir/<spreadsheet id>/ and are only loaded
+    when their turn comes; the rest are fetched BATCH_RANGES tabs per values:batchGet request on a pool
+    of `workers` threads sharing `limiter`, so the pitching and hitting downloads overlap while each
+    iterator still hands rows back in a deterministic order. An iterator keeps at most FETCH_AHEAD
+    batches downloading or downloaded ahead of the tab it is on, and rows are released once
+    consumed, so memory stays bounded however far the consumer falls behind."""
+    if limiter is None:
+        limiter = TokenBucket(FETCH_RATE, FETCH_BURST)
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    if fingerprints is None:
+        probes = [executor.submit(worksheet_fingerprints, sh, worksheets, limiter) for sh, worksheets in books]
+        fingerprints = [probe.result() for probe in probes]
+
+    plans = []
+    for (sh, worksheets), book_fingerprints in zip(books, fingerprints):
+        entries, pending = [], []
+        for ws, fingerprint in zip(worksheets, book_fingerprints):
+            path = cached_sheet_path(cache_dir, sh, ws, fingerprint)
+            if os.path.exists(path) and not refresh:
+                entries.append((ws, path, None))
+            else:
+                entries.append((ws, path, len(pending)))
+                pending.append((ws, path))
+        # Changed tabs go out BATCH_RANGES at a time; each entry remembers its batch and slot
+        size = max(1, BATCH_RANGES)
+        batches = [pending[i:i + size] for i in range(0, len(pending), size)]
+        plans.append((deque((ws, path, None if i is None else divmod(i, size)) for ws, path, i in entries),
+                      batches))
+    # The iterators submit their downloads as they go; the pool's idle threads exit once they are gone
+    return [_iter_plan(sh, plan, batches, executor, limiter) for (sh, _), (plan, batches) in zip(books, plans)]
+
+
+def probe_spreadsheets(books, limiter=None):
+    """Worksheet fingerprints for several spreadsheets, probed concurrently (one list per book)."""
+    with ThreadPoolExecutor(max_workers=max(1, len(books))) as executor:
+        probes = [executor.submit(worksheet_fingerprints, sh, worksheets, limiter) for sh, worksheets in books]
+        return [probe.result() for probe in probes]
+
+
+def _iter_plan(sh, plan, batches, executor, limiter):
+    futures = {}  # batch number -> download, submitted up to FETCH_AHEAD batches ahead
+
+    def fetch_through(last):
+        for b in range(len(futures), min(last + 1, len(batches))):
+            futures[b] = executor.submit(download_worksheets, sh, batches[b], limiter)
+
+    fetch_through(FETCH_AHEAD - 1)
+    while plan:
+        ws, path, pending = plan.popleft()
+        rows = load_cached_sheet(path) if pending is None else None
+        if rows is not None:
+            REPORT.count('worksheetsCached')
+        elif pending is None:  # snapshot vanished or is unreadable: fetch it on this thread
+            rows = download_worksheets(sh, [(ws, path)], None)[0]
+        else:
+            b, slot = pending
+            fetch_through(b + FETCH_AHEAD)
+            rows = futures[b].result()[slot]
+            if slot == len(batches[b]) - 1:
+                futures[b] = None  # release the batch's rows
+        yield ws, rows
+
+
+# ======================================================================
+#  WORKSHEET SOURCES
+# ======================================================================
+# A source opens the two spreadsheets as [(spreadsheet, worksheets)] books, fingerprints their
+# worksheets and reads them back as (worksheet, rows) iterators. Spreadsheets and worksheets
+# only need .id and .title.
+
+BOOK_NAMES = ('pitching', 'hitting')  # snapshot folder / manifest key per book, in book order
+SNAPSHOT_FORMATS = ('csv', 'ndjson', 'parquet')
+
+
+class SheetsSource:
+    """Worksheets from the Google Sheets API, through the snapshot cache and shared fetch pacing:
+    `workers` download threads sharing a token bucket of `rate` requests per second and bursts of
+    `burst` (refresh: download every worksheet read, ignoring the cache)."""
+
+    def __init__(self, cache_dir=SHEET_CACHE_DIR, workers=FETCH_WORKERS, refresh=False, rate=FETCH_RATE,
+                 burst=FETCH_BURST):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.refresh = refresh
+        self.limiter = TokenBucket(rate, burst)
+
+    def open(self):
+        """Authorize with the service account and open the pitching and hitting spreadsheets."""
+        print(f"Connecting to Google Sheets...")
+        scopes = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+        creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=scopes)
+        gc = gspread.authorize(creds)
+        books = []
+        for key in (PITCHING_SPREADSHEET_ID, HITTING_SPREADSHEET_ID):
+            sh = gc.open_by_key(key)
+            worksheets = sh.worksheets()
+            print(f"Spreadsheet: {sh.title} ({len(worksheets)} sheets)")
+            books.append((sh, worksheets))
+        return books
+
+    def probe(self, books):
+        """Worksheet fingerprints, one list per book."""
+        return probe_spreadsheets(books, self.limiter)
+
+    def read(self, books, plan):
+        """One (worksheet, rows) iterator per book over the (worksheet, fingerprint) pairs in plan."""
+        return read_spreadsheets([(sh, [ws for ws, _ in book_plan]) for (sh, _), book_plan in zip(books, plan)],
+                                 self.cache_dir, self.workers, self.limiter,
+                                 fingerprints=[[fp for _, fp in book_plan] for book_plan in plan],
+                                 refresh=self.refresh)
+
+
+class LocalSheet:
+    """A spreadsheet or worksheet of a local snapshot (worksheets also know their file)."""
+
+    def __init__(self, sheet_id, title, path=None):
+        self.id = sheet_id
+        self.title = title
+        self.path = path
+
+
+class LocalSource:
+    """Worksheets from a raw snapshot directory, as written by --record (no network or credentials).
+
+    <dir>/manifest.json maps each book name in BOOK_NAMES to {"id", "title", "worksheets": [{"id",
+    "title", "file"}]}, worksheets in sheet order and files relative to <dir>. A tab file holds the
+    worksheet's cells, header row first, as .csv, .ndjson (one JSON array of cells per line) or
+    .parquet (column names are the header row; needs pyarrow). Recording keeps the spreadsheet and
+    worksheet ids, so the aggregate state ledger carries over between live and replayed runs."""
+
+    def __init__(self, snapshot_dir):
+        self.snapshot_dir = snapshot_dir
+
+    def open(self):
+        """The books listed in the snapshot manifest."""
+        with open(os.path.join(self.snapshot_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+        print(f"Reading snapshot {self.snapshot_dir}...")
+        books = []
+        for name in BOOK_NAMES:
+            entry = manifest[name]
+            worksheets = [LocalSheet(ws['id'], ws['title'], os.path.join(self.snapshot_dir, ws['file']))
+                          for ws in entry['worksheets']]
+            print(f"Spreadsheet: {entry['title']} ({len(worksheets)} sheets)")
+            books.append((LocalSheet(entry['id'], entry['title']), worksheets))
+        return books
+
+    def probe(self, books):
+        """Fingerprints from each tab's title and file contents."""
+        fingerprints = []
+        for sh, worksheets in books:
+            book_fingerprints = []
+            for ws in worksheets:
+                digest = hashlib.sha1(ws.title.encode('utf-8'))
+                with open(ws.path, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(block)
+                book_fingerprints.append(digest.hexdigest())
+            fingerprints.append(book_fingerprints)
+        return fingerprints
+
+    def read(self, books, plan):
+        """One (worksheet, rows) iterator per book, loading each tab file when its turn comes."""
+        return [self._iter_tabs(book_plan) for book_plan in plan]
+
+    def _iter_tabs(self, book_plan):
+        for ws, _ in book_plan:
+            REPORT.count('worksheetsLoaded')
+            yield ws, read_tab_file(ws.path)
+
+
+def cell_text(value):
+    """A snapshot cell as the text the Sheets API would return ('' for empty)."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    return value if isinstance(value, str) else str(value)
+
+
+def read_tab_file(path):
+    """A worksheet's rows (lists of cell strings, header first) from a .csv, .ndjson or .parquet file."""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+    if path.endswith('.ndjson'):
+        with open(path, encoding='utf-8') as f:
+            return [[cell_text(v) for v in json.loads(line)] for line in f if line.strip()]
+    if path.endswith('.parquet'):
+        _, pq = import_pyarrow()
+        table = pq.read_table(path)
+        columns = [[cell_text(v) for v in col.to_pylist()] for col in table.columns]
+        return [list(table.column_names)] + [list(row) for row in zip(*columns)]
+    raise ValueError(f"unsupported snapshot file: {path}")
+
+
+def write_tab_file(path, rows):
+    """Write a worksheet's rows in the format given by the file extension (atomically)."""
+    tmp_path = path + '.tmp'
+    if path.endswith('.csv'):
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(rows)
+    elif path.endswith('.ndjson'):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+    elif path.endswith('.parquet'):
+        pa, pq = import_pyarrow()
+        header = list(rows[0]) if rows else []
+        width = max(map(len, rows), default=0)
+        header += [''] * (width - len(header))
+        # Parquet needs unique column names: rename blanks and all but the last of any duplicate
+        # (the parser reads the last column of a repeated name, so that one keeps its name)
+        names = [name if name and name not in header[i + 1:] else f'{name}__{i}' for i, name in enumerate(header)]
+        body = [list(row) + [''] * (width - len(row)) for row in rows[1:]]
+        columns = {name: [row[i] for row in body] for i, name in enumerate(names)}
+        pq.write_table(pa.table(columns), tmp_path, compression='zstd')
+    else:
+        raise ValueError(f"unsupported snapshot file: {path}")
+    os.replace(tmp_path, path)
+
+
+def import_pyarrow():
+    """(pyarrow, pyarrow.parquet); pyarrow is only needed for Parquet snapshots."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("Parquet snapshots need pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+def record_worksheets(snapshot_dir, book_name, sheets, entries, fmt='csv'):
+    """Pass (worksheet, rows) through while saving each tab under <snapshot_dir>/<book_name>/ and
+    appending its manifest entry to `entries`. This runs on the book's fetch thread (fold_sheets),
+    so the manifest itself is written once from the main thread by write_snapshot_manifest."""
+    folder = os.path.join(snapshot_dir, book_name)
+    os.makedirs(folder, exist_ok=True)
+    for i, (ws, rows) in enumerate(sheets):
+        rel_path = f'{book_name}/{i:03d}.{fmt}'
+        write_tab_file(os.path.join(snapshot_dir, rel_path), rows)
+        entries.append({'id': ws.id, 'title': ws.title, 'file': rel_path})
+        yield ws, rows
+
+
+def write_snapshot_manifest(snapshot_dir, books, recorded):
+    """Write <snapshot_dir>/manifest.json for the recorded books (recorded: book name -> the entries
+    record_worksheets collected), keeping the entries of any other book already listed there."""
+    manifest_path = os.path.join(snapshot_dir, 'manifest.json')
+    manifest = load_cached_sheet(manifest_path) or {}
+    for name, (sh, _) in zip(BOOK_NAMES, books):
+        entries = recorded[name]
+        manifest[name] = {'id': sh.id, 'title': sh.title, 'worksheets': entries}
+        print(f"  Recorded {len(entries)} {name} sheets to {os.path.join(snapshot_dir, name)}/")
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+def compute_percentile_ranks(rows, metric_key):
+    """Compute percentile rank (0-100) for each row's metric value.
+    Uses the 'mean rank' method for ties."""
+    compute_percentile_ranks_batch(rows, [metric_key])
+
+
+def compute_percentile_ranks_batch(rows, metric_keys):
+    """Percentile ranks for several metrics over the same rows, sorting each metric once.
+    Same 'mean rank' tie handling, rounding and clamping as the pairwise definition:
+    pctl = (below + 0.5 * (equal - 1)) / (n - 1) * 100, found with searchsorted."""
+    if not metric_keys:
+        return
+    matrix = np.array([[np.nan if row.get(k) is None else row[k] for k in metric_keys] for row in rows],
+                      dtype=np.float64).reshape(len(rows), len(metric_keys))
+
+    for j, metric_key in enumerate(metric_keys):
+        pctl_key = metric_key + '_pctl'
+        col = matrix[:, j]
+        has_value = ~np.isnan(col)
+        values = col[has_value]
+        n = len(values)
+
+        if n < 2:
+            for row, present in zip(rows, has_value.tolist()):
+                row[pctl_key] = 50 if present else None
             continue
-        header = rows[0]
-        col_idx = {name: i for i, name in enumerate(header) if name}
 
-        for row in rows[1:]:
-            pitcher = row[col_idx['Pitcher']] if 'Pitcher' in col_idx else None
-            if not pitcher:
+        ordered = np.sort(values)
+        below = np.searchsorted(ordered, values, side='left')
+        equal = np.searchsorted(ordered, values, side='right') - below
+        pctl = (below + 0.5 * (equal - 1)) / max(1, n - 1) * 100
+        ranks = iter(np.clip(np.rint(pctl), 0, 100).astype(np.int64).tolist())
+
+        for row, present in zip(rows, has_value.tolist()):
+            row[pctl_key] = next(ranks) if present else None
+
+
+# ======================================================================
+#  AGGREGATE STATE (incremental daily rebuilds)
+# ======================================================================
+
+STATE_FILE = 'aggregate_state.npz'  # under DATA_DIR, committed with the leaderboards
+STATE_VERSION = 6  # bump whenever the schema, the accumulators or the state layout change
+WINDOW_DAYS = (7, 14)  # rolling windows (in game days up to the latest one) with their own leaderboards
+SEASON_YEAR = 2026     # year of dates written without one ('3/5')
+
+
+class AggregateState:
+    """Everything the outputs are built from, folded in one batch of worksheets at a time and
+    kept between runs in STATE_FILE, so a daily run only parses the tabs it has not seen yet.
+
+      pitch_groups:  (Pitcher, Team, Pitch Type, Throws)  counters, metric sums, Break Tilt sin/cos sums
+      hitter_groups: (Hitter, Team, Stands)               counters, xBA/xSLG sums, max EV, EV/LA sketches
+      hitter_cells:  (Hitter, Team, Stands, Pitch Type)   the same, per pitch type faced
+      pitch_days:    (Day, Pitcher, Team, Pitch Type, Throws)  pitch_groups split by game day
+      hitter_days:   (Day, Hitter, Team, Stands)               hitter_groups split by game day
+      pitch_details: per-pitcher scatter-plot points (PitchDetailStore: the points themselves
+                     are kept in the detail shards, the state only lists them)
+      sheets:        spreadsheet id -> [[worksheet id, fingerprint], ...] in the order folded in
+    Pitcher groups (Pitcher, Team, Throws) are rolled up from pitch_groups when needed. The
+    per-day groups only keep the last max(WINDOW_DAYS) days (see prune_days) and are rolled up
+    into the rolling-window leaderboards (build_windows); tables passed to the fold methods
+    carry each row's game day in a 'Day' column (game_days)."""
+
+    GROUPS = ('pitch_groups', 'hitter_groups', 'hitter_cells', 'pitch_days', 'hitter_days')
+
+    def __init__(self):
+        self.pitch_groups = new_pitch_accumulator()
+        self.hitter_groups = new_hitter_accumulator()
+        self.hitter_cells = new_hitter_accumulator()
+        self.pitch_days = new_pitch_accumulator(exact=True)
+        self.hitter_days = new_hitter_accumulator(exact=True)
+        self.pitch_details = PitchDetailStore()
+        self.sheets = {}
+
+    def fold_pitches(self, cols):
+        """Fold a typed pitch table (new worksheets only) into the state; one scan feeds
+        both the season groups and the per-day groups."""
+        scan = scan_pitches(cols)
+        keys = (cols['Pitcher'], cols['Team'], cols['Pitch Type'], cols['Throws'])
+        self.pitch_groups.add_rows(scan, *keys)
+        recent = self.prune_days(cols['Day'])
+        self.pitch_days.add_rows(scan.take(recent), *(col[recent] for col in (cols['Day'],) + keys))
+        self.pitch_details.extend(cols)
+
+    def fold_hitter_pitches(self, cols):
+        """Fold a typed hitter table (new worksheets only) into the state; one scan feeds
+        the hitter totals, the hitter x pitch-type cells and the per-day groups."""
+        scan = scan_hitter_pitches(cols)
+        keys = (cols['Hitter'], cols['Team'], cols['Stands'])
+        self.hitter_groups.add_rows(scan, *keys)
+        self.hitter_cells.add_rows(scan, *keys, cols['Pitch Type'])
+        recent = self.prune_days(cols['Day'])
+        self.hitter_days.add_rows(scan.take(recent), *(col[recent] for col in (cols['Day'],) + keys))
+
+    def latest_day(self):
+        """The latest game day folded in (ISO date), or None if no pitch had a date."""
+        days = [key[0] for acc in (self.pitch_days, self.hitter_days) for key in acc.keys if key[0] is not None]
+        return max(days, default=None)
+
+    def prune_days(self, new_days):
+        """Make way for a table with game days new_days: drop the per-day groups no rolling window
+        can reach any more (before the longest window ending on the latest day, counting the new
+        ones) and return the mask of the new rows worth keeping (dated, within that window).
+        The latest day only moves forward, so what is kept does not depend on the order
+        worksheets are folded in."""
+        new_days = as_categorical(new_days)
+        distinct = set(new_days.present())
+        known = self.latest_day()
+        latest = max(distinct | ({known} if known else set()), default=None)
+        if latest is None:
+            return np.zeros(len(new_days), dtype=bool)
+        first = window_start(latest, max(WINDOW_DAYS))
+        for name in ('pitch_days', 'hitter_days'):
+            acc = getattr(self, name)
+            keep = [g for g, key in enumerate(acc.keys) if key[0] >= first]
+            if len(keep) < acc.n_groups:
+                setattr(self, name, acc.take(keep))
+        return new_days.isin({day for day in distinct if day >= first})
+
+    def save(self, path):
+        """Write the state atomically (a crash mid-write leaves the previous state intact), unless
+        the file already holds the same bytes (np.savez output is deterministic). The pitch details
+        have to be built into their shards first (PitchDetailStore.build_shards)."""
+        if self.pitch_details.new:
+            raise ValueError("pitch details folded in but not built into their shards")
+        meta = {
+            'version': STATE_VERSION,
+            'sheets': self.sheets,
+            'keys': self.group_keys(),
+            'pitchDetails': self.pitch_details.shards,
+        }
+        arrays = {'meta': np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)}
+        arrays.update(self.group_arrays())
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return write_if_changed(path, buffer.getvalue())
+
+    @classmethod
+    def load(cls, path):
+        """The state saved at path, or None if it is missing, unreadable, from another STATE_VERSION
+        or the detail shards it lists (under DETAILS_DIR next to it) are gone."""
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+            meta = json.loads(arrays.pop('meta').tobytes().decode('utf-8'))
+            if meta.get('version') != STATE_VERSION:
+                return None
+            state = cls.from_groups(arrays, meta['keys'])
+            state.pitch_details = PitchDetailStore(os.path.join(os.path.dirname(path), DETAILS_DIR),
+                                                   meta['pitchDetails'])
+        except (OSError, ValueError, KeyError):
+            return None
+        if not state.pitch_details.on_disk():
+            return None
+        state.sheets = {sheet_id: [tuple(entry) for entry in entries] for sheet_id, entries in meta['sheets'].items()}
+        return state
+
+    def group_arrays(self):
+        """The numeric part of every group accumulator as named arrays."""
+        arrays = {}
+        for name in self.GROUPS:
+            arrays.update(getattr(self, name).to_arrays(name + '/'))
+        return arrays
+
+    def group_keys(self):
+        """The group keys of every accumulator."""
+        return {name: getattr(self, name).keys for name in self.GROUPS}
+
+    @classmethod
+    def from_groups(cls, arrays, keys):
+        """A state holding the accumulators from group_arrays() / group_keys() (no details or ledger)."""
+        state = cls()
+        for name in cls.GROUPS:
+            getattr(state, name).load_arrays(name + '/', arrays, keys[name])
+        return state
+
+    def unseen_worksheets(self, books, fingerprints):
+        """Per book, the worksheets (with fingerprints) not folded in yet, or None when a folded
+        worksheet has since changed or disappeared: aggregates cannot be un-folded, so the
+        caller has to rebuild from scratch. Books with fingerprints None are skipped."""
+        unseen = []
+        for (sh, worksheets), book_fingerprints in zip(books, fingerprints):
+            if book_fingerprints is None:  # book not read this run
+                unseen.append([])
                 continue
+            current = set(zip((ws.id for ws in worksheets), book_fingerprints))
+            folded = set(self.sheets.get(sh.id, []))
+            if not folded <= current:
+                return None
+            unseen.append([(ws, fp) for ws, fp in zip(worksheets, book_fingerprints) if (ws.id, fp) not in folded])
+        return unseen
+
+    def mark_folded(self, books, folded):
+        """Record the (worksheet, fingerprint) pairs just folded in, one list per book."""
+        for (sh, _), book_folded in zip(books, folded):
+            self.sheets.setdefault(sh.id, []).extend((ws.id, fp) for ws, fp in book_folded)
+
+    def fold_order(self, books):
+        """Per book, the (worksheet, fingerprint) pairs in the order they were folded in."""
+        order = []
+        for sh, worksheets in books:
+            by_id = {ws.id: ws for ws in worksheets}
+            order.append([(by_id[ws_id], fp) for ws_id, fp in self.sheets.get(sh.id, [])])
+        return order
+
+
+PIPELINE_DEPTH = 8  # fetched worksheets queued for parsing (the bounded queue between fetch and fold)
+BOOK_FOLDS = {  # book -> (schema, key column, AggregateState fold method)
+    'pitching': (PITCH_SCHEMA, 'Pitcher', 'fold_pitches'),
+    'hitting': (HITTER_SCHEMA, 'Hitter', 'fold_hitter_pitches'),  # each record is one pitch seen by a hitter
+}
 
-            pitch = {}
-            for col_name, idx in col_idx.items():
-                val = row[idx] if idx < len(row) else None
-                # Convert empty strings to None
-                if val == '':
-                    val = None
-                pitch[col_name] = val
-            all_pitches.append(pitch)
-
-    print(f"Read {len(all_pitches)} pitches from {len(sh.worksheets())} sheets")
 
-    # Collect unique teams and pitch types
-    all_teams = sorted(set(p['Team'] for p in all_pitches if p.get('Team')))
-    all_pitch_types = sorted(set(p['Pitch Type'] for p in all_pitches if p.get('Pitch Type')))
+def produce_sheets(book, sheets, handoff, record):
+    """Fetch thread of fold_sheets: put one book's (book, worksheet, rows) on the handoff queue in
+    sheet order, then (book, None, None), or (book, None, error) if reading fails."""
+    try:
+        for ws, rows in timed_sheets(sheets, record):
+            handoff.put((book, ws, rows))
+    except Exception as e:
+        handoff.put((book, None, e))
+    else:
+        handoff.put((book, None, None))
+
+
+@contextmanager
+def add_seconds(record, key):
+    """Add the wall seconds spent in the block to record[key]."""
+    t0 = time_module.perf_counter()
+    try:
+        yield
+    finally:
+        record[key] = round(record.get(key, 0.0) + time_module.perf_counter() - t0, 3)
+
+
+def fold_sheets(state, pitch_sheets, hitter_sheets, on_folded=None):
+    """Parse worksheets into on-disk pitch stores (PitchStore, in a temporary directory) and fold
+    them into state a chunk at a time, while later worksheets are still being read: a thread per
+    book iterates its sheets (downloads, cache and file reads) and hands them over through a
+    bounded queue, and this thread parses whatever arrives and folds each chunk as soon as it is
+    complete. Each book is parsed and folded in sheet order with fixed chunk boundaries, so the
+    result does not depend on how the two interleave. on_folded(book), if given, is called as
+    soon as a book (BOOK_NAMES) is completely folded. Returns (pitches, hitter pitches) read."""
+    handoff = queue.Queue(maxsize=PIPELINE_DEPTH)
+    records = {book: REPORT.record(f'fold {book}') for book in BOOK_NAMES}
+    wait = REPORT.open_stages[-1] if REPORT.open_stages else {}
+    for book, sheets in zip(BOOK_NAMES, (pitch_sheets, hitter_sheets)):
+        threading.Thread(target=produce_sheets, args=(book, sheets, handoff, records[book]), daemon=True).start()
+    with tempfile.TemporaryDirectory(prefix='pitch-store-') as folder:
+        stores = {book: PitchStore(schema, os.path.join(folder, book)) for book, (schema, _, _) in BOOK_FOLDS.items()}
+        reading = set(BOOK_NAMES)
+        while reading:
+            with add_seconds(wait, 'waitSeconds'):  # idle until a worksheet arrives
+                book, ws, rows = handoff.get()
+            _, key_col, fold = BOOK_FOLDS[book]
+            store, record = stores[book], records[book]
+            if ws is not None:
+                print(f"  {book.capitalize()} {ws.title}")  # from here, so fetch threads never split a line
+                with add_seconds(record, 'parseSeconds'):
+                    store.add_sheet(rows, key_col, ws.title)
+                del rows
+            elif rows is not None:
+                raise rows
+            else:
+                reading.discard(book)
+            with add_seconds(record, 'foldSeconds'):
+                for cols in store.chunks(final=ws is None):
+                    getattr(state, fold)(cols)
+            if ws is None:
+                report_invalid(store, book.capitalize())
+                record['rows'] = store.size
+                if on_folded is not None:
+                    on_folded(book)
+    return stores['pitching'].size, stores['hitting'].size
+
+
+def pitcher_groups(state):
+    """Roll the pitch groups up into (Pitcher, Team, Throws) groups (counters merge exactly)."""
+    acc = new_pitch_accumulator()
+    mapping = [acc.index.setdefault((pitcher, team, throws), len(acc.index))
+               for pitcher, team, pitch_type, throws in state.pitch_groups.keys]
+    acc.keys = list(acc.index)
+    return acc.merge(state.pitch_groups, mapping)
+
+
+def build_pitch_leaderboard(state):
+    """Pitch leaderboard rows (one per pitcher and pitch type) with per-pitch-type percentiles,
+    and the league averages per pitch type."""
+    pg = state.pitch_groups
+    pg_counts = pg.count('n')
+    pg_means = {col: pg.mean(col) for col in METRIC_COLS}
+    pg_stats = pitch_stats_from(pg)
+    tilt_n = pg.sum_counts[pg.sum_names.index('tiltSin')]
+    avg_tilts = circular_means_from_sums(pg.total('tiltSin'), pg.total('tiltCos'), tilt_n)
 
     # --- Count total pitches per pitcher (for usage%) ---
     pitcher_total = defaultdict(int)
-    for p in all_pitches:
-        pitcher_total[(p['Pitcher'], p['Team'])] += 1
-
-    # --- Pitch Leaderboard: group by (Pitcher, Team, Pitch Type) ---
-    pitch_groups = defaultdict(list)
-    for p in all_pitches:
-        key = (p['Pitcher'], p['Team'], p['Pitch Type'], p.get('Throws'))
-        pitch_groups[key].append(p)
+    for (pitcher, team, pitch_type, throws), n in zip(pg.keys, pg_counts):
+        pitcher_total[(pitcher, team)] += n
 
     pitch_leaderboard = []
-    for (pitcher, team, pitch_type, throws), pitches in pitch_groups.items():
+    for g, (pitcher, team, pitch_type, throws) in enumerate(pg.keys):
         if not pitch_type:
             continue
 
@@ -353,28 +2170,19 @@ def main():
             'team': team,
             'throws': throws,
             'pitchType': pitch_type,
-            'count': len(pitches),
-            'usagePct': round(len(pitches) / total_for_pitcher, 4) if total_for_pitcher > 0 else None,
+            'count': pg_counts[g],
+            'usagePct': round(pg_counts[g] / total_for_pitcher, 4) if total_for_pitcher > 0 else None,
         }
 
         # Average metrics
         for col in METRIC_COLS:
-            values = [safe_float(p.get(col)) for p in pitches]
-            key_name = METRIC_KEYS[col]
-            row[key_name] = round_metric(col, avg(values))
+            row[METRIC_KEYS[col]] = round_metric(col, pg_means[col][g])
 
         # Break Tilt (circular mean)
-        tilt_minutes = [break_tilt_to_minutes(p.get('Break Tilt')) for p in pitches]
-        tilt_minutes = [m for m in tilt_minutes if m is not None]
-        avg_tilt = circular_mean_minutes(tilt_minutes)
-        row['breakTilt'] = minutes_to_tilt_display(avg_tilt)
-        row['breakTiltMinutes'] = avg_tilt
+        row['breakTilt'] = minutes_to_tilt_display(avg_tilts[g])
+        row['breakTiltMinutes'] = avg_tilts[g]
 
-        # Stats — convert Zone to int (gspread returns strings)
-        for p in pitches:
-            p['Zone'] = safe_int(p.get('Zone'))
-
-        row.update(compute_stats(pitches))
+        row.update(pg_stats[g])
         pitch_leaderboard.append(row)
 
     # --- Compute percentiles per pitch type ---
@@ -383,8 +2191,7 @@ def main():
         pt_groups[row['pitchType']].append(row)
 
     for pt, pt_rows in pt_groups.items():
-        for metric in PITCH_PCTL_KEYS:
-            compute_percentile_ranks(pt_rows, metric)
+        compute_percentile_ranks_batch(pt_rows, PITCH_PCTL_KEYS)
 
     # --- Compute Stuff Score ---
     # Average of velocity and spin rate percentiles within pitch type
@@ -400,148 +2207,80 @@ def main():
     for pt, pt_rows in pt_groups.items():
         compute_percentile_ranks(pt_rows, 'stuffScore')
 
-    pitch_leaderboard.sort(key=lambda r: r['count'], reverse=True)
-    print(f"Pitch leaderboard: {len(pitch_leaderboard)} rows")
-
-    # --- Pitcher Leaderboard: group by (Pitcher, Team) ---
-    pitcher_groups = defaultdict(list)
-    for p in all_pitches:
-        key = (p['Pitcher'], p['Team'], p.get('Throws'))
-        pitcher_groups[key].append(p)
-
-    pitcher_leaderboard = []
-    for (pitcher, team, throws), pitches in pitcher_groups.items():
-        for p in pitches:
-            p['Zone'] = safe_int(p.get('Zone'))
-
-        row = {
-            'pitcher': pitcher,
-            'team': team,
-            'throws': throws,
-            'count': len(pitches),
-        }
-        row.update(compute_stats(pitches))
-        pitcher_leaderboard.append(row)
-
-    # Compute percentiles for pitcher leaderboard (across all pitchers)
-    for stat in STAT_KEYS:
-        compute_percentile_ranks(pitcher_leaderboard, stat)
-
-    pitcher_leaderboard.sort(key=lambda r: r['count'], reverse=True)
-    print(f"Pitcher leaderboard: {len(pitcher_leaderboard)} rows")
-
-    # --- Pitch Details: individual pitch data for scatter plots + velo distribution ---
-    pitch_details = defaultdict(list)
-    for p in all_pitches:
-        pitcher = p.get('Pitcher')
-        pt = p.get('Pitch Type')
-        ivb = safe_float(p.get('IndVertBrk'))
-        hb = safe_float(p.get('HorzBrk'))
-        velo = safe_float(p.get('Velocity'))
-        rel_x = safe_float(p.get('RelPosX'))
-        rel_z = safe_float(p.get('RelPosZ'))
-        if pitcher and pt and ivb is not None and hb is not None:
-            detail = {
-                'pt': pt,
-                'ivb': round(ivb, 1),
-                'hb': round(hb, 1),
-            }
-            if velo is not None:
-                detail['v'] = round(velo, 1)
-            if rel_x is not None:
-                detail['rx'] = round(rel_x, 2)
-            if rel_z is not None:
-                detail['rz'] = round(rel_z, 2)
-            pitch_details[pitcher].append(detail)
-    print(f"Pitch details: {sum(len(v) for v in pitch_details.values())} pitches for {len(pitch_details)} pitchers")
-
     # --- League Averages per pitch type ---
     league_avgs = {}
-    for pt, pt_rows in pt_groups.items():
+    for pt, pt_rows in sorted(pt_groups.items()):
         avgs = {}
         for metric in list(METRIC_KEYS.values()):
             vals = [r[metric] for r in pt_rows if r.get(metric) is not None]
             if vals:
-                avgs[metric] = round(sum(vals) / len(vals), 2)
+                avgs[metric] = round_float(sum(vals) / len(vals), 2)
         for stat in STAT_KEYS:
             vals = [r[stat] for r in pt_rows if r.get(stat) is not None]
             if vals:
                 avgs[stat] = round(sum(vals) / len(vals), 4)
         tilts = [r['breakTiltMinutes'] for r in pt_rows if r.get('breakTiltMinutes') is not None]
-        if tilts:
-            avgs['breakTiltMinutes'] = round(sum(tilts) / len(tilts))
+        if tilts:  # on the clock face: 11:50 and 0:10 average to 12:00, not 6:00
+            avgs['breakTiltMinutes'] = circular_mean_minutes(tilts)
             avgs['breakTilt'] = minutes_to_tilt_display(avgs['breakTiltMinutes'])
         avgs['count'] = len(pt_rows)
         league_avgs[pt] = avgs
 
-    # League averages for pitcher leaderboard (across all pitchers)
-    pitcher_league_avgs = {}
-    for stat in STAT_KEYS:
-        vals = [r[stat] for r in pitcher_leaderboard if r.get(stat) is not None]
-        if vals:
-            pitcher_league_avgs[stat] = round(sum(vals) / len(vals), 4)
-    pitcher_league_avgs['count'] = len(pitcher_leaderboard)
+    pitch_leaderboard.sort(key=count_then('pitcher', 'team', 'pitchType', 'throws'))
+    return pitch_leaderboard, league_avgs
 
-    # ======================================================================
-    #  HITTER LEADERBOARD
-    # ======================================================================
-    print(f"\n--- Hitter Leaderboard ---")
-    hsh = gc.open_by_key(HITTING_SPREADSHEET_ID)
-    print(f"Spreadsheet: {hsh.title} ({len(hsh.worksheets())} sheets)")
-
-    all_abs = []  # each element is one pitch seen by a hitter
-    for i, ws in enumerate(hsh.worksheets()):
-        print(f"  Reading {ws.title}...")
-        if i > 0:
-            time_module.sleep(1.5)
-        rows = read_sheet_with_retry(ws)
-        if not rows:
-            continue
-        header = rows[0]
-        col_idx = {name: i for i, name in enumerate(header) if name}
 
-        for row in rows[1:]:
-            hitter = row[col_idx['Hitter']] if 'Hitter' in col_idx else None
-            if not hitter:
-                continue
-            ab = {}
-            for col_name, idx in col_idx.items():
-                val = row[idx] if idx < len(row) else None
-                if val == '':
-                    val = None
-                ab[col_name] = val
-            all_abs.append(ab)
-
-    print(f"Read {len(all_abs)} pitches from {len(hsh.worksheets())} sheets (hitters)")
-
-    # Collect unique teams from hitter data too
-    hitter_teams = sorted(set(p['Team'] for p in all_abs if p.get('Team')))
-    all_teams_combined = sorted(set(all_teams + hitter_teams))
-
-    # --- Hitter Leaderboard: group by (Hitter, Team, Stands) ---
-    hitter_groups = defaultdict(list)
-    for p in all_abs:
-        key = (p['Hitter'], p['Team'], p.get('Stands'))
-        hitter_groups[key].append(p)
+def count_then(*columns):
+    """Sort key for leaderboard rows: count descending, ties broken by the given text columns, so
+    the row order only depends on the data (not on which worksheet a group appeared in first)."""
+    return lambda row: (-row['count'],) + tuple(row[col] or '' for col in columns)
 
-    hitter_leaderboard = []
-    for (hitter, team, stands), pitches in hitter_groups.items():
-        # Convert zones to int
-        for p in pitches:
-            p['Zone'] = safe_int(p.get('Zone'))
 
+def build_pitcher_leaderboard(state):
+    """Pitcher leaderboard rows (one per pitcher) with percentiles across all pitchers."""
+    pr = pitcher_groups(state)
+    pr_counts = pr.count('n')
+    pr_stats = pitch_stats_from(pr)
+
+    pitcher_leaderboard = []
+    for g, (pitcher, team, throws) in enumerate(pr.keys):
+        row = {
+            'pitcher': pitcher,
+            'team': team,
+            'throws': throws,
+            'count': pr_counts[g],
+        }
+        row.update(pr_stats[g])
+        pitcher_leaderboard.append(row)
+
+    # Compute percentiles for pitcher leaderboard (across all pitchers)
+    compute_percentile_ranks_batch(pitcher_leaderboard, STAT_KEYS)
+
+    pitcher_leaderboard.sort(key=count_then('pitcher', 'team', 'throws'))
+    return pitcher_leaderboard
+
+
+def build_hitter_leaderboard(state, hg_stats=None):
+    """Hitter leaderboard rows (one per hitter) with percentiles across all hitters.
+    hg_stats: hitter_stats_from(state.hitter_groups), if already computed (e.g. by pool workers)."""
+    hg = state.hitter_groups
+    hg_counts = hg.count('n')
+    if hg_stats is None:
+        hg_stats = hitter_stats_from(hg)
+
+    hitter_leaderboard = []
+    for g, (hitter, team, stands) in enumerate(hg.keys):
         row = {
             'hitter': hitter,
             'team': team,
             'stands': stands,
-            'count': len(pitches),
+            'count': hg_counts[g],
         }
-        row.update(compute_hitter_stats(pitches))
+        row.update(hg_stats[g])
         hitter_leaderboard.append(row)
 
     # Compute percentiles across all hitters
-    for stat in HITTER_STAT_KEYS:
-        compute_percentile_ranks(hitter_leaderboard, stat)
+    compute_percentile_ranks_batch(hitter_leaderboard, HITTER_STAT_KEYS)
 
     # Invert percentiles where lower is better (Swing%, Chase%, Whiff%, GB%)
     for row in hitter_leaderboard:
@@ -550,29 +2289,51 @@ def main():
             if row.get(pctl_key) is not None:
                 row[pctl_key] = 100 - row[pctl_key]
 
-    hitter_leaderboard.sort(key=lambda r: r['count'], reverse=True)
-    print(f"Hitter leaderboard: {len(hitter_leaderboard)} rows")
+    hitter_leaderboard.sort(key=count_then('hitter', 'team', 'stands'))
+    return hitter_leaderboard
 
-    # --- Hitter pitch details: per-hitter breakdown by pitch type faced ---
-    hitter_pitch_details = {}
-    for (hitter, team, stands), pitches in hitter_groups.items():
-        pt_map = defaultdict(list)
-        for p in pitches:
-            pt = p.get('Pitch Type')
-            if pt:
-                pt_map[pt].append(p)
 
+def build_hitter_pitch_details(state, cell_stats=None):
+    """Per-hitter breakdown by pitch type faced (cell_stats as for build_hitter_leaderboard)."""
+    cells = state.hitter_cells
+    cell_counts = cells.count('n')
+    if cell_stats is None:
+        cell_stats = hitter_stats_from(cells)
+
+    cells_by_group = defaultdict(list)
+    for c, (hitter, team, stands, pt) in enumerate(cells.keys):
+        if pt:
+            cells_by_group[(hitter, team, stands)].append((pt, c))
+
+    hitter_pitch_details = {}
+    for hitter, team, stands in state.hitter_groups.keys:
         details = []
-        for pt, pt_pitches in sorted(pt_map.items()):
+        for pt, c in sorted(cells_by_group[(hitter, team, stands)]):
             entry = {
                 'pitchType': pt,
-                'count': len(pt_pitches),
+                'count': cell_counts[c],
             }
-            entry.update(compute_hitter_stats(pt_pitches))
+            entry.update(cell_stats[c])
             details.append(entry)
         # Sort by count desc
         details.sort(key=lambda x: x['count'], reverse=True)
         hitter_pitch_details[hitter] = details
+    return hitter_pitch_details
+
+
+def build_metadata(state, league_avgs, pitcher_leaderboard, hitter_leaderboard):
+    """Teams, pitch types, totals and the league averages per leaderboard."""
+    all_teams = set(key[1] for key in state.pitch_groups.keys if key[1])
+    hitter_teams = set(key[1] for key in state.hitter_groups.keys if key[1])
+    all_pitch_types = sorted(set(key[2] for key in state.pitch_groups.keys if key[2]))
+
+    # League averages for pitcher leaderboard (across all pitchers)
+    pitcher_league_avgs = {}
+    for stat in STAT_KEYS:
+        vals = [r[stat] for r in pitcher_leaderboard if r.get(stat) is not None]
+        if vals:
+            pitcher_league_avgs[stat] = round(sum(vals) / len(vals), 4)
+    pitcher_league_avgs['count'] = len(pitcher_leaderboard)
 
     # Hitter league averages
     hitter_league_avgs = {}
@@ -582,12 +2343,11 @@ def main():
             hitter_league_avgs[stat] = round(sum(vals) / len(vals), 4)
     hitter_league_avgs['count'] = len(hitter_leaderboard)
 
-    # --- Metadata ---
-    metadata = {
-        'teams': all_teams_combined,
+    return {
+        'teams': sorted(all_teams | hitter_teams),
         'pitchTypes': all_pitch_types,
         'generatedAt': datetime.now().strftime('%Y-%m-%d %H:%M'),
-        'totalPitches': len(all_pitches),
+        'totalPitches': sum(state.pitch_groups.count('n')),
         'totalPitchers': len(pitcher_leaderboard),
         'totalHitters': len(hitter_leaderboard),
         'leagueAverages': league_avgs,
@@ -595,44 +2355,910 @@ def main():
         'hitterLeagueAverages': hitter_league_avgs,
     }
 
-    # Write JSON files
-    with open(os.path.join(DATA_DIR, 'pitch_leaderboard.json'), 'w') as f:
-        json.dump(pitch_leaderboard, f)
-    with open(os.path.join(DATA_DIR, 'pitcher_leaderboard.json'), 'w') as f:
-        json.dump(pitcher_leaderboard, f)
-    with open(os.path.join(DATA_DIR, 'hitter_leaderboard.json'), 'w') as f:
-        json.dump(hitter_leaderboard, f)
-    with open(os.path.join(DATA_DIR, 'metadata.json'), 'w') as f:
-        json.dump(metadata, f, indent=2)
-
-    # Write embedded JS fallback (for file:// usage)
-    with open(os.path.join(DATA_DIR, 'data_embedded.js'), 'w') as f:
-        f.write('// Auto-generated — do not edit\n')
-        f.write('window.PITCH_DATA = ')
-        json.dump(pitch_leaderboard, f)
-        f.write(';\n')
-        f.write('window.PITCHER_DATA = ')
-        json.dump(pitcher_leaderboard, f)
-        f.write(';\n')
-        f.write('window.HITTER_DATA = ')
-        json.dump(hitter_leaderboard, f)
-        f.write(';\n')
-        f.write('window.METADATA = ')
-        json.dump(metadata, f)
-        f.write(';\n')
-        f.write('window.PITCH_DETAILS = ')
-        json.dump(pitch_details, f)
-        f.write(';\n')
-        f.write('window.HITTER_PITCH_DETAILS = ')
-        json.dump(hitter_pitch_details, f)
-        f.write(';\n')
-
-    print(f"\nOutput written to {DATA_DIR}/")
-    print(f"  pitch_leaderboard.json  ({len(pitch_leaderboard)} rows)")
-    print(f"  pitcher_leaderboard.json ({len(pitcher_leaderboard)} rows)")
-    print(f"  hitter_leaderboard.json  ({len(hitter_leaderboard)} rows)")
-    print(f"  metadata.json")
+
+# --- Rolling windows: last-N-days leaderboards rolled up from the per-day groups ---
+def game_days(dates, titles, year=SEASON_YEAR):
+    """Game day (ISO date) of every row of a typed table: the date in its Date cell or, failing
+    that, in its worksheet's title (None if neither has one). titles lists (worksheet title,
+    rows) for the sheets the table was read from, in order. Each distinct cell is parsed once."""
+    fallback = []
+    for title, n in titles:
+        day = worksheet_date(title, year)
+        fallback.extend([day and day.isoformat()] * n)
+    fallback.extend([None] * (len(dates) - len(fallback)))
+    parsed = {None: None}
+    for cell in set(dates.tolist()) - {None}:
+        day = worksheet_date(cell, year)
+        parsed[cell] = day and day.isoformat()
+    days = np.empty(len(dates), dtype=object)
+    days[:] = [parsed[cell] or default for cell, default in zip(dates.tolist(), fallback)]
+    return days
+
+
+def window_start(latest, n_days):
+    """First day (ISO date) of the n_days-day window ending on latest."""
+    return (date.fromisoformat(latest) - timedelta(days=n_days - 1)).isoformat()
+
+
+def window_groups(days_acc, first, acc):
+    """Roll the per-day groups from day `first` on up into acc, keyed without the day (the keys in
+    sorted order, so the result does not depend on the order the days were folded in)."""
+    selected = [g for g, key in enumerate(days_acc.keys) if key[0] is not None and key[0] >= first]
+    keys = sorted({days_acc.keys[g][1:] for g in selected}, key=lambda key: tuple(v or '' for v in key))
+    acc.index = {key: g for g, key in enumerate(keys)}
+    acc.keys = keys
+    return acc.merge(days_acc.take(selected), [acc.index[days_acc.keys[g][1:]] for g in selected])
+
+
+def build_windows(state):
+    """The pitch, pitcher and hitter leaderboards of every rolling window in WINDOW_DAYS, ending on
+    the latest game day: {'7d': {'days', 'from', 'to', 'pitch', 'pitcher', 'hitter'}, ...}, empty
+    if no pitch had a date. Each window's groups are merged from the per-day groups, then go
+    through the season builders (stats, percentiles within the window)."""
+    latest = state.latest_day()
+    windows = {}
+    if latest is None:
+        return windows
+    for n_days in WINDOW_DAYS:
+        first = window_start(latest, n_days)
+        window = AggregateState()
+        window.pitch_groups = window_groups(state.pitch_days, first, new_pitch_accumulator(exact=True))
+        window.hitter_groups = window_groups(state.hitter_days, first, new_hitter_accumulator(exact=True))
+        windows[f'{n_days}d'] = {
+            'days': n_days,
+            'from': first,
+            'to': latest,
+            'pitch': build_pitch_leaderboard(window)[0],
+            'pitcher': build_pitcher_leaderboard(window),
+            'hitter': build_hitter_leaderboard(window),
+        }
+    return windows
+
+
+def build_pitching_outputs(state, only, pooled=None):
+    """The artifacts in `only` that come from the pitching sheets alone: the pitch and pitcher
+    leaderboards, pitch details and summaries. pooled: (pitch leaderboard, league averages,
+    pitcher leaderboard) if the pool stages computed them. Returns ({artifact name: value},
+    pitch-type league averages or None when the pitch leaderboard is not rebuilt)."""
+    outputs, league_avgs = {}, None
+    if pooled is not None:
+        outputs['pitch_leaderboard'], league_avgs, outputs['pitcher_leaderboard'] = pooled
+    else:
+        if 'pitch' in only:
+            with REPORT.stage('pitch leaderboard') as st:
+                outputs['pitch_leaderboard'], league_avgs = build_pitch_leaderboard(state)
+                st['rows'] = len(outputs['pitch_leaderboard'])
+        if 'pitcher' in only:
+            with REPORT.stage('pitcher leaderboard') as st:
+                outputs['pitcher_leaderboard'] = build_pitcher_leaderboard(state)
+                st['rows'] = len(outputs['pitcher_leaderboard'])
+    if 'details' in only:
+        with REPORT.stage('pitch details') as st:
+            st['shards'] = state.pitch_details.build_shards()
+        outputs['pitch_details'] = state.pitch_details
+    return outputs, league_avgs
+
+
+def build_hitting_outputs(state, only, pooled=None):
+    """The artifacts in `only` that come from the hitting sheets alone: the hitter leaderboard and
+    hitter pitch details. pooled: (hitter stats, hitter x pitch-type cell stats) if the pool
+    stages computed them. Returns {artifact name: value}."""
+    hg_stats, cell_stats = pooled or (None, None)
+    outputs = {}
+    if 'hitter' in only:
+        with REPORT.stage('hitter leaderboard') as st:
+            outputs['hitter_leaderboard'] = build_hitter_leaderboard(state, hg_stats)
+            st['rows'] = len(outputs['hitter_leaderboard'])
+    if 'details' in only:
+        with REPORT.stage('hitter details') as st:
+            outputs['hitter_pitch_details'] = build_hitter_pitch_details(state, cell_stats)
+            st['rows'] = len(outputs['hitter_pitch_details'])
+    return outputs
+
+
+def finish_book(state, book, only):
+    """build_pitching_outputs / build_hitting_outputs for one book (BOOK_NAMES), in a report stage
+    of its own: main() runs it for a book as soon as fold_sheets has folded it."""
+    with REPORT.stage(f'finish {book}', profile=True):
+        if book == 'pitching':
+            return build_pitching_outputs(state, only)
+        return build_hitting_outputs(state, only)
+
+
+def build_outputs(state, workers=1, only=None, previous=None, finished=None):
+    """Every leaderboard artifact, recomputed from the aggregate state (percentiles and league
+    averages always cover the whole season, not just the worksheets folded in this run).
+    With workers > 1 the stages run on a process pool (see run_stages_in_pool).
+
+    `only` limits the rebuild to some of the ARTIFACTS; the others are taken from `previous`
+    (load_previous_outputs), as are the pitch-type league averages when the pitch leaderboard is
+    not rebuilt. `finished` holds the finish_book results of books already built (while the other
+    was still being folded). Windows and metadata need both books; metadata always follows the
+    leaderboards it is built from."""
+    only = set(only or ARTIFACTS)
+    outputs = dict(previous or {})
+    finished = dict(finished or {})
+    if workers > 1 and only == set(ARTIFACTS) and not finished:
+        with REPORT.stage('pool stages') as st:
+            pitch, pitcher_leaderboard, hg_stats, cell_stats = run_stages_in_pool(state, workers)
+            st['workers'] = workers
+        finished['pitching'] = build_pitching_outputs(state, only, (*pitch, pitcher_leaderboard))
+        finished['hitting'] = build_hitting_outputs(state, only, (hg_stats, cell_stats))
+    if 'pitching' not in finished:
+        finished['pitching'] = build_pitching_outputs(state, only)
+    if 'hitting' not in finished:
+        finished['hitting'] = build_hitting_outputs(state, only)
+    pitching, league_avgs = finished['pitching']
+    outputs.update(pitching)
+    outputs.update(finished['hitting'])
+    if 'pitch' in only:
+        print(f"Pitch leaderboard: {len(outputs['pitch_leaderboard'])} rows")
+    if 'pitcher' in only:
+        print(f"Pitcher leaderboard: {len(outputs['pitcher_leaderboard'])} rows")
+    if 'details' in only:
+        pitch_details = outputs['pitch_details']
+        print(f"Pitch details: {pitch_details.size} pitches for {pitch_details.pitcher_count} pitchers")
+    if 'hitter' in only:
+        print(f"Hitter leaderboard: {len(outputs['hitter_leaderboard'])} rows")
+    if 'windows' in only:
+        with REPORT.stage('rolling windows') as st:
+            outputs['windows'] = build_windows(state)
+            st['rows'] = sum(len(w[tab]) for w in outputs['windows'].values() for tab in WINDOW_TABS)
+        for key, window in outputs['windows'].items():
+            print(f"Last {window['days']} days ({window['from']} to {window['to']}): {len(window['pitch'])} pitch, "
+                  f"{len(window['pitcher'])} pitcher, {len(window['hitter'])} hitter rows")
+    # Metadata is cheap and summarises the other artifacts, so it is always rebuilt
+    if league_avgs is None:
+        league_avgs = outputs['metadata']['leagueAverages']
+    outputs['metadata'] = build_metadata(state, league_avgs, outputs['pitcher_leaderboard'],
+                                         outputs['hitter_leaderboard'])
+    outputs['metadata']['windows'] = [{'key': key, 'days': w['days'], 'from': w['from'], 'to': w['to']}
+                                      for key, w in outputs['windows'].items()]
+    return outputs
+
+
+# --- Selective rebuilds (--only): artifacts not rebuilt are reused from the previous outputs ---
+ARTIFACTS = ('pitch', 'pitcher', 'hitter', 'details', 'windows', 'metadata')
+ARTIFACT_BOOKS = {  # the spreadsheets (BOOK_NAMES) an artifact is aggregated from
+    'pitch': ('pitching',),
+    'pitcher': ('pitching',),
+    'hitter': ('hitting',),
+    'details': ('pitching', 'hitting'),
+    'windows': ('pitching', 'hitting'),
+    'metadata': ('pitching', 'hitting'),
+}
+
+
+def load_previous_outputs(data_dir, names):
+    """The artifacts in `names` as the last run wrote them to data_dir, in build_outputs() form
+    (leaderboards as rows, details as their shard manifest, windows read back from their
+    scripts), plus the previous metadata, which is always needed. Exits if one of them is missing."""
+    paths = {'pitch': HASHED_FILES['pitch_leaderboard'], 'pitcher': HASHED_FILES['pitcher_leaderboard'],
+             'hitter': HASHED_FILES['hitter_leaderboard'], 'details': HASHED_FILES['details_manifest'],
+             'metadata': 'metadata.json'}
+    metadata = load_cached_sheet(os.path.join(data_dir, paths['metadata']))
+    if metadata is None:
+        raise SystemExit(f"--only: no metadata.json in {data_dir} to reuse (run without --only first)")
+    previous = {'metadata': {k: v for k, v in metadata.items() if k not in ('files', 'contentHash')}}
+    for name in sorted(set(names) - {'metadata'}, key=ARTIFACTS.index):
+        if name == 'windows':
+            if 'windows' not in metadata:
+                raise SystemExit(f"--only: no rolling windows in {data_dir} to reuse (run without --only first)")
+            previous['windows'] = {}
+            for entry in metadata['windows']:
+                path = metadata['files'][f"window_{entry['key']}"]
+                window = read_window_script(os.path.join(data_dir, path))
+                if window is None:
+                    raise SystemExit(f"--only: no {path} in {data_dir} to reuse (run without --only first)")
+                previous['windows'][entry['key']] = window
+            continue
+        value = load_cached_sheet(os.path.join(data_dir, paths[name]))
+        if value is None:
+            raise SystemExit(f"--only: no {paths[name]} in {data_dir} to reuse (run without --only first)")
+        if name == 'details':
+            previous['details_manifest'] = value
+        else:
+            previous[f'{name}_leaderboard'] = table_rows(value)
+    return previous
+
+
+# --- --since: only fold worksheets from a given date on (dated by their title) ---
+def worksheet_date(title, year):
+    """The date in a worksheet title ('2026-03-05', '3/5/2026', '3/5/26', '3-5' or '3/5', the last
+    two in `year`), or None if it has none."""
+    m = re.search(r'(\d{4})-(\d{1,2})-(\d{1,2})', title)
+    if m:
+        y, month, day = (int(g) for g in m.groups())
+    else:
+        m = re.search(r'(?<!\d)(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2}|\d{4}))?(?!\d)', title)
+        if not m:
+            return None
+        month, day = int(m.group(1)), int(m.group(2))
+        y = int(m.group(3)) if m.group(3) else year
+        if y < 100:
+            y += 2000
+    try:
+        return date(y, month, day)
+    except ValueError:
+        return None
+
+
+def worksheets_since(unseen, since):
+    """Per book, the unseen (worksheet, fingerprint) pairs dated `since` or later (titles without
+    a date always count), and how many were left for a later run."""
+    kept, skipped = [], 0
+    for book_unseen in unseen:
+        book_kept = []
+        for ws, fp in book_unseen:
+            ws_date = worksheet_date(ws.title, since.year)
+            if ws_date is None or ws_date >= since:
+                book_kept.append((ws, fp))
+        skipped += len(book_unseen) - len(book_kept)
+        kept.append(book_kept)
+    return kept, skipped
+
+
+# --- Process-pool stages: workers map the state's arrays from shared memory ---
+_worker_states = {}  # shared-memory spec id -> (state, blocks) attached in this worker process
+
+
+class SharedArrays:
+    """Named numpy arrays copied once into shared memory blocks. spec is small and picklable;
+    attach_shared_arrays(spec) maps the same memory in another process without copying."""
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.spec = {}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            block = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+            np.ndarray(arr.shape, arr.dtype, buffer=block.buf)[...] = arr
+            self.blocks.append(block)
+            self.spec[name] = (block.name, arr.shape, arr.dtype.str)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+def attach_shared_arrays(spec):
+    """(arrays, blocks) for a SharedArrays spec; keep the blocks alive while the arrays are used."""
+    arrays, blocks = {}, []
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+    return arrays, blocks
+
+
+def _worker_state(spec, keys):
+    key = min(block_name for block_name, _, _ in spec.values())
+    if key not in _worker_states:
+        arrays, blocks = attach_shared_arrays(spec)
+        _worker_states.clear()
+        _worker_states[key] = (AggregateState.from_groups(arrays, keys), blocks)
+    return _worker_states[key][0]
+
+
+def _run_stage(spec, keys, stage, lo=None, hi=None):
+    """One stage on a pool worker, against the state mapped from shared memory."""
+    state = _worker_state(spec, keys)
+    if stage == 'pitch':
+        return build_pitch_leaderboard(state)
+    if stage == 'pitcher':
+        return build_pitcher_leaderboard(state)
+    return hitter_stats_from(getattr(state, stage).subset(lo, hi))  # 'hitter_groups' / 'hitter_cells' chunk
+
+
+def chunk_bounds(n, chunks):
+    """(lo, hi) ranges splitting range(n) into at most `chunks` contiguous parts."""
+    step = max(1, -(-n // max(1, chunks)))
+    return [(lo, min(n, lo + step)) for lo in range(0, n, step)]
+
+
+def run_stages_in_pool(state, workers):
+    """Run the pitch and pitcher leaderboard stages and the hitter / hitter x pitch-type stats,
+    split into chunks of groups, on a pool of `workers` processes. The accumulators' arrays
+    are shared, not pickled; each task only ships its group keys and returns its rows.
+    Returns ((pitch rows, league averages), pitcher rows, hitter stats, hitter cell stats)."""
+    shared = SharedArrays(state.group_arrays())
+    keys = state.group_keys()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pitch = pool.submit(_run_stage, shared.spec, keys, 'pitch')
+            pitcher = pool.submit(_run_stage, shared.spec, keys, 'pitcher')
+            chunked = {}
+            for name in ('hitter_groups', 'hitter_cells'):
+                bounds = chunk_bounds(getattr(state, name).n_groups, 2 * workers)
+                chunked[name] = [pool.submit(_run_stage, shared.spec, keys, name, lo, hi) for lo, hi in bounds]
+            results = pitch.result(), pitcher.result()
+            stats = [[row for future in chunked[name] for row in future.result()]
+                     for name in ('hitter_groups', 'hitter_cells')]
+    finally:
+        shared.close()
+    return results + tuple(stats)
+
+
+def diff_outputs(a, b):
+    """Names of the artifacts that differ between two build_outputs() results
+    (metadata['generatedAt'] aside)."""
+    def canonical(name, value):
+        if name == 'metadata':
+            value = {k: v for k, v in value.items() if k != 'generatedAt'}
+        elif isinstance(value, PitchDetailStore):
+            value = value.digests('pitchers'), value.digests('summaries')
+        return json.dumps(value)
+    return [name for name in a if canonical(name, a[name]) != canonical(name, b[name])]
+
+
+# --- Detail shards: per-player pitch details / pitch-type breakdowns, loaded by the page on demand ---
+DETAILS_DIR = 'details'  # under DATA_DIR: manifest.json, {pitchers,summaries,hitters}/<shard>.js
+DETAIL_SHARD_BITS = 8    # 256 shards per kind, named by the top bits of the player name's FNV-1a hash
+
+
+def fnv1a_32(text):
+    """32-bit FNV-1a hash of text's UTF-8 bytes (mirrored by DataStore.detailShard in js/data.js)."""
+    h = 0x811c9dc5
+    for byte in text.encode('utf-8'):
+        h = ((h ^ byte) * 0x01000193) & 0xffffffff
+    return h
+
+
+def detail_shard(name, bits=DETAIL_SHARD_BITS):
+    """Shard id of a player name: the top `bits` bits of its hash, as fixed-width hex."""
+    return format(fnv1a_32(name) >> (32 - bits), f'0{(bits + 3) // 4}x')
+
+
+def detail_shard_script(kind, shard, details):
+    """The script of one detail shard: DataStore.addDetailShard(kind, shard, {player: details}),
+    players sorted, so it loads from file:// and http alike. details can be any mapping (a
+    player's details are only looked up as the script is built)."""
+    return (f'DataStore.addDetailShard({json.dumps(kind)}, {json.dumps(shard)}, '
+            + json.dumps({name: details[name] for name in sorted(details)}, separators=(',', ':'))
+            + ');\n').encode('utf-8')
+
+
+def read_detail_shard(path):
+    """{player: details} back from a detail_shard_script() file. Exits if it is unreadable."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            match = re.fullmatch(r'DataStore\.addDetailShard\("\w+", "\w+", (.*)\);\n', f.read(), re.S)
+    except OSError:
+        match = None
+    if match is None:
+        raise SystemExit(f"Cannot read the detail shard {path}: run with --full-rebuild")
+    return json.loads(match.group(1))
+
+
+def write_detail_shards(details, folder, kind):
+    """Write {player: details} as one detail_shard_script() per shard under folder. Files are
+    named <shard>.<content hash>.js (unchanged shards are left alone) and those of earlier builds
+    are removed. Returns {shard: content hash}."""
+    shards = defaultdict(dict)
+    for name, value in details.items():
+        shards[detail_shard(name)][name] = value
+    os.makedirs(folder, exist_ok=True)
+    digests = {}
+    for shard in sorted(shards):
+        data = detail_shard_script(kind, shard, shards[shard])
+        digests[shard] = content_hash(data)
+        write_if_changed(os.path.join(folder, f'{shard}.{digests[shard]}.js'), data)
+    remove_stale_shards(folder, digests)
+    return digests
+
+
+def install_detail_shards(store, kind, folder):
+    """Write the shards of `kind` a PitchDetailStore holds to folder: those build_shards rebuilt
+    are copied from where it staged them, the others are already there (or are copied from where
+    an earlier run wrote them). Files of earlier builds are removed. Returns {shard: content hash}."""
+    os.makedirs(folder, exist_ok=True)
+    digests = store.digests(kind)
+    for shard, digest in digests.items():
+        source, path = store.script_path(kind, shard), os.path.join(folder, f'{shard}.{digest}.js')
+        if os.path.abspath(source) == os.path.abspath(path):
+            REPORT.count('filesUnchanged')
+            continue
+        with open(source, 'rb') as f:
+            write_if_changed(path, f.read())
+    remove_stale_shards(folder, digests)
+    return digests
+
+
+def remove_stale_shards(folder, digests):
+    """Delete the shard scripts in folder other than those of {shard: content hash}."""
+    keep = {f'{shard}.{digest}.js' for shard, digest in digests.items()}
+    for file_name in os.listdir(folder):
+        if file_name.endswith('.js') and file_name not in keep:
+            os.remove(os.path.join(folder, file_name))
+
+
+# --- Rolling-window scripts: one per window, loaded by the page when its period is picked ---
+WINDOWS_DIR = 'windows'  # under DATA_DIR: <key>.<content hash>.js, listed in metadata['files']
+WINDOW_TABS = ('pitch', 'pitcher', 'hitter')
+
+
+def write_window_scripts(windows, folder, encode):
+    """Write each build_windows() window as a script calling DataStore.addWindow(key, window), with
+    its leaderboards encoded like the season ones and their filter indexes under 'indexes' (tab ->
+    filter_index), so it loads from file:// and http alike and filters like the season.
+    Files are named <key>.<content hash>.js and those of earlier builds are removed.
+    Returns {key: path under the data directory}."""
+    os.makedirs(folder, exist_ok=True)
+    paths, keep = {}, set()
+    for key, window in windows.items():
+        encoded = dict(window, **{tab: encode(window[tab]) for tab in WINDOW_TABS})
+        encoded['indexes'] = {tab: filter_index(window[tab], name_col, facets)
+                              for tab, (_, name_col, facets) in zip(WINDOW_TABS, FILTER_INDEXES.values())}
+        data = f'DataStore.addWindow({json.dumps(key)}, '.encode('utf-8') + canonical_json(encoded) + b');\n'
+        file_name = f'{key}.{content_hash(data)}.js'
+        keep.add(file_name)
+        write_if_changed(os.path.join(folder, file_name), data)
+        paths[key] = f'{WINDOWS_DIR}/{file_name}'
+    for file_name in os.listdir(folder):
+        if file_name.endswith('.js') and file_name not in keep:
+            os.remove(os.path.join(folder, file_name))
+    return paths
+
+
+def read_window_script(path):
+    """A window as write_window_scripts() wrote it, leaderboards back as rows (None if unreadable)."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            match = re.fullmatch(r'DataStore\.addWindow\("\w+", (.*)\);\n', f.read(), re.S)
+    except OSError:
+        return None
+    if match is None:
+        return None
+    window = json.loads(match.group(1))
+    window.pop('indexes', None)
+    for tab in WINDOW_TABS:
+        window[tab] = table_rows(window[tab])
+    return window
+
+
+# --- Compact columnar leaderboards (--compact), decoded back into rows by DataStore.decodeTable ---
+COMPACT_DECIMALS = 4  # rates (izPct, whiffPct, ...) are quantized to this; display needs 3
+PRECOMPRESS_FORMATS = {'gzip': '.gz', 'brotli': '.br'}
+
+
+def columnar_table(rows):
+    """A list of row dicts as {"format": "columnar", "rows", "columns", "data"}: one value array
+    per column, in the rows' key order. Column entries in "columns" describe the encoding:
+      "dict":   text column stored as indices into this list (when values repeat enough to pay off)
+      "scale":  float column stored as round(value * scale); the decoder divides by scale. scale is
+                10**d for the fewest decimals d that keep every value exact, capping at COMPACT_DECIMALS
+      "absent": row indices that lack the key (rather than holding null)
+    Integer columns (counts, percentiles, spin) and nulls are stored as-is."""
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    columns, data = [], []
+    for name in names:
+        column = {'name': name}
+        values = [row.get(name) for row in rows]
+        present = [v for v in values if v is not None]
+        if present and all(isinstance(v, str) for v in present):
+            distinct = list(dict.fromkeys(present))
+            if 2 * len(distinct) <= len(present):
+                index = {v: i for i, v in enumerate(distinct)}
+                column['dict'] = distinct
+                values = [None if v is None else index[v] for v in values]
+        elif any(isinstance(v, float) for v in present):
+            decimals = next((d for d in range(COMPACT_DECIMALS) if all(v == round(v, d) for v in present)),
+                            COMPACT_DECIMALS)
+            column['scale'] = scale = 10 ** decimals
+            values = [None if v is None else round(round(v, decimals) * scale) for v in values]
+        absent = [i for i, row in enumerate(rows) if name not in row]
+        if absent:
+            column['absent'] = absent
+        columns.append(column)
+        data.append(values)
+    return {'format': 'columnar', 'rows': len(rows), 'columns': columns, 'data': data}
+
+
+def table_rows(table):
+    """Row dicts from a columnar_table() result (rows pass through unchanged)."""
+    if not isinstance(table, dict) or table.get('format') != 'columnar':
+        return table
+    rows = [{} for _ in range(table['rows'])]
+    for column, values in zip(table['columns'], table['data']):
+        name, lookup, scale = column['name'], column.get('dict'), column.get('scale')
+        for row, v in zip(rows, values):
+            if v is not None and lookup is not None:
+                v = lookup[v]
+            elif v is not None and scale is not None:
+                v = v / scale
+            row[name] = v
+        for i in column.get('absent', ()):
+            del rows[i][name]
+    return rows
+
+
+def write_precompressed(path, data, formats):
+    """Write <path>.gz / <path>.br (data compressed) for the requested formats, for static hosts that
+    serve pre-compressed files, and remove siblings of formats not requested so none go stale."""
+    for fmt, suffix in PRECOMPRESS_FORMATS.items():
+        if fmt not in formats:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        elif fmt == 'gzip':
+            write_if_changed(path + suffix, gzip.compress(data, compresslevel=9, mtime=0))
+        else:
+            write_if_changed(path + suffix, import_brotli().compress(data))
+
+
+def import_brotli():
+    """The brotli module; only needed for --precompress brotli."""
+    try:
+        import brotli
+    except ImportError:
+        raise SystemExit("--precompress brotli needs the brotli package (pip install brotli)")
+    return brotli
+
+
+# --- Filter indexes: row-id lists DataStore.getFilteredData intersects instead of scanning rows ---
+FILTER_INDEXES = {  # index artifact -> (leaderboard, name column, facet columns), in WINDOW_TABS order
+    'pitch_index': ('pitch_leaderboard', 'pitcher', ('team', 'throws', 'pitchType')),
+    'pitcher_index': ('pitcher_leaderboard', 'pitcher', ('team', 'throws')),
+    'hitter_index': ('hitter_leaderboard', 'hitter', ('team', 'stands')),
+}
+
+
+def name_words(name):
+    """Normalised search words of a name: accents stripped, lower-cased, split on anything that is
+    not a letter or digit (mirrored by DataStore.nameWords in js/data.js)."""
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', name) if not unicodedata.combining(ch))
+    return re.findall(r'[^\W_]+', text.lower())
+
+
+def filter_index(rows, name_col, facets):
+    """Index of a leaderboard's rows (ids are positions in the written file):
+      by:        facet column -> value -> row ids (rows with no value are left out)
+      names:     distinct names, nameRows: the row ids of each
+      words:     every name word (name_words), sorted by UTF-16 code units as JS compares strings,
+                 wordNames: the ids in `names` of the names containing each word
+    A search matches a name when each query word is a prefix of one of its words, found with a
+    binary search over `words`."""
+    by = {col: defaultdict(list) for col in facets}
+    names, name_rows = {}, []
+    for i, row in enumerate(rows):
+        for col in facets:
+            if row.get(col) is not None:
+                by[col][row[col]].append(i)
+        name = row.get(name_col)
+        if name is not None:
+            if name not in names:
+                names[name] = len(name_rows)
+                name_rows.append([])
+            name_rows[names[name]].append(i)
+    word_names = defaultdict(set)
+    for name, j in names.items():
+        for word in name_words(name):
+            word_names[word].add(j)
+    words = sorted(word_names, key=lambda w: w.encode('utf-16-be'))
+    return {
+        'rows': len(rows),
+        'by': {col: dict(sorted(values.items())) for col, values in by.items()},
+        'names': list(names),
+        'nameRows': name_rows,
+        'words': words,
+        'wordNames': [sorted(word_names[w]) for w in words],
+    }
+
+
+# --- Content-addressed writes: byte-identical reruns touch no files ---
+CONTENT_HASH_CHARS = 16  # hex digits of SHA-256 in hashed file names and metadata['contentHash']
+HASHED_FILES = {  # metadata['files'] key -> path under data_dir also published as <stem>.<hash><ext>
+    'pitch_leaderboard': 'pitch_leaderboard.json',
+    'pitcher_leaderboard': 'pitcher_leaderboard.json',
+    'hitter_leaderboard': 'hitter_leaderboard.json',
+    'pitch_index': 'pitch_index.json',
+    'pitcher_index': 'pitcher_index.json',
+    'hitter_index': 'hitter_index.json',
+    'details_manifest': os.path.join(DETAILS_DIR, 'manifest.json'),
+}
+
+
+def content_hash(data):
+    """Short SHA-256 hex digest of bytes."""
+    return hashlib.sha256(data).hexdigest()[:CONTENT_HASH_CHARS]
+
+
+def hashed_path(path, digest):
+    """pitch_leaderboard.json -> pitch_leaderboard.<digest>.json"""
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{digest}{ext}'
+
+
+def write_if_changed(path, data):
+    """Write bytes to path (atomically) unless it already holds exactly them, so unchanged outputs
+    keep their mtime and produce no git diff. Returns True if the file was written."""
+    try:
+        with open(path, 'rb') as f:
+            unchanged = f.read() == data
+    except OSError:
+        unchanged = False
+    if unchanged:
+        REPORT.count('filesUnchanged')
+        return False
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    REPORT.count('filesWritten')
+    return True
+
+
+def remove_stale_hashed(path, keep):
+    """Delete hashed copies of path (and their .gz / .br siblings) other than `keep`."""
+    folder, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    pattern = re.compile(rf'{re.escape(stem)}\.[0-9a-f]{{{CONTENT_HASH_CHARS}}}{re.escape(ext)}(\.gz|\.br)?')
+    for file_name in os.listdir(folder):
+        match = pattern.fullmatch(file_name)
+        if match and file_name[:len(file_name) - len(match.group(1) or '')] != os.path.basename(keep):
+            os.remove(os.path.join(folder, file_name))
+
+
+def canonical_json(value, indent=None):
+    """JSON bytes for an artifact: key order as built (rows are already in a stable order), compact
+    separators unless indented, floats in Python's shortest round-trip form (round_float keeps
+    -0.0 out)."""
+    separators = None if indent else (',', ':')
+    return json.dumps(value, indent=indent, separators=separators).encode('utf-8')
+
+
+def write_outputs(outputs, data_dir, compact=False, precompress=()):
+    """Write the leaderboard JSON files, the detail shards and the embedded JS fallback to data_dir.
+    compact writes the leaderboards as columnar tables (see columnar_table); precompress lists the
+    PRECOMPRESS_FORMATS to write next to the leaderboards, metadata and embedded script.
+
+    Serialisation is deterministic and every write is skipped when the bytes are unchanged. The
+    HASHED_FILES are also published as <name>.<content hash>.json (listed in metadata['files'],
+    safe to cache forever). metadata['contentHash'] covers everything but generatedAt, which keeps
+    its previous value when the content hash has not changed, so a run on unchanged sheets
+    rewrites nothing."""
+    encode = columnar_table if compact else (lambda rows: rows)
+    artifacts = {name: canonical_json(encode(outputs[name]))
+                 for name in ('pitch_leaderboard', 'pitcher_leaderboard', 'hitter_leaderboard')}
+    for name, (leaderboard, name_col, facets) in FILTER_INDEXES.items():
+        artifacts[name] = canonical_json(filter_index(outputs[leaderboard], name_col, facets))
+
+    # Per-player details go to shards the page loads when a player is opened (left as they are
+    # when the details were not rebuilt: outputs then carry the previous shard manifest)
+    details_dir = os.path.join(data_dir, DETAILS_DIR)
+    details_manifest = outputs.get('details_manifest')
+    if 'pitch_details' in outputs:
+        details_manifest = {
+            'hash': 'fnv1a-32',
+            'shardBits': DETAIL_SHARD_BITS,
+            'summaryBins': {'movement': MOVEMENT_BIN, 'velocity': VELO_BIN},
+            'pitchers': install_detail_shards(outputs['pitch_details'], 'pitchers',
+                                              os.path.join(details_dir, 'pitchers')),
+            'summaries': install_detail_shards(outputs['pitch_details'], 'summaries',
+                                               os.path.join(details_dir, 'summaries')),
+            'hitters': write_detail_shards(outputs['hitter_pitch_details'], os.path.join(details_dir, 'hitters'),
+                                           'hitters'),
+        }
+    artifacts['details_manifest'] = canonical_json(details_manifest, indent=2)
+    files = {name: hashed_path(HASHED_FILES[name], content_hash(data)) for name, data in artifacts.items()}
+    window_files = write_window_scripts(outputs['windows'], os.path.join(data_dir, WINDOWS_DIR), encode)
+    files.update((f'window_{key}', path) for key, path in window_files.items())
+
+    metadata = dict(outputs['metadata'], files=files)
+    content = {k: v for k, v in metadata.items() if k != 'generatedAt'}
+    metadata['contentHash'] = content_hash(json.dumps(content, sort_keys=True).encode('utf-8'))
+    metadata_path = os.path.join(data_dir, 'metadata.json')
+    previous = load_cached_sheet(metadata_path) or {}
+    if previous.get('contentHash') == metadata['contentHash'] and 'generatedAt' in previous:
+        metadata['generatedAt'] = previous['generatedAt']
+    artifacts['metadata'] = canonical_json(metadata, indent=2)
+
+    # Embedded JS fallback (for file:// usage)
+    artifacts['data_embedded'] = b''.join([
+        '// Auto-generated — do not edit\n'.encode('utf-8'),
+        b'window.PITCH_DATA = ', artifacts['pitch_leaderboard'], b';\n',
+        b'window.PITCHER_DATA = ', artifacts['pitcher_leaderboard'], b';\n',
+        b'window.HITTER_DATA = ', artifacts['hitter_leaderboard'], b';\n',
+        b'window.PITCH_INDEX = ', artifacts['pitch_index'], b';\n',
+        b'window.PITCHER_INDEX = ', artifacts['pitcher_index'], b';\n',
+        b'window.HITTER_INDEX = ', artifacts['hitter_index'], b';\n',
+        b'window.METADATA = ', canonical_json(metadata), b';\n',
+        b'window.DETAILS_MANIFEST = ', canonical_json(details_manifest), b';\n',
+    ])
+
+    paths = dict(HASHED_FILES, metadata='metadata.json', data_embedded='data_embedded.js')
+    for name, data in artifacts.items():
+        path = os.path.join(data_dir, paths[name])
+        write_if_changed(path, data)
+        write_precompressed(path, data, precompress)
+        if name in files:
+            hashed = os.path.join(data_dir, files[name])
+            write_if_changed(hashed, data)
+            write_precompressed(hashed, data, precompress)
+            remove_stale_hashed(path, hashed)
+
+    print(f"\nOutput written to {data_dir}/" + (" (compact columnar leaderboards)" if compact else ""))
+    print(f"  pitch_leaderboard.json  ({len(outputs['pitch_leaderboard'])} rows)")
+    print(f"  pitcher_leaderboard.json ({len(outputs['pitcher_leaderboard'])} rows)")
+    print(f"  hitter_leaderboard.json  ({len(outputs['hitter_leaderboard'])} rows)")
+    print("  pitch_index.json, pitcher_index.json, hitter_index.json")
+    print(f"  metadata.json (content {metadata['contentHash']}, generated {metadata['generatedAt']})")
+    print(f"  {DETAILS_DIR}/ ({len(details_manifest['pitchers'])} pitcher, "
+          f"{len(details_manifest['summaries'])} summary and "
+          f"{len(details_manifest['hitters'])} hitter shards)")
+    print(f"  {WINDOWS_DIR}/ ({', '.join(window_files) or 'no dated pitches'})")
     print(f"  data_embedded.js")
+    if precompress:
+        print(f"  + {' / '.join(PRECOMPRESS_FORMATS[fmt] for fmt in precompress)} siblings")
+    print(f"  {REPORT.counters['filesWritten']} files written, {REPORT.counters['filesUnchanged']} unchanged")
+
+
+def load_state(path, books, fingerprints, full_rebuild=False, partial=False):
+    """(state, unseen): the saved aggregate state and the worksheets it still has to fold in,
+    or a fresh state and every worksheet when it is missing, stale or full_rebuild is set.
+    Books whose fingerprints are None are not read this run (nothing unseen). A partial run
+    (--only / --since) cannot rebuild the state from scratch and exits instead."""
+    state = None if full_rebuild else AggregateState.load(path)
+    unseen = state.unseen_worksheets(books, fingerprints) if state is not None else None
+    if unseen is None:
+        if partial:
+            raise SystemExit(f"No usable aggregate state in {path} (missing, or a worksheet it folded in has "
+                             f"changed): run without --only / --since to rebuild it")
+        if not full_rebuild:
+            print("No usable aggregate state: rebuilding from every worksheet")
+        state = AggregateState()
+        unseen = [list(zip(worksheets, book_fingerprints))
+                  for (_, worksheets), book_fingerprints in zip(books, fingerprints)]
+    return state, unseen
+
+
+def check_state(state, outputs, source, books):
+    """Re-aggregate every worksheet, in the order the state folded them in, and exit with an
+    error if any artifact differs from outputs."""
+    print("\nChecking the incremental aggregates against a full recompute...")
+    full = AggregateState()
+    fold_sheets(full, *source.read(books, state.fold_order(books)))
+    mismatched = diff_outputs(outputs, build_outputs(full))
+    if mismatched:
+        raise SystemExit(f"Aggregate state check failed: {', '.join(mismatched)} differ "
+                         f"(run with --full-rebuild)")
+    print("Aggregate state check passed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--full-rebuild', action='store_true',
+                        help=f"ignore {STATE_FILE} and the worksheet snapshot cache: re-download and "
+                             f"re-aggregate every worksheet (picks up in-place edits to old tabs, which the "
+                             f"fingerprints miss)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="build the leaderboard stages on a pool of N processes (output is identical)")
+    parser.add_argument('--check-state', action='store_true',
+                        help="after an incremental run, re-aggregate every worksheet (in the order the state "
+                             "folded them in) and fail if the outputs differ")
+    parser.add_argument('--source', metavar='DIR',
+                        help="read worksheets from a local snapshot (see LocalSource) instead of Google Sheets")
+    parser.add_argument('--record', metavar='DIR',
+                        help="save every worksheet read to DIR as a local snapshot (implies --full-rebuild)")
+    parser.add_argument('--record-format', choices=SNAPSHOT_FORMATS, default='csv',
+                        help="tab file format for --record (default: csv)")
+    parser.add_argument('--fetch-workers', type=int, default=FETCH_WORKERS, metavar='N',
+                        help=f"Sheets API download threads (default: {FETCH_WORKERS})")
+    parser.add_argument('--fetch-rate', type=float, default=FETCH_RATE, metavar='R',
+                        help=f"sustained Sheets API requests per second, shared by both spreadsheets "
+                             f"(default: {FETCH_RATE})")
+    parser.add_argument('--fetch-burst', type=int, default=FETCH_BURST, metavar='N',
+                        help=f"Sheets API requests allowed back-to-back after an idle spell (default: {FETCH_BURST})")
+    parser.add_argument('--data-dir', metavar='DIR',
+                        help=f"write the outputs and {STATE_FILE} here instead of data/")
+    parser.add_argument('--compact', action='store_true',
+                        help="write the leaderboards as columnar tables with quantized rates (see columnar_table)")
+    parser.add_argument('--precompress', action='append', choices=sorted(PRECOMPRESS_FORMATS), default=[],
+                        help="also write .gz / .br copies of the leaderboards, metadata and data_embedded.js "
+                             "(repeatable; brotli needs the brotli package)")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"cProfile the fold and build stages, on every thread, into {PROFILE_FILE} (next to "
+                             f"the outputs) and trace Python allocations per stage (slower; stages that "
+                             f"overlap another thread's get no traced peak)")
+    parser.add_argument('--only', action='append', choices=ARTIFACTS,
+                        help="rebuild only this artifact (repeatable), reading only the spreadsheets it comes "
+                             "from; the other artifacts are reused from the data directory (metadata is always "
+                             "refreshed, and the details whenever the pitching spreadsheet is read)")
+    parser.add_argument('--since', metavar='YYYY-MM-DD', type=date.fromisoformat,
+                        help="fold only new worksheets dated on or after this day (by their title); older "
+                             "unseen ones are left for a later run")
+    args = parser.parse_args()
+    partial = bool(args.only or args.since)
+    if partial and (args.full_rebuild or args.record or args.check_state):
+        parser.error("--only / --since update the saved state in place: they cannot be combined with "
+                     "--full-rebuild, --record or --check-state")
+    if args.fetch_workers < 1 or args.fetch_burst < 1 or not args.fetch_rate > 0:
+        parser.error("--fetch-workers and --fetch-burst must be at least 1 and --fetch-rate above 0")
+    only = [name for name in ARTIFACTS if name in (args.only or ARTIFACTS)]
+    read_books = [any(name in ARTIFACT_BOOKS[artifact] for artifact in only) for name in BOOK_NAMES]
+    if read_books[BOOK_NAMES.index('pitching')] and 'details' not in only:
+        # New pitches' scatter-plot points are only kept in the detail shards: rewrite them too
+        only = [name for name in ARTIFACTS if name in only or name == 'details']
+
+    data_dir = args.data_dir or DATA_DIR
+    os.makedirs(data_dir, exist_ok=True)
+    state_path = os.path.join(data_dir, STATE_FILE)
+    previous = load_previous_outputs(data_dir, set(ARTIFACTS) - set(only)) if args.only else None
+
+    if args.profile:
+        REPORT.profiler = cProfile.Profile()
+        tracemalloc.start()
+
+    rebuild = args.full_rebuild or bool(args.record)
+    source = LocalSource(args.source) if args.source else SheetsSource(SHEET_CACHE_DIR, args.fetch_workers, rebuild,
+                                                                       args.fetch_rate, args.fetch_burst)
+    with REPORT.stage('open'):
+        books = source.open()
+    with REPORT.stage('probe') as st:
+        # Only the spreadsheets the requested artifacts come from (None: not read this run)
+        probed = iter(source.probe([book for book, read in zip(books, read_books) if read]))
+        fingerprints = [next(probed) if read else None for read in read_books]
+        st['worksheets'] = sum(len(fp) for fp in fingerprints if fp is not None)
+
+    # Fold only the worksheets the saved state has not seen; start over if it is stale
+    with REPORT.stage('load state'):
+        state, unseen = load_state(state_path, books, fingerprints, rebuild, partial)
+    incremental = any(state.sheets.values())
+    if args.since:
+        unseen, skipped = worksheets_since(unseen, args.since)
+        print(f"--since {args.since}: {skipped} older unseen worksheets left for a later run")
+
+    # Both spreadsheets are read concurrently; each iterator yields its sheets in order
+    sheets = source.read(books, unseen)
+    recorded = {name: [] for name in BOOK_NAMES} if args.record else None
+    if recorded is not None:
+        sheets = [record_worksheets(args.record, name, book_sheets, recorded[name], args.record_format)
+                  for name, book_sheets in zip(BOOK_NAMES, sheets)]
+    # Without a process pool, a book's leaderboards are built on a finisher thread as soon as it is
+    # folded, while the other book is still being fetched and folded
+    finisher = ThreadPoolExecutor(max_workers=1) if args.workers <= 1 else None
+    finishing = {}
+
+    def on_folded(book):
+        finishing[book] = finisher.submit(finish_book, state, book, only)
+
+    with REPORT.stage('fold', profile=True) as st:
+        n_pitches, n_hitter_pitches = fold_sheets(state, *sheets, on_folded=finisher and on_folded)
+        state.mark_folded(books, unseen)
+        st['rows'] = n_pitches + n_hitter_pitches
+    if recorded is not None:
+        write_snapshot_manifest(args.record, books, recorded)
+    print(f"Read {n_pitches} pitches from {len(unseen[0])} of {len(books[0][1])} sheets")
+    print(f"Read {n_hitter_pitches} pitches from {len(unseen[1])} of {len(books[1][1])} sheets (hitters)")
+
+    with REPORT.stage('build', profile=True):
+        finished = {book: future.result() for book, future in finishing.items()}
+        outputs = build_outputs(state, args.workers, only, previous, finished)
+    if finisher is not None:
+        finisher.shutdown()
+    if args.check_state and incremental:
+        with REPORT.stage('check state', profile=True):
+            check_state(state, outputs, source, books)
+
+    with REPORT.stage('write'):
+        write_outputs(outputs, data_dir, args.compact, args.precompress)
+    with REPORT.stage('save state'):
+        state.save(state_path)
+    print(f"  {STATE_FILE}")
+
+    REPORT.write(os.path.join(data_dir, REPORT_FILE), mode='incremental' if incremental else 'full',
+                 source=args.source or 'sheets', workers=args.workers, only=only,
+                 since=args.since and args.since.isoformat(),
+                 pitches=sum(state.pitch_groups.count('n')), newPitches=n_pitches,
+                 newHitterPitches=n_hitter_pitches,
+                 worksheets=[len(book_unseen) for book_unseen in unseen])
+    print(f"  {REPORT_FILE}")
+    stats = REPORT.profile_stats() if REPORT.profiler is not None else None
+    if stats is not None:
+        profile_path = os.path.join(data_dir, PROFILE_FILE)
+        stats.dump_stats(profile_path)
+        print(f"\nProfile of the fold and build stages written to {profile_path}")
+        stats.sort_stats('cumulative').print_stats(25)
 
 
 if __name__ == '__main__':
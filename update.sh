@@ -1,6 +1,6 @@
 #!/bin/bash
 # Update ST 2026 Pitching Leaderboard
-# Usage: ./update.sh
+# Usage: ./update.sh [process_data.py options, e.g. --only hitter or --since 2026-03-01]
 
 set -e
 cd "$(dirname "$0")"
@@ -10,7 +10,7 @@ echo ""
 
 # 1. Pull latest data from Google Sheets and process
 echo "→ Fetching data from Google Sheets..."
-python3 process_data.py
+python3 process_data.py --compact "$@"
 
 # 2. Commit and push to GitHub Pages
 echo ""